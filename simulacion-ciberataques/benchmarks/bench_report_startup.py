@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Banco de pruebas del tiempo de arranque del generador de informes.
+
+El generador de informes se invoca tras cada ejecución, por lo que en los informes
+pequeños su tiempo total lo domina la importación de dependencias. Este script
+genera unos resultados sintéticos y ejecuta `generate_report.py` en procesos nuevos
+para cada formato, midiendo:
+
+    - Tiempo de importación del módulo generate_report
+    - Tiempo total del proceso (arranque del intérprete, importación e informe)
+    - Dependencias pesadas cargadas (matplotlib, numpy, pandas, jinja2, pdfkit...)
+
+El resumen JSON no debe cargar ninguna dependencia pesada; si lo hace, el script
+termina con código 1. Los formatos cuyas dependencias no están instaladas se omiten.
+Como en bench_runner.py, los resultados se pueden guardar como referencia y
+compararse con ejecuciones posteriores.
+
+Uso:
+    python benchmarks/bench_report_startup.py
+    python benchmarks/bench_report_startup.py --formats json --repeat 20
+    python benchmarks/bench_report_startup.py --save-baseline
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from bench_runner import SCRIPTS_DIR, compare
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_report.json")
+
+# Dependencias cuya carga se vigila
+HEAVY_MODULES = ("matplotlib", "numpy", "pandas", "jinja2", "pdfkit", "markdown")
+
+# Dependencias necesarias para cada formato
+FORMAT_REQUIREMENTS = {"json": (), "html": ("jinja2", "matplotlib"), "pdf": ("jinja2", "matplotlib", "pdfkit")}
+
+COMPARED_METRICS = {
+    "import_seconds": False,
+    "total_seconds": False
+}
+
+# Código del proceso hijo: importa el generador, genera el informe y guarda las mediciones
+CHILD = """
+import json, logging, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import generate_report
+imported = time.perf_counter()
+logging.disable(logging.INFO)
+metrics_file, heavy = sys.argv[5], sys.argv[6].split(",")
+sys.argv = ["generate_report.py", "--input", sys.argv[2], "--output", sys.argv[3], "--format", sys.argv[4]]
+generate_report.main()
+with open(metrics_file, "w") as f:
+    json.dump({"import_seconds": imported - start, "report_seconds": time.perf_counter() - imported,
+               "heavy_modules": [m for m in heavy if m in sys.modules]}, f)
+"""
+
+
+def build_results(techniques: int) -> Dict[str, Any]:
+    """
+    Genera unos resultados sintéticos con la forma de results.json.
+
+    Args:
+        techniques: Número de técnicas (en pasos de diez)
+
+    Returns:
+        Resultados de una ejecución
+    """
+    start = datetime.datetime(2024, 1, 1, 3, 0, 0)
+    steps = []
+    for i in range(max(1, techniques // 10)):
+        step_start = start + datetime.timedelta(minutes=i)
+        items = [{
+            "id": f"T{1000 + j}",
+            "name": f"Técnica sintética {i + 1}.{j + 1}",
+            "status": "success" if (i + j) % 4 else "failed",
+            "start_time": step_start.isoformat(),
+            "end_time": (step_start + datetime.timedelta(seconds=5)).isoformat(),
+            "output": [{"command": "true", "returncode": 0, "stdout": "", "stderr": ""}],
+            "error": "",
+            "wall_seconds": 5.0
+        } for j in range(10)]
+        steps.append({
+            "name": f"Paso {i + 1}",
+            "status": "success" if all(t["status"] == "success" for t in items) else "failed",
+            "start_time": step_start.isoformat(),
+            "end_time": (step_start + datetime.timedelta(seconds=50)).isoformat(),
+            "techniques": items
+        })
+    return {
+        "scenario": "Banco de pruebas del generador de informes",
+        "start_time": start.isoformat(),
+        "end_time": (start + datetime.timedelta(minutes=len(steps))).isoformat(),
+        "status": "completed",
+        "techniques": [{"id": t["id"], "name": t["name"], "status": t["status"]}
+                       for step in steps for t in step["techniques"]],
+        "steps": steps
+    }
+
+
+def _available(modules: List[str]) -> bool:
+    """Comprueba si las dependencias de un formato están instaladas."""
+    code = "import importlib.util, sys; sys.exit(any(importlib.util.find_spec(m) is None for m in sys.argv[1:]))"
+    return subprocess.run([sys.executable, "-c", code, *modules]).returncode == 0
+
+
+def measure(fmt: str, input_dir: str, workdir: str, repeat: int) -> Optional[Dict[str, Any]]:
+    """
+    Mide el arranque del generador de informes para un formato.
+
+    Returns:
+        Medianas de los tiempos y dependencias pesadas cargadas, o None si el informe falla
+    """
+    runs = []
+    for n in range(max(1, repeat)):
+        metrics_file = os.path.join(workdir, f"metrics_{fmt}_{n}.json")
+        output = os.path.join(workdir, f"report_{n}.{fmt}")
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, "-c", CHILD, os.path.abspath(SCRIPTS_DIR), input_dir, output, fmt,
+             metrics_file, ",".join(HEAVY_MODULES)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+        )
+        total = time.perf_counter() - start
+        if process.returncode != 0:
+            print(f"  Error al generar el informe {fmt}:\n{process.stderr}")
+            return None
+        with open(metrics_file, 'r', encoding='utf-8') as f:
+            runs.append(dict(json.load(f), total_seconds=total))
+
+    return {
+        "params": {"format": fmt},
+        "success": True,
+        "import_seconds": round(statistics.median(run["import_seconds"] for run in runs), 4),
+        "report_seconds": round(statistics.median(run["report_seconds"] for run in runs), 4),
+        "total_seconds": round(statistics.median(run["total_seconds"] for run in runs), 4),
+        "heavy_modules": sorted({m for run in runs for m in run["heavy_modules"]})
+    }
+
+
+def main() -> int:
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Banco de pruebas del arranque del generador de informes')
+    parser.add_argument('--formats', nargs='+', choices=list(FORMAT_REQUIREMENTS), default=list(FORMAT_REQUIREMENTS),
+                        help='Formatos a medir (por defecto, todos los que tengan sus dependencias instaladas)')
+    parser.add_argument('--techniques', type=int, default=200, help='Técnicas de los resultados sintéticos')
+    parser.add_argument('--repeat', type=int, default=10, help='Ejecuciones de cada formato (se usa la mediana)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Archivo de referencia')
+    parser.add_argument('--save-baseline', action='store_true', help='Guardar los resultados como nueva referencia')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Variación relativa admitida frente a la referencia (0.25 = 25 %%)')
+    args = parser.parse_args()
+
+    report = {
+        "date": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "cases": {}
+    }
+    failures = []
+    workdir = tempfile.mkdtemp(prefix="simcib-bench-report-")
+    try:
+        input_dir = os.path.join(workdir, "results")
+        os.makedirs(input_dir)
+        with open(os.path.join(input_dir, "results.json"), 'w', encoding='utf-8') as f:
+            json.dump(build_results(args.techniques), f)
+
+        for fmt in args.formats:
+            if not _available(list(FORMAT_REQUIREMENTS[fmt])):
+                print(f"Formato {fmt}: dependencias no instaladas ({', '.join(FORMAT_REQUIREMENTS[fmt])}); se omite")
+                continue
+            print(f"Midiendo el formato {fmt}...", flush=True)
+            result = measure(fmt, input_dir, workdir, args.repeat)
+            if result is None:
+                failures.append(f"{fmt}: el informe no se pudo generar")
+                continue
+            report["cases"][fmt] = result
+            if fmt == "json" and result["heavy_modules"]:
+                failures.append(f"json: el resumen carga dependencias pesadas ({', '.join(result['heavy_modules'])})")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'Formato':<8} {'Importación (s)':>16} {'Informe (s)':>12} {'Total (s)':>10}  Dependencias pesadas")
+    for fmt, result in report["cases"].items():
+        print(f"{fmt:<8} {result['import_seconds']:>16} {result['report_seconds']:>12} {result['total_seconds']:>10}  "
+              f"{', '.join(result['heavy_modules']) or '-'}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nReferencia guardada en {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nComparación con la referencia del {baseline.get('date', '?')} (tolerancia {args.tolerance:.0%}):")
+        failures += compare(report, baseline, args.tolerance, COMPARED_METRICS)
+    else:
+        print(f"\nNo hay referencia en {args.baseline}; use --save-baseline para crearla")
+
+    if failures:
+        print(f"\n{len(failures)} problemas:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
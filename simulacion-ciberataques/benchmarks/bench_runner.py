@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Banco de pruebas de rendimiento del ejecutor de escenarios.
+
+Genera escenarios sintéticos de tamaño configurable (miles de pasos y técnicas con
+comandos vacíos, esperas o salida abundante), los ejecuta con `ScenarioRunner` sin
+esperas de pacing y mide, para cada caso:
+
+    - Técnicas por segundo (rendimiento del camino crítico del ejecutor)
+    - Memoria residente máxima del proceso que ejecuta el escenario
+    - Tamaño de results.json, del diario y de las salidas volcadas a disco
+
+Los casos con backend `replay` no lanzan procesos: los comandos se reproducen desde
+una grabación sintética con el tiempo comprimido a cero, de forma que se mide solo
+el coste del planificador, el diario, la captura de salida y los resultados. Los
+casos con backend `process` ejecutan los comandos reales con el backend asíncrono.
+Cada caso se ejecuta en un proceso hijo nuevo para que la memoria medida sea solo
+la suya.
+
+Los resultados se pueden guardar como referencia y comparar con ejecuciones
+posteriores; una caída del rendimiento o un aumento de memoria o tamaño por encima
+de la tolerancia se considera una regresión y el script termina con código 1.
+
+Uso:
+    python benchmarks/bench_runner.py
+    python benchmarks/bench_runner.py --cases noop heavy-output --scale 0.1
+    python benchmarks/bench_runner.py --save-baseline
+    python benchmarks/bench_runner.py --baseline benchmarks/baseline.json --tolerance 0.2
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src", "scripts")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Casos disponibles: tamaño del escenario, tipo de comando y backend de ejecución
+CASES = {
+    "noop": {
+        "description": "Miles de técnicas secuenciales con un comando vacío (reproducido)",
+        "steps": 100, "techniques": 20, "commands": 1, "kind": "noop",
+        "backend": "replay", "parallel": False
+    },
+    "noop-parallel": {
+        "description": "Miles de técnicas independientes dentro de cada paso (reproducido)",
+        "steps": 100, "techniques": 20, "commands": 1, "kind": "noop",
+        "backend": "replay", "parallel": True
+    },
+    "sleep": {
+        "description": "Técnicas con esperas grabadas, reproducidas con el tiempo comprimido a cero",
+        "steps": 50, "techniques": 20, "commands": 2, "kind": "sleep",
+        "backend": "replay", "parallel": True
+    },
+    "output": {
+        "description": "Técnicas con salida moderada que no supera el límite de captura (reproducido)",
+        "steps": 50, "techniques": 10, "commands": 1, "kind": "output", "lines": 2000,
+        "backend": "replay", "parallel": True
+    },
+    "noop-process": {
+        "description": "Técnicas con un comando vacío ejecutado como proceso real",
+        "steps": 20, "techniques": 10, "commands": 1, "kind": "noop",
+        "backend": "process", "parallel": True
+    },
+    "heavy-output": {
+        "description": "Técnicas con salida muy abundante que se vuelca a disco (proceso real)",
+        "steps": 4, "techniques": 4, "commands": 1, "kind": "output", "lines": 300000,
+        "backend": "process", "parallel": True
+    }
+}
+
+# Métricas comparadas con la referencia: nombre -> True si un valor mayor es mejor
+COMPARED_METRICS = {
+    "techniques_per_second": True,
+    "peak_rss_kb": False,
+    "results_bytes": False
+}
+
+
+def _command(case: Dict[str, Any]) -> List[str]:
+    """Comando de las técnicas de un caso."""
+    if case["kind"] == "sleep":
+        return ["sleep", "0.05"]
+    if case["kind"] == "output":
+        return ["seq", "1", str(case.get("lines", 1000))]
+    return ["true"]
+
+
+def build_scenario(case: Dict[str, Any], scale: float) -> Dict[str, Any]:
+    """
+    Genera el escenario sintético de un caso.
+
+    Args:
+        case: Definición del caso
+        scale: Factor aplicado al número de pasos
+
+    Returns:
+        Escenario con la misma forma que los archivos YAML de escenarios
+    """
+    command = _command(case)
+    steps = []
+    for i in range(max(1, int(case["steps"] * scale))):
+        techniques = []
+        for j in range(case["techniques"]):
+            technique = {
+                "id": f"T{1000 + j % 50}",
+                "name": f"Técnica sintética {i + 1}.{j + 1}",
+                "commands": [list(command) for _ in range(case["commands"])]
+            }
+            if case["parallel"]:
+                technique["depends_on"] = []
+            techniques.append(technique)
+        steps.append({"name": f"Paso {i + 1}", "techniques": techniques})
+    return {
+        "name": f"Banco de pruebas ({case['kind']})",
+        "description": case["description"],
+        "steps": steps
+    }
+
+
+def build_fixture(case: Dict[str, Any], path: str) -> None:
+    """
+    Genera la grabación sintética que reproduce el comando de un caso.
+
+    Args:
+        case: Definición del caso
+        path: Archivo de grabación (JSON Lines)
+    """
+    command = _command(case)
+    stdout = ""
+    wall_seconds = 0.001
+    if case["kind"] == "output":
+        stdout = "".join(f"{n}\n" for n in range(1, case.get("lines", 1000) + 1))
+    elif case["kind"] == "sleep":
+        wall_seconds = float(command[1])
+    record = {
+        "command": command,
+        "cwd": None,
+        "returncode": 0,
+        "stdout": stdout,
+        "stderr": "",
+        "timed_out": False,
+        "resources": {"wall_seconds": wall_seconds, "cpu_user_seconds": 0.0,
+                      "cpu_sys_seconds": 0.0, "max_rss_kb": 0, "signal": None}
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _directory_size(path: str) -> int:
+    """Tamaño total en bytes de los archivos de un directorio."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def run_case(name: str, case: Dict[str, Any], scale: float, max_workers: int, workdir: str) -> Dict[str, Any]:
+    """
+    Ejecuta un caso en el proceso actual y mide su rendimiento.
+
+    Se llama en un proceso hijo nuevo para que la memoria máxima medida sea la del caso.
+
+    Args:
+        name: Nombre del caso
+        case: Definición del caso
+        scale: Factor aplicado al número de pasos
+        max_workers: Técnicas ejecutándose en paralelo
+        workdir: Directorio de trabajo del caso
+
+    Returns:
+        Métricas del caso
+    """
+    import resource
+
+    sys.path.insert(0, SCRIPTS_DIR)
+    import logging
+    from journal import JOURNAL_FILE, RESULTS_FILE
+    from replay import Fixture
+    from run_scenario import OUTPUTS_DIR, ScenarioRunner
+    logging.getLogger('run_scenario').setLevel(logging.WARNING)
+
+    scenario_file = os.path.join(workdir, f"{name}.yaml")
+    with open(scenario_file, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(build_scenario(case, scale), f, allow_unicode=True, sort_keys=False)
+    fixture = None
+    if case["backend"] == "replay":
+        fixture_file = os.path.join(workdir, f"{name}.fixture.jsonl")
+        build_fixture(case, fixture_file)
+        fixture = Fixture(fixture_file)
+
+    output_dir = os.path.join(workdir, "results")
+    runner = ScenarioRunner(scenario_file, output_dir=output_dir, max_workers=max_workers, pacing="none",
+                            probe_ttl=0, plan_cache=False, replay=fixture, time_scale=0.0)
+    techniques = sum(len(step["techniques"]) for step in runner.scenario.get("steps", []))
+
+    start = time.perf_counter()
+    success = runner.run()
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss //= 1024
+
+    def size(filename: str) -> int:
+        path = os.path.join(output_dir, filename)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    return {
+        "success": success,
+        "techniques": techniques,
+        "seconds": round(elapsed, 4),
+        "techniques_per_second": round(techniques / elapsed, 2) if elapsed > 0 else 0.0,
+        "peak_rss_kb": peak_rss,
+        "results_bytes": size(RESULTS_FILE),
+        "journal_bytes": size(JOURNAL_FILE),
+        "outputs_bytes": _directory_size(os.path.join(output_dir, OUTPUTS_DIR))
+    }
+
+
+def measure(name: str, case: Dict[str, Any], scale: float, max_workers: int, repeat: int) -> Dict[str, Any]:
+    """
+    Ejecuta un caso varias veces, cada una en un proceso hijo, y agrega las métricas.
+
+    Returns:
+        Métricas del caso: mediana del rendimiento y máximo de memoria y tamaños
+    """
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(max(1, repeat)):
+        workdir = tempfile.mkdtemp(prefix=f"simcib-bench-{name}-")
+        try:
+            with context.Pool(1) as pool:
+                runs.append(pool.apply(run_case, (name, case, scale, max_workers, workdir)))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "params": {"scale": scale, "max_workers": max_workers,
+                   **{key: value for key, value in case.items() if key != "description"}},
+        "success": all(run["success"] for run in runs),
+        "techniques": runs[0]["techniques"],
+        "seconds": round(statistics.median(run["seconds"] for run in runs), 4),
+        "techniques_per_second": round(statistics.median(run["techniques_per_second"] for run in runs), 2),
+        "peak_rss_kb": max(run["peak_rss_kb"] for run in runs),
+        "results_bytes": max(run["results_bytes"] for run in runs),
+        "journal_bytes": max(run["journal_bytes"] for run in runs),
+        "outputs_bytes": max(run["outputs_bytes"] for run in runs)
+    }
+
+
+def environment_differences(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """
+    Compara el entorno en el que se midieron un informe y la referencia.
+
+    Returns:
+        Descripción de cada dato del entorno (Python, plataforma, CPUs) que no coincide
+    """
+    return [f"{key}: {baseline.get(key)} en la referencia, {report.get(key)} ahora"
+            for key in ("python", "platform", "cpus") if baseline.get(key) != report.get(key)]
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            metrics: Optional[Dict[str, bool]] = None) -> List[str]:
+    """
+    Compara un informe con la referencia.
+
+    Solo se comparan los casos ejecutados con los mismos parámetros que en la referencia.
+
+    Args:
+        report: Informe de la ejecución actual
+        baseline: Informe de referencia
+        tolerance: Variación relativa admitida (0.15 = 15 %)
+        metrics: Métricas comparadas (nombre -> True si un valor mayor es mejor);
+            por defecto, las del ejecutor
+
+    Returns:
+        Lista de regresiones encontradas
+    """
+    regressions = []
+    for name, current in report["cases"].items():
+        reference = baseline.get("cases", {}).get(name)
+        if reference is None:
+            print(f"  {name}: sin referencia")
+            continue
+        if reference.get("params") != current["params"]:
+            print(f"  {name}: parámetros distintos de la referencia; no se compara")
+            continue
+        for metric, higher_is_better in (metrics or COMPARED_METRICS).items():
+            old, new = reference.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change < -tolerance if higher_is_better else change > tolerance
+            marker = "REGRESIÓN" if worse else "ok"
+            print(f"  {name:<16} {metric:<22} {old:>14} -> {new:<14} {change:+.1%}  {marker}")
+            if worse:
+                regressions.append(f"{name}: {metric} {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Muestra las métricas de cada caso en forma de tabla."""
+    print(f"{'Caso':<16} {'Técnicas':>9} {'Segundos':>9} {'Téc./s':>10} {'RSS (KB)':>10} "
+          f"{'results':>11} {'diario':>11} {'salidas':>11}")
+    for name, result in report["cases"].items():
+        status = "" if result["success"] else "  (con fallos)"
+        print(f"{name:<16} {result['techniques']:>9} {result['seconds']:>9} {result['techniques_per_second']:>10} "
+              f"{result['peak_rss_kb']:>10} {result['results_bytes']:>11} {result['journal_bytes']:>11} "
+              f"{result['outputs_bytes']:>11}{status}")
+
+
+def main() -> int:
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Banco de pruebas de rendimiento del ejecutor de escenarios')
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES),
+                        help='Casos a ejecutar (por defecto, todos)')
+    parser.add_argument('--scale', type=float, default=1.0, help='Factor aplicado al número de pasos de cada caso')
+    parser.add_argument('--max-workers', type=int, default=4, help='Técnicas ejecutándose en paralelo')
+    parser.add_argument('--repeat', type=int, default=3, help='Ejecuciones de cada caso (se usa la mediana)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Archivo de referencia')
+    parser.add_argument('--save-baseline', action='store_true', help='Guardar los resultados como nueva referencia')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Variación relativa admitida frente a la referencia (0.15 = 15 %%)')
+    parser.add_argument('--json', metavar='ARCHIVO', help='Guardar el informe en formato JSON')
+    args = parser.parse_args()
+
+    report = {
+        "date": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "cases": {}
+    }
+    for name in args.cases:
+        print(f"Ejecutando {name}: {CASES[name]['description']}", flush=True)
+        report["cases"][name] = measure(name, CASES[name], args.scale, args.max_workers, args.repeat)
+    print()
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    regressions: List[str] = []
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nReferencia guardada en {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nComparación con la referencia del {baseline.get('date', '?')} "
+              f"(tolerancia {args.tolerance:.0%}):")
+        differences = environment_differences(report, baseline)
+        if differences:
+            print("  Aviso: la referencia se midió en otro entorno y las diferencias pueden no ser "
+                  f"regresiones ({'; '.join(differences)})")
+        regressions = compare(report, baseline, args.tolerance)
+    else:
+        print(f"\nNo hay referencia en {args.baseline}; use --save-baseline para crearla en esta "
+              "máquina (véase el README)")
+
+    if regressions:
+        print(f"\n{len(regressions)} regresiones:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    return 0 if all(result["success"] for result in report["cases"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
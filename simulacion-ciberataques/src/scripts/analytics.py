@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+
+"""
+Índice de resultados de simulaciones para análisis entre ejecuciones.
+
+Los directorios de resultados (results.json o, si la ejecución se interrumpió, su
+diario journal.jsonl) se indexan en una base de datos SQLite local con una tabla
+por entidad:
+
+    runs        Una fila por ejecución: escenario, estado, horas y tiempos
+    steps       Una fila por paso ejecutado, con su duración
+    techniques  Una fila por técnica ejecutada, con su objetivo, estado y duración
+    commands    Una fila por comando, con su código de salida y los recursos consumidos
+
+La salida de los comandos no se indexa. Cada ejecución se identifica por la ruta de
+su directorio y se vuelve a indexar solo si su archivo de resultados ha cambiado,
+de forma que las consultas de tendencias se responden desde el índice sin volver a
+leer los archivos JSON.
+"""
+
+import datetime
+import glob
+import logging
+import os
+import sqlite3
+import statistics
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from journal import JOURNAL_FILE, RESULTS_FILE, load_results
+
+logger = logging.getLogger('generate_report.analytics')
+
+DEFAULT_INDEX = "results_index.db"
+
+# Se incrementa al cambiar el esquema; un índice con otra versión se reconstruye
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    scenario TEXT,
+    status TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    wall_seconds REAL,
+    execution_seconds REAL,
+    pacing_seconds REAL,
+    source_mtime REAL,
+    source_size INTEGER,
+    indexed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    step_index INTEGER,
+    name TEXT,
+    status TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    duration_seconds REAL
+);
+CREATE TABLE IF NOT EXISTS techniques (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    step_index INTEGER,
+    technique_index INTEGER,
+    technique_id TEXT,
+    name TEXT,
+    target TEXT,
+    status TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    wall_seconds REAL
+);
+CREATE TABLE IF NOT EXISTS commands (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    step_index INTEGER,
+    technique_index INTEGER,
+    command_index INTEGER,
+    command TEXT,
+    returncode INTEGER,
+    wall_seconds REAL,
+    cpu_user_seconds REAL,
+    cpu_sys_seconds REAL,
+    max_rss_kb INTEGER,
+    signal INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_start ON runs(start_time);
+CREATE INDEX IF NOT EXISTS runs_scenario ON runs(scenario);
+CREATE INDEX IF NOT EXISTS steps_run ON steps(run_id);
+CREATE INDEX IF NOT EXISTS techniques_run ON techniques(run_id);
+CREATE INDEX IF NOT EXISTS techniques_id ON techniques(technique_id);
+CREATE INDEX IF NOT EXISTS commands_run ON commands(run_id);
+"""
+
+# Agrupación temporal de las tendencias: periodo -> expresión SQL sobre runs.start_time
+PERIODS = {
+    "day": "substr(r.start_time, 1, 10)",
+    "week": "strftime('%Y-W%W', r.start_time)",
+    "month": "substr(r.start_time, 1, 7)"
+}
+
+
+def find_run_dirs(patterns: Iterable[str]) -> List[str]:
+    """
+    Busca directorios de resultados de ejecuciones.
+
+    Se recorren recursivamente los directorios indicados, de forma que se incluyen
+    los escenarios de un lote y los objetivos del modo matriz.
+
+    Args:
+        patterns: Directorios o patrones glob
+
+    Returns:
+        Directorios que contienen results.json o journal.jsonl, ordenados
+    """
+    run_dirs = set()
+    for pattern in patterns:
+        for root in glob.glob(pattern) or [pattern]:
+            for current, _, files in os.walk(root):
+                if RESULTS_FILE in files or JOURNAL_FILE in files:
+                    run_dirs.add(os.path.abspath(current))
+    return sorted(run_dirs)
+
+
+def _seconds_between(start: Any, end: Any) -> Optional[float]:
+    """Segundos entre dos fechas ISO 8601, o None si alguna no es válida."""
+    try:
+        return (datetime.datetime.fromisoformat(end) - datetime.datetime.fromisoformat(start)).total_seconds()
+    except (TypeError, ValueError):
+        return None
+
+
+def _source_file(run_dir: str) -> str:
+    """Archivo del que se cargan los resultados de una ejecución."""
+    results_file = os.path.join(run_dir, RESULTS_FILE)
+    return results_file if os.path.exists(results_file) else os.path.join(run_dir, JOURNAL_FILE)
+
+
+class ResultsIndex:
+    """Índice SQLite de los resultados de muchas ejecuciones."""
+
+    def __init__(self, path: str = DEFAULT_INDEX):
+        """
+        Abre el índice, creándolo si no existe.
+
+        Args:
+            path: Archivo de la base de datos
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # El índice solo contiene datos derivados: se reconstruye desde los resultados
+            with self.db:
+                for table in ("commands", "techniques", "steps", "runs"):
+                    self.db.execute(f"DROP TABLE IF EXISTS {table}")
+                self.db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self) -> "ResultsIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Cierra la base de datos."""
+        self.db.close()
+
+    def run_count(self) -> int:
+        """Número de ejecuciones indexadas."""
+        return self.db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def ingest(self, run_dir: str, force: bool = False) -> bool:
+        """
+        Indexa una ejecución, sustituyendo su versión anterior si ha cambiado.
+
+        Args:
+            run_dir: Directorio de resultados de la ejecución
+            force: Indexar aunque el archivo de resultados no haya cambiado
+
+        Returns:
+            True si se ha indexado, False si ya estaba indexada sin cambios
+
+        Raises:
+            FileNotFoundError: Si el directorio no contiene resultados
+            json.JSONDecodeError: Si results.json no es un JSON válido
+        """
+        path = os.path.abspath(run_dir)
+        stat = os.stat(_source_file(path))
+        row = self.db.execute("SELECT id, source_mtime, source_size FROM runs WHERE path = ?", (path,)).fetchone()
+        if row is not None and not force and row["source_mtime"] == stat.st_mtime and row["source_size"] == stat.st_size:
+            return False
+
+        results = load_results(path)
+        timing = results.get("timing", {})
+        with self.db:
+            if row is not None:
+                self.db.execute("DELETE FROM runs WHERE id = ?", (row["id"],))
+            run_id = self.db.execute(
+                "INSERT INTO runs (path, scenario, status, start_time, end_time, wall_seconds, execution_seconds, "
+                "pacing_seconds, source_mtime, source_size, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, results.get("scenario", ""), results.get("status", ""), results.get("start_time", ""),
+                 results.get("end_time", ""), timing.get("wall_seconds"), timing.get("execution_seconds"),
+                 timing.get("pacing_seconds"), stat.st_mtime, stat.st_size, datetime.datetime.now().isoformat())
+            ).lastrowid
+            self._insert_steps(run_id, results.get("steps", []))
+        return True
+
+    def _insert_steps(self, run_id: int, steps: List[Dict[str, Any]]) -> None:
+        """Inserta los pasos, técnicas y comandos de una ejecución."""
+        step_rows = []
+        technique_rows = []
+        command_rows = []
+        for i, step in enumerate(steps):
+            step_rows.append((run_id, i, step.get("name", ""), step.get("status", ""), step.get("start_time", ""),
+                              step.get("end_time", ""), _seconds_between(step.get("start_time"), step.get("end_time"))))
+            for j, technique in enumerate(step.get("techniques", [])):
+                wall_seconds = technique.get("wall_seconds")
+                if wall_seconds is None:
+                    wall_seconds = _seconds_between(technique.get("start_time"), technique.get("end_time"))
+                technique_rows.append((run_id, i, j, technique.get("id", "unknown"), technique.get("name", ""),
+                                       technique.get("target"), technique.get("status", ""),
+                                       technique.get("start_time", ""), technique.get("end_time", ""), wall_seconds))
+                output = technique.get("output")
+                if not isinstance(output, list):
+                    continue
+                for k, command in enumerate(output):
+                    resources = command.get("resources") or {}
+                    command_rows.append((run_id, i, j, k, command.get("command", ""), command.get("returncode"),
+                                         resources.get("wall_seconds"), resources.get("cpu_user_seconds"),
+                                         resources.get("cpu_sys_seconds"), resources.get("max_rss_kb"),
+                                         resources.get("signal")))
+        self.db.executemany("INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?, ?)", step_rows)
+        self.db.executemany("INSERT INTO techniques VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", technique_rows)
+        self.db.executemany("INSERT INTO commands VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", command_rows)
+
+    def prune(self) -> int:
+        """
+        Elimina del índice las ejecuciones cuyo directorio ya no existe.
+
+        Returns:
+            Número de ejecuciones eliminadas
+        """
+        missing = [(row["id"],) for row in self.db.execute("SELECT id, path FROM runs")
+                   if not os.path.isdir(row["path"])]
+        with self.db:
+            self.db.executemany("DELETE FROM runs WHERE id = ?", missing)
+        return len(missing)
+
+    @staticmethod
+    def _filters(scenario: Optional[str], since: Optional[str]) -> Tuple[str, List[Any]]:
+        """Condiciones SQL comunes de las consultas de tendencias."""
+        conditions = ["r.start_time != ''"]
+        params: List[Any] = []
+        if scenario:
+            conditions.append("r.scenario = ?")
+            params.append(scenario)
+        if since:
+            conditions.append("r.start_time >= ?")
+            params.append(since)
+        return " AND ".join(conditions), params
+
+    def success_trend(self, period: str = "day", scenario: Optional[str] = None,
+                      since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Calcula la tasa de éxito de cada técnica por periodo.
+
+        Args:
+            period: Agrupación temporal (day, week o month)
+            scenario: Limitar a las ejecuciones de un escenario
+            since: Limitar a las ejecuciones iniciadas a partir de esta fecha ISO 8601
+
+        Returns:
+            Lista de {technique_id, period, total, success, success_rate}
+
+        Raises:
+            ValueError: Si el periodo no es válido
+        """
+        if period not in PERIODS:
+            raise ValueError(f"Periodo no válido: {period} (válidos: {', '.join(PERIODS)})")
+        where, params = self._filters(scenario, since)
+        rows = self.db.execute(
+            f"SELECT t.technique_id, {PERIODS[period]} AS period, COUNT(*) AS total, "
+            f"SUM(t.status = 'success') AS success "
+            f"FROM techniques t JOIN runs r ON r.id = t.run_id WHERE {where} "
+            f"GROUP BY t.technique_id, period ORDER BY t.technique_id, period",
+            params
+        )
+        return [
+            {"technique_id": row["technique_id"], "period": row["period"], "total": row["total"],
+             "success": row["success"], "success_rate": round(100.0 * row["success"] / row["total"], 1)}
+            for row in rows
+        ]
+
+    def duration_regressions(self, window: int = 5, threshold: float = 0.25, scenario: Optional[str] = None,
+                             since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Busca técnicas cuya duración reciente ha empeorado.
+
+        Para cada técnica se compara la mediana de duración de sus `window` ejecuciones
+        más recientes con la mediana de las anteriores.
+
+        Args:
+            window: Número de ejecuciones recientes que se comparan
+            threshold: Aumento relativo a partir del cual se considera una regresión (0.25 = 25 %)
+            scenario: Limitar a las ejecuciones de un escenario
+            since: Limitar a las ejecuciones iniciadas a partir de esta fecha ISO 8601
+
+        Returns:
+            Lista de {technique_id, baseline_seconds, recent_seconds, change, baseline_runs,
+            recent_runs}, ordenada por el aumento relativo
+        """
+        where, params = self._filters(scenario, since)
+        rows = self.db.execute(
+            f"SELECT t.technique_id, t.wall_seconds FROM techniques t JOIN runs r ON r.id = t.run_id "
+            f"WHERE {where} AND t.wall_seconds IS NOT NULL AND t.status = 'success' "
+            f"ORDER BY t.technique_id, r.start_time",
+            params
+        )
+        durations: Dict[str, List[float]] = {}
+        for row in rows:
+            durations.setdefault(row["technique_id"], []).append(row["wall_seconds"])
+
+        regressions = []
+        for technique_id, values in durations.items():
+            if len(values) <= window:
+                continue
+            baseline = statistics.median(values[:-window])
+            recent = statistics.median(values[-window:])
+            if baseline > 0 and recent > baseline * (1 + threshold):
+                regressions.append({
+                    "technique_id": technique_id,
+                    "baseline_seconds": round(baseline, 3),
+                    "recent_seconds": round(recent, 3),
+                    "change": round((recent - baseline) / baseline * 100, 1),
+                    "baseline_runs": len(values) - window,
+                    "recent_runs": window
+                })
+        return sorted(regressions, key=lambda r: r["change"], reverse=True)
+
+    def outcome_changes(self, scenario: Optional[str] = None, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Busca las técnicas cuyo resultado sobre un objetivo ha cambiado en la última ejecución.
+
+        Args:
+            scenario: Limitar a las ejecuciones de un escenario
+            since: Limitar a las ejecuciones iniciadas a partir de esta fecha ISO 8601
+
+        Returns:
+            Lista de {technique_id, target, scenario, previous_status, current_status,
+            previous_time, current_time, run}
+        """
+        where, params = self._filters(scenario, since)
+        rows = self.db.execute(
+            f"SELECT t.technique_id, COALESCE(t.target, '') AS target, r.scenario, t.status, r.start_time, r.path "
+            f"FROM techniques t JOIN runs r ON r.id = t.run_id WHERE {where} "
+            f"ORDER BY r.scenario, t.technique_id, target, r.start_time",
+            params
+        )
+        last: Dict[Tuple[str, str, str], List[sqlite3.Row]] = {}
+        for row in rows:
+            history = last.setdefault((row["scenario"], row["technique_id"], row["target"]), [])
+            history.append(row)
+            del history[:-2]
+
+        changes = []
+        for (scenario_name, technique_id, target), history in sorted(last.items()):
+            if len(history) < 2 or history[0]["status"] == history[1]["status"]:
+                continue
+            previous, current = history
+            changes.append({
+                "technique_id": technique_id,
+                "target": target,
+                "scenario": scenario_name,
+                "previous_status": previous["status"],
+                "current_status": current["status"],
+                "previous_time": previous["start_time"],
+                "current_time": current["start_time"],
+                "run": current["path"]
+            })
+        return changes
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+
+"""
+Caché local de artefactos para la instalación de herramientas del entorno.
+
+La caché evita volver a descargar las herramientas en cada reconstrucción del
+laboratorio y permite reconstruirlo sin red una vez que está completa:
+
+    - git/      Réplicas (`git clone --mirror`) de los repositorios, que se
+                actualizan con `git remote update` y desde las que se clonan las
+                herramientas. Si no hay red, se usa la réplica tal como está.
+    - images/   Imágenes Docker fijadas por digest (`imagen@sha256:...`), guardadas
+                con `docker save` y nombradas por su digest, junto con el ID de la
+                imagen descargada (`<digest>.id`). Antes de descargar una imagen
+                fijada se comprueba si ya está en Docker o en la caché. El almacén
+                clásico de Docker no conserva el digest del registro al cargar una
+                imagen, por lo que una imagen se reconoce también por el ID registrado:
+                una carga desde la caché solo se acepta si produce ese ID, y en otro
+                caso se descarga.
+    - wheels/   Repositorio local de wheels de pip. Los paquetes se instalan desde
+                él sin acceder al índice; solo si falta alguno se construyen sus
+                wheels con `pip wheel`.
+
+Los comandos se ejecutan con la función del instalador, por lo que respetan su
+modo de simulación (--dry-run). Los directorios de la caché se crean la primera vez
+que se escribe en ellos.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import subprocess
+import threading
+from typing import Callable, List, Optional, Tuple
+
+from cache_paths import user_cache_dir
+
+logger = logging.getLogger('setup_environment.cache')
+
+DEFAULT_CACHE_DIR = user_cache_dir()
+
+RunCommand = Callable[..., subprocess.CompletedProcess]
+
+_DIGEST = re.compile(r"@(sha256:[0-9a-f]{64})$")
+
+
+def _slug(text: str) -> str:
+    """Nombre de archivo seguro y único para una URL o referencia."""
+    base = re.sub(r"[^A-Za-z0-9._-]+", "_", text.rstrip("/").split("/")[-1])[:40]
+    return f"{hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]}-{base}"
+
+
+class ArtifactCache:
+    """Caché de repositorios git, imágenes Docker y wheels de pip."""
+
+    def __init__(self, cache_dir: str, run_command: RunCommand, dry_run: bool = False):
+        """
+        Inicializa la caché.
+
+        Args:
+            cache_dir: Directorio de la caché (se comparte entre entornos)
+            run_command: Función que ejecuta un comando (lista de argumentos, y cwd y
+                quiet opcionales) y lanza CalledProcessError si falla
+            dry_run: Si los comandos solo se muestran; en ese caso no se crea nada en disco
+        """
+        self.cache_dir = cache_dir
+        self.run_command = run_command
+        self.dry_run = dry_run
+        self.git_dir = os.path.join(cache_dir, "git")
+        self.images_dir = os.path.join(cache_dir, "images")
+        self.wheels_dir = os.path.join(cache_dir, "wheels")
+
+    def _ensure_dir(self, path: str) -> str:
+        """Crea un directorio de la caché al escribir en él por primera vez."""
+        if not self.dry_run:
+            os.makedirs(path, exist_ok=True)
+        return path
+
+    def mirror(self, repo: str) -> str:
+        """
+        Crea o actualiza la réplica local de un repositorio.
+
+        Args:
+            repo: URL del repositorio
+
+        Returns:
+            Ruta de la réplica
+
+        Raises:
+            subprocess.CalledProcessError: Si la réplica no existe y no se puede clonar
+        """
+        path = os.path.join(self.git_dir, f"{_slug(repo)}.git")
+        if not os.path.isdir(path):
+            logger.info(f"Creando réplica de {repo} en la caché")
+            self._ensure_dir(self.git_dir)
+            self.run_command(['git', 'clone', '--mirror', repo, path])
+            return path
+        try:
+            self.run_command(['git', '--git-dir', path, 'remote', 'update', '--prune'], quiet=True)
+        except subprocess.CalledProcessError:
+            logger.warning(f"No se pudo actualizar la réplica de {repo}; se usa la copia en caché")
+        return path
+
+    def checkout(self, repo: str, dest: str) -> None:
+        """
+        Obtiene una copia de trabajo de un repositorio a partir de su réplica.
+
+        Si el destino ya es un repositorio, se actualiza (solo avance rápido) en
+        lugar de clonarlo de nuevo.
+
+        Args:
+            repo: URL del repositorio
+            dest: Directorio de destino
+
+        Raises:
+            subprocess.CalledProcessError: Si el repositorio no se puede obtener
+        """
+        mirror = self.mirror(repo)
+        if os.path.isdir(os.path.join(dest, ".git")):
+            self.run_command(['git', '-C', dest, 'pull', '--ff-only', mirror, 'HEAD'])
+            return
+        self.run_command(['git', 'clone', mirror, dest])
+        self.run_command(['git', '-C', dest, 'remote', 'set-url', 'origin', repo])
+
+    def _image_id(self, image: str) -> Optional[str]:
+        """Obtiene el ID de una imagen del almacén local de Docker, o None si no está."""
+        try:
+            result = self.run_command(['docker', 'image', 'inspect', '--format', '{{.Id}}', image], quiet=True)
+        except subprocess.CalledProcessError:
+            return None
+        return (result.stdout or "").strip() or None
+
+    def _image_paths(self, digest: str) -> Tuple[str, str]:
+        """Rutas del archivo de una imagen en la caché y del ID registrado para ella."""
+        base = os.path.join(self.images_dir, digest.replace(':', '-'))
+        return f"{base}.tar", f"{base}.id"
+
+    def _recorded_id(self, digest: str) -> Optional[str]:
+        """ID de la imagen registrado al guardarla en la caché, o None si no hay."""
+        try:
+            with open(self._image_paths(digest)[1], 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def image_present(self, image: str) -> bool:
+        """
+        Comprueba si una imagen está en el almacén local de Docker.
+
+        Una imagen fijada por digest se reconoce por su referencia o, si Docker no
+        conserva el digest, por el ID registrado en la caché al descargarla.
+
+        Args:
+            image: Referencia de la imagen
+
+        Returns:
+            True si la imagen está disponible localmente
+        """
+        if self._image_id(image) is not None:
+            return True
+        match = _DIGEST.search(image)
+        recorded = self._recorded_id(match.group(1)) if match else None
+        return recorded is not None and self._image_id(recorded) == recorded
+
+    def _write_atomic(self, path: str, data: str) -> None:
+        """Escribe un archivo pequeño de la caché de forma atómica."""
+        tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def pull_image(self, image: str) -> None:
+        """
+        Obtiene una imagen Docker usando la caché.
+
+        Las imágenes fijadas por digest no se descargan si ya están en Docker; si no
+        lo están pero se guardaron en la caché, se cargan desde ella. Las imágenes
+        por etiqueta se descargan siempre, pero si no hay red se usa la copia local.
+
+        Args:
+            image: Referencia de la imagen (`nombre:etiqueta` o `nombre@sha256:...`)
+
+        Raises:
+            subprocess.CalledProcessError: Si la imagen no se puede obtener
+        """
+        match = _DIGEST.search(image)
+        if match is None:
+            try:
+                self.run_command(['docker', 'pull', image])
+            except subprocess.CalledProcessError:
+                if not self.image_present(image):
+                    raise
+                logger.warning(f"No se pudo descargar {image}; se usa la imagen local")
+            return
+
+        if self.image_present(image):
+            logger.info(f"Imagen {image} ya presente; no se descarga")
+            return
+        digest = match.group(1)
+        archive, id_file = self._image_paths(digest)
+        if os.path.exists(archive) and self._recorded_id(digest):
+            logger.info(f"Cargando {image} desde la caché")
+            try:
+                self.run_command(['docker', 'load', '-i', archive])
+            except subprocess.CalledProcessError:
+                logger.warning(f"No se pudo cargar {image} desde la caché")
+            # La carga solo vale si produce la imagen descargada por su digest
+            if self.image_present(image):
+                return
+            logger.warning(f"La copia en caché de {image} no coincide con la imagen registrada; se descarga")
+        self.run_command(['docker', 'pull', image])
+        image_id = self._image_id(image)
+        if image_id is None or (os.path.exists(archive) and self._recorded_id(digest) == image_id):
+            return
+        self._ensure_dir(self.images_dir)
+        tmp_archive = f"{archive}.tmp.{os.getpid()}.{threading.get_ident()}"
+        try:
+            self.run_command(['docker', 'save', '-o', tmp_archive, image])
+            if os.path.exists(tmp_archive):
+                os.replace(tmp_archive, archive)
+                self._write_atomic(id_file, image_id + "\n")
+        except (subprocess.CalledProcessError, OSError) as e:
+            logger.warning(f"No se pudo guardar {image} en la caché: {e}")
+
+    def pip_install(self, packages: List[str]) -> None:
+        """
+        Instala paquetes de pip desde el repositorio local de wheels.
+
+        Primero se intenta la instalación sin acceder al índice; si falta algún
+        paquete, se construyen sus wheels en la caché y se repite.
+
+        Args:
+            packages: Paquetes (con o sin versión)
+
+        Raises:
+            subprocess.CalledProcessError: Si los paquetes no se pueden instalar
+        """
+        offline = ['pip', 'install', '--no-index', '--find-links', self.wheels_dir] + packages
+        try:
+            self.run_command(offline, quiet=True)
+            return
+        except subprocess.CalledProcessError:
+            logger.info(f"Descargando a la caché los wheels de: {', '.join(packages)}")
+        self._ensure_dir(self.wheels_dir)
+        self.run_command(['pip', 'wheel', '--wheel-dir', self.wheels_dir, '--find-links', self.wheels_dir] + packages)
+        self.run_command(offline)
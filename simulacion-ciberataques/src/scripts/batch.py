@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+"""
+Ejecución por lotes de escenarios con un pool de objetivos compartido.
+
+Permite ejecutar en paralelo todos los escenarios de un directorio o patrón glob
+(por ejemplo, los generados por `EnvironmentSetup.configure_scenarios` en
+`escenarios/`). Un pool de objetivos compartido limita cuántos escenarios pueden
+actuar a la vez sobre el mismo objetivo, y al finalizar se genera un índice con
+los resultados agregados de todo el lote.
+"""
+
+import datetime
+import glob
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from journal import write_results
+from metrics import merge_latencies, technique_latencies, technique_statuses
+
+logger = logging.getLogger('run_scenario.batch')
+
+INDEX_FILE = "index.json"
+
+
+class TargetPool:
+    """
+    Limita el número de escenarios que actúan simultáneamente sobre cada objetivo.
+
+    Un escenario que ya ocupa un objetivo puede seguir usándolo desde varias técnicas
+    a la vez; el límite se aplica al número de escenarios distintos.
+    """
+
+    def __init__(self, default_limit: int = 1, limits: Optional[Dict[str, int]] = None):
+        """
+        Inicializa el pool.
+
+        Args:
+            default_limit: Número máximo de escenarios simultáneos por objetivo
+            limits: Límites específicos por objetivo
+        """
+        self.default_limit = max(1, default_limit)
+        self.limits = limits or {}
+        self._condition = threading.Condition()
+        self._holders: Dict[str, Dict[str, int]] = {}
+
+    def _available(self, owner: str, target: str) -> bool:
+        """Indica si un propietario puede ocupar un objetivo."""
+        holders = self._holders.get(target, {})
+        return owner in holders or len(holders) < self.limits.get(target, self.default_limit)
+
+    @contextmanager
+    def hold(self, owner: str, targets: Iterable[str]) -> Iterator[None]:
+        """
+        Ocupa un conjunto de objetivos mientras dura el bloque.
+
+        Todos los objetivos se ocupan a la vez, o se espera hasta poder hacerlo,
+        para evitar bloqueos entre escenarios que comparten varios objetivos.
+
+        Args:
+            owner: Identificador del escenario que ocupa los objetivos
+            targets: Objetivos a ocupar
+        """
+        targets = sorted(set(targets))
+        with self._condition:
+            while not all(self._available(owner, target) for target in targets):
+                self._condition.wait()
+            for target in targets:
+                holders = self._holders.setdefault(target, {})
+                holders[owner] = holders.get(owner, 0) + 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                for target in targets:
+                    holders = self._holders[target]
+                    holders[owner] -= 1
+                    if not holders[owner]:
+                        del holders[owner]
+                self._condition.notify_all()
+
+
+def run_and_summarize(create_runner: Callable[[], Any], entry: Dict[str, Any],
+                      label: str) -> Tuple[Dict[str, Any], Dict[str, List[float]], Dict[str, str]]:
+    """
+    Ejecuta un escenario y completa su entrada en el índice de un lote.
+
+    Args:
+        create_runner: Función que crea el ScenarioRunner
+        entry: Entrada del índice con los datos que identifican la ejecución
+        label: Descripción de la ejecución para los mensajes de error
+
+    Returns:
+        Tupla con la entrada del índice, las duraciones de las técnicas y su estado
+        final. Los resultados completos de la ejecución no se conservan, para que
+        la memoria de un lote no crezca con la salida de todos sus escenarios
+    """
+    entry.update({
+        "name": "",
+        "status": "failed",
+        "start_time": datetime.datetime.now().isoformat(),
+        "end_time": "",
+        "techniques": {"total": 0, "success": 0, "failed": 0}
+    })
+    latencies: Dict[str, List[float]] = {}
+    statuses: Dict[str, str] = {}
+    try:
+        runner = create_runner()
+        runner.run()
+        results = runner.results
+        techniques = results.get("techniques", [])
+        entry.update({
+            "name": results.get("scenario", ""),
+            "status": results.get("status", "failed"),
+            "start_time": results.get("start_time") or entry["start_time"],
+            "end_time": results.get("end_time", ""),
+            "techniques": {
+                "total": len(techniques),
+                "success": sum(1 for t in techniques if t.get("status") == "success"),
+                "failed": sum(1 for t in techniques if t.get("status") == "failed")
+            }
+        })
+        for key in ("timing", "resources"):
+            if key in results:
+                entry[key] = results[key]
+        latencies = technique_latencies(results)
+        statuses = technique_statuses(results)
+    except SystemExit:
+        # ScenarioRunner termina el proceso si el escenario no se puede cargar
+        logger.error(f"No se pudo cargar el escenario {label}")
+        entry["error"] = "no se pudo cargar el escenario"
+    except Exception as e:
+        logger.error(f"Error al ejecutar el escenario {label}: {e}")
+        entry["error"] = str(e)
+    entry["end_time"] = entry["end_time"] or datetime.datetime.now().isoformat()
+    return entry, latencies, statuses
+
+
+def summarize_entries(entries: List[Dict[str, Any]], key: str = "scenarios") -> Dict[str, int]:
+    """Cuenta las ejecuciones completadas y fallidas de un lote."""
+    return {
+        key: len(entries),
+        "completed": sum(1 for e in entries if e["status"] == "completed"),
+        "failed": sum(1 for e in entries if e["status"] != "completed")
+    }
+
+
+def resolve_scenarios(pattern: str) -> List[str]:
+    """
+    Obtiene la lista de archivos de escenario de un directorio o patrón glob.
+
+    Args:
+        pattern: Directorio con archivos YAML o patrón glob
+
+    Returns:
+        Lista ordenada de archivos de escenario
+    """
+    if os.path.isdir(pattern):
+        files = glob.glob(os.path.join(pattern, "*.yaml")) + glob.glob(os.path.join(pattern, "*.yml"))
+    else:
+        files = glob.glob(pattern)
+    return sorted(f for f in files if os.path.isfile(f))
+
+
+class BatchRunner:
+    """Ejecuta varios escenarios en paralelo y genera un índice de resultados."""
+
+    def __init__(self, scenario_files: List[str], output_dir: str,
+                 runner_factory: Callable[[str, str, TargetPool], Any],
+                 max_scenarios: int = 2, target_pool: Optional[TargetPool] = None):
+        """
+        Inicializa el ejecutor por lotes.
+
+        Args:
+            scenario_files: Archivos de escenario a ejecutar
+            output_dir: Directorio del lote; cada escenario guarda sus resultados en un subdirectorio
+            runner_factory: Función (archivo, directorio de salida, pool) -> ScenarioRunner
+            max_scenarios: Número máximo de escenarios ejecutándose en paralelo
+            target_pool: Pool de objetivos compartido entre los escenarios
+        """
+        self.scenario_files = scenario_files
+        self.output_dir = output_dir
+        self.runner_factory = runner_factory
+        self.max_scenarios = max(1, max_scenarios)
+        self.target_pool = target_pool or TargetPool()
+
+    def _scenario_output_dir(self, scenario_file: str, used: Dict[str, int]) -> str:
+        """Calcula un subdirectorio de resultados único para un escenario."""
+        stem = os.path.splitext(os.path.basename(scenario_file))[0]
+        count = used.get(stem, 0)
+        used[stem] = count + 1
+        return os.path.join(self.output_dir, stem if not count else f"{stem}_{count + 1}")
+
+    def _run_one(self, scenario_file: str, output_dir: str) -> Tuple[Dict[str, Any], Dict[str, List[float]], Dict[str, str]]:
+        """Ejecuta un escenario y devuelve su entrada en el índice, sus duraciones y sus estados."""
+        entry = {"scenario_file": scenario_file, "output_dir": output_dir}
+        return run_and_summarize(
+            lambda: self.runner_factory(scenario_file, output_dir, self.target_pool),
+            entry,
+            scenario_file
+        )
+
+    def run(self) -> bool:
+        """
+        Ejecuta todos los escenarios del lote.
+
+        Returns:
+            True si todos los escenarios se completaron correctamente
+        """
+        logger.info(f"Ejecutando lote de {len(self.scenario_files)} escenarios "
+                    f"({self.max_scenarios} en paralelo)")
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        used: Dict[str, int] = {}
+        jobs = [(f, self._scenario_output_dir(f, used)) for f in self.scenario_files]
+
+        index = {
+            "start_time": datetime.datetime.now().isoformat(),
+            "end_time": "",
+            "status": "running",
+            "scenarios": []
+        }
+        with ThreadPoolExecutor(max_workers=self.max_scenarios) as pool:
+            outcomes = list(pool.map(lambda job: self._run_one(*job), jobs))
+        index["scenarios"] = [entry for entry, _, _ in outcomes]
+
+        success = all(entry["status"] == "completed" for entry in index["scenarios"])
+        index["status"] = "completed" if success else "failed"
+        index["end_time"] = datetime.datetime.now().isoformat()
+        index["summary"] = summarize_entries(index["scenarios"])
+        # Percentiles de duración por técnica en todas las ejecuciones del lote
+        index["latency"] = merge_latencies(latencies for _, latencies, _ in outcomes)
+
+        index_file = os.path.join(self.output_dir, INDEX_FILE)
+        write_results(index_file, index)
+        logger.info(f"Lote finalizado: {index['summary']['completed']} de {index['summary']['scenarios']} "
+                    f"escenarios completados. Índice: {index_file}")
+        return success
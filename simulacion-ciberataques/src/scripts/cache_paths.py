@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+"""
+Ubicación de las cachés del proyecto en el directorio de caché del usuario.
+
+Todas las cachés (planes compilados, estado de los objetivos y artefactos del
+entorno) se guardan bajo `$XDG_CACHE_HOME/simulacion-ciberataques`, o bajo
+`~/.cache/simulacion-ciberataques` si la variable no está definida.
+"""
+
+import os
+
+CACHE_NAME = "simulacion-ciberataques"
+
+
+def user_cache_dir(*parts: str) -> str:
+    """
+    Calcula una ruta dentro del directorio de caché del proyecto.
+
+    Args:
+        *parts: Componentes de la ruta dentro del directorio de caché
+
+    Returns:
+        Ruta absoluta (no se crea ningún directorio)
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, CACHE_NAME, *parts)
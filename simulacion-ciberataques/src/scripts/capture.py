@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+"""
+Captura acotada de la salida de los comandos.
+
+Cada flujo (stdout o stderr) de un comando se guarda en memoria mientras no supere
+el límite configurado. Si lo supera, en memoria solo se conservan el principio y el
+final de la salida, y el flujo completo se vuelca a un archivo comprimido con gzip
+que se referencia en los resultados por su ruta y su hash SHA-256. Así, la memoria
+del ejecutor no crece con el volumen de salida de las técnicas.
+"""
+
+import collections
+import gzip
+import hashlib
+import os
+from typing import Any, Deque, Dict, List, Optional
+
+# Caracteres de cada flujo que se conservan en memoria (la mitad del principio y la mitad del final)
+DEFAULT_OUTPUT_LIMIT = 256 * 1024
+
+
+class OutputCapture:
+    """Captura un flujo de salida con un límite de memoria y volcado a disco."""
+
+    def __init__(self, limit: int = DEFAULT_OUTPUT_LIMIT, spill_path: Optional[str] = None,
+                 spill_name: Optional[str] = None):
+        """
+        Inicializa la captura.
+
+        Args:
+            limit: Caracteres que se conservan en memoria (0 para no limitar)
+            spill_path: Archivo .gz en el que se vuelca el flujo completo si supera el límite
+                (None para descartar la parte central)
+            spill_name: Ruta con la que se referencia el archivo en los resultados
+        """
+        self.limit = limit
+        self.head_limit = limit // 2
+        self.tail_limit = limit - self.head_limit
+        self.spill_path = spill_path
+        self.spill_name = spill_name or spill_path
+        self.total = 0
+        self.truncated = False
+        self._held: List[str] = []
+        self._head = ""
+        self._tail: Deque[str] = collections.deque()
+        self._tail_size = 0
+        self._hash = None
+        self._spill = None
+
+    def write(self, data: str) -> None:
+        """Añade un fragmento de salida."""
+        if not data:
+            return
+        self.total += len(data)
+        if not self.truncated:
+            self._held.append(data)
+            if not self.limit or self.total <= self.limit:
+                return
+            self._truncate()
+            return
+
+        self._hash.update(data.encode('utf-8', errors='replace'))
+        if self._spill is not None:
+            self._spill.write(data)
+        self._tail.append(data)
+        self._tail_size += len(data)
+        self._trim_tail()
+
+    def _truncate(self) -> None:
+        """Pasa a conservar solo el principio y el final, volcando el flujo completo a disco."""
+        self.truncated = True
+        held = "".join(self._held)
+        self._held = []
+        self._hash = hashlib.sha256(held.encode('utf-8', errors='replace'))
+        if self.spill_path:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            self._spill = gzip.open(self.spill_path, 'wt', encoding='utf-8', errors='replace')
+            self._spill.write(held)
+        self._head = held[:self.head_limit]
+        rest = held[self.head_limit:]
+        self._tail.append(rest)
+        self._tail_size = len(rest)
+        self._trim_tail()
+
+    def _trim_tail(self) -> None:
+        """Descarta los fragmentos más antiguos del final que ya no caben en el límite."""
+        while self._tail and self._tail_size - len(self._tail[0]) >= self.tail_limit:
+            self._tail_size -= len(self._tail.popleft())
+
+    def text(self) -> str:
+        """Devuelve la salida conservada en memoria, con una marca si se ha truncado."""
+        if not self.truncated:
+            return "".join(self._held)
+        tail = "".join(self._tail)[-self.tail_limit:] if self.tail_limit else ""
+        omitted = self.total - len(self._head) - len(tail)
+        location = f"; salida completa en {self.spill_name}" if self.spill_path else ""
+        return f"{self._head}\n[... {omitted} caracteres omitidos{location} ...]\n{tail}"
+
+    def close(self) -> None:
+        """Cierra el archivo de volcado."""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def spill_info(self) -> Optional[Dict[str, Any]]:
+        """
+        Devuelve la referencia al archivo con el flujo completo.
+
+        Returns:
+            Diccionario con la ruta, el hash SHA-256 del contenido sin comprimir y el
+            número de caracteres, o None si el flujo no se ha volcado a disco
+        """
+        if not self.truncated or not self.spill_path:
+            return None
+        return {
+            "path": self.spill_name,
+            "sha256": self._hash.hexdigest(),
+            "chars": self.total
+        }
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+
+"""
+Generación incremental y en paralelo de los gráficos de los informes.
+
+Los datos de cada gráfico se extraen de los resultados de la simulación y se
+identifican por su hash SHA-256. El manifiesto `manifest.json` del directorio de
+gráficos guarda el hash con el que se generó cada archivo, de forma que al volver
+a generar un informe solo se dibujan los gráficos cuyos datos han cambiado. Los
+gráficos pendientes se dibujan con la API orientada a objetos de matplotlib (sin el
+estado global de pyplot) en un pool de procesos.
+
+Los gráficos se pueden generar en PNG o en SVG; el SVG es vectorial y bastante más
+barato de generar que un PNG rasterizado.
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import Executor
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger('generate_report.charts')
+
+CHART_FORMATS = ("png", "svg")
+MANIFEST_FILE = "manifest.json"
+
+# Se incrementa al cambiar el aspecto de los gráficos para invalidar los ya generados
+CHART_VERSION = 1
+
+
+def _techniques_status(results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Datos del gráfico de técnicas por estado."""
+    techniques = results.get("techniques", [])
+    if not techniques:
+        return None
+    status_counts = {"success": 0, "failed": 0}
+    for technique in techniques:
+        status = technique.get("status", "unknown")
+        status_counts[status] = status_counts.get(status, 0) + 1
+    return {"labels": list(status_counts), "values": list(status_counts.values())}
+
+
+def _steps_timeline(results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Datos del gráfico de duración de los pasos, en minutos."""
+    steps = results.get("steps", [])
+    if not steps:
+        return None
+    names = []
+    durations = []
+    for step in steps:
+        start_time = datetime.datetime.fromisoformat(step.get("start_time", ""))
+        end_time = datetime.datetime.fromisoformat(step.get("end_time", ""))
+        names.append(step.get("name", "Unknown"))
+        durations.append((end_time - start_time).total_seconds() / 60)
+    return {"labels": names, "values": durations}
+
+
+def _mitre_techniques(results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Datos del gráfico de frecuencia de técnicas MITRE ATT&CK."""
+    tactics: Dict[str, int] = {}
+    for technique in results.get("techniques", []):
+        technique_id = technique.get("id", "")
+        if technique_id.startswith("T"):
+            # Agrupar técnicas por tácticas (primeros caracteres del ID)
+            tactic = technique_id[:4]
+            tactics[tactic] = tactics.get(tactic, 0) + 1
+    if not tactics:
+        return None
+    return {"labels": list(tactics), "values": list(tactics.values())}
+
+
+# Gráficos del informe: nombre -> (función que extrae sus datos, descripción para los mensajes)
+CHARTS = {
+    "techniques_status": (_techniques_status, "técnicas"),
+    "steps_timeline": (_steps_timeline, "línea de tiempo"),
+    "mitre_techniques": (_mitre_techniques, "técnicas MITRE")
+}
+
+
+def chart_data(results: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Extrae los datos de cada gráfico a partir de los resultados.
+
+    Args:
+        results: Resultados de la simulación
+
+    Returns:
+        Diccionario nombre del gráfico -> datos; los gráficos sin datos, o cuyos
+        datos no se pueden interpretar, no se incluyen
+    """
+    data = {}
+    for name, (extract, description) in CHARTS.items():
+        try:
+            chart = extract(results)
+        except Exception as e:
+            logger.error(f"Error al generar gráfico de {description}: {e}")
+            continue
+        if chart is not None:
+            data[name] = chart
+    return data
+
+
+def chart_hash(name: str, data: Dict[str, Any], fmt: str) -> str:
+    """Hash SHA-256 de los datos de un gráfico, su formato y la versión de su aspecto."""
+    payload = json.dumps({"chart": name, "format": fmt, "version": CHART_VERSION, "data": data},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _annotate_bars(ax: Any, bars: Any) -> None:
+    """Añade el valor encima de cada barra vertical."""
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width() / 2., height, f'{height}', ha='center', va='bottom')
+
+
+def render_chart(name: str, data: Dict[str, Any], path: str, fmt: str) -> str:
+    """
+    Dibuja un gráfico y lo guarda en disco.
+
+    Se ejecuta en los procesos del pool, por lo que importa matplotlib solo cuando
+    realmente hay que dibujar.
+
+    Args:
+        name: Nombre del gráfico
+        data: Datos del gráfico
+        path: Archivo de salida
+        fmt: Formato de salida (png o svg)
+
+    Returns:
+        Ruta del archivo generado
+    """
+    from matplotlib.figure import Figure
+
+    labels, values = data["labels"], data["values"]
+    if name == "techniques_status":
+        fig = Figure(figsize=(8, 6))
+        ax = fig.add_subplot()
+        _annotate_bars(ax, ax.bar(labels, values, color=['green', 'red']))
+        ax.set_title('Resultado de Técnicas de Ataque')
+        ax.set_xlabel('Estado')
+        ax.set_ylabel('Cantidad')
+    elif name == "steps_timeline":
+        fig = Figure(figsize=(10, 6))
+        ax = fig.add_subplot()
+        bars = ax.barh(labels, values)
+        ax.set_title('Duración de Pasos de Ataque')
+        ax.set_xlabel('Duración (minutos)')
+        ax.set_ylabel('Paso')
+        for bar in bars:
+            width = bar.get_width()
+            ax.text(width + 0.1, bar.get_y() + bar.get_height() / 2., f'{width:.2f} min', ha='left', va='center')
+    elif name == "mitre_techniques":
+        fig = Figure(figsize=(12, 6))
+        ax = fig.add_subplot()
+        _annotate_bars(ax, ax.bar(labels, values, color='blue'))
+        ax.set_title('Técnicas MITRE ATT&CK Utilizadas')
+        ax.set_xlabel('ID de Técnica')
+        ax.set_ylabel('Frecuencia')
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+    else:
+        raise ValueError(f"Gráfico desconocido: {name}")
+
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    fig.savefig(tmp_path, format=fmt)
+    os.replace(tmp_path, path)
+    return path
+
+
+class ChartRenderer:
+    """Genera los gráficos de un informe, dibujando solo los que han cambiado."""
+
+    def __init__(self, charts_dir: str, fmt: str = "png", workers: Optional[int] = None,
+                 pool: Optional[Executor] = None):
+        """
+        Inicializa el generador de gráficos.
+
+        Args:
+            charts_dir: Directorio en el que se guardan los gráficos y su manifiesto
+            fmt: Formato de los gráficos (png o svg)
+            workers: Número máximo de procesos para dibujar (por defecto, uno por CPU)
+            pool: Pool de procesos compartido con otros informes; si se indica, no se
+                crea uno propio
+
+        Raises:
+            ValueError: Si el formato no es válido
+        """
+        if fmt not in CHART_FORMATS:
+            raise ValueError(f"Formato de gráfico no válido: {fmt} (válidos: {', '.join(CHART_FORMATS)})")
+        self.charts_dir = charts_dir
+        self.fmt = fmt
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = pool
+
+    def _load_manifest(self) -> Dict[str, str]:
+        """Carga el manifiesto con el hash de cada gráfico generado."""
+        try:
+            with open(os.path.join(self.charts_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+
+    def _save_manifest(self, manifest: Dict[str, str]) -> None:
+        """Guarda el manifiesto de forma atómica."""
+        path = os.path.join(self.charts_dir, MANIFEST_FILE)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def render(self, results: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Genera los gráficos de unos resultados.
+
+        Args:
+            results: Resultados de la simulación
+
+        Returns:
+            Diccionario nombre del gráfico -> ruta del archivo
+        """
+        os.makedirs(self.charts_dir, exist_ok=True)
+        manifest = self._load_manifest()
+        charts: Dict[str, str] = {}
+        pending: Dict[str, Tuple[Dict[str, Any], str, str]] = {}
+
+        for name, data in chart_data(results).items():
+            filename = f"{name}.{self.fmt}"
+            path = os.path.join(self.charts_dir, filename)
+            digest = chart_hash(name, data, self.fmt)
+            if manifest.get(filename) == digest and os.path.exists(path):
+                logger.debug(f"Gráfico sin cambios: {path}")
+                charts[name] = path
+            else:
+                pending[name] = (data, path, digest)
+                manifest.pop(filename, None)
+
+        unchanged = len(charts)
+        if pending:
+            logger.debug(f"Dibujando {len(pending)} gráficos ({', '.join(pending)})")
+            for name, path in self._render_pending(pending).items():
+                _, _, digest = pending[name]
+                manifest[os.path.basename(path)] = digest
+                charts[name] = path
+        logger.info(f"Gráficos: {len(charts) - unchanged} generados, {unchanged} sin cambios")
+
+        self._save_manifest(manifest)
+        return {name: charts[name] for name in CHARTS if name in charts}
+
+    def _render_pending(self, pending: Dict[str, Tuple[Dict[str, Any], str, str]]) -> Dict[str, str]:
+        """
+        Dibuja los gráficos pendientes en el pool de procesos.
+
+        Un único gráfico se dibuja en el propio proceso, sin el coste de arrancar el pool.
+
+        Returns:
+            Diccionario nombre del gráfico -> ruta, solo con los gráficos generados
+        """
+        rendered = {}
+        if self.pool is None and (len(pending) == 1 or self.workers == 1):
+            for name, (data, path, _) in pending.items():
+                try:
+                    rendered[name] = render_chart(name, data, path, self.fmt)
+                except Exception as e:
+                    logger.error(f"Error al generar el gráfico {name}: {e}")
+            return rendered
+
+        from concurrent.futures import ProcessPoolExecutor
+        pool = self.pool or ProcessPoolExecutor(max_workers=min(self.workers, len(pending)))
+        try:
+            futures = {
+                name: pool.submit(render_chart, name, data, path, self.fmt)
+                for name, (data, path, _) in pending.items()
+            }
+            for name, future in futures.items():
+                try:
+                    rendered[name] = future.result()
+                except Exception as e:
+                    logger.error(f"Error al generar el gráfico {name}: {e}")
+        finally:
+            if pool is not self.pool:
+                pool.shutdown()
+        return rendered
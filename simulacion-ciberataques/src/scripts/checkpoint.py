@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+"""
+Puntos de control para reanudar ejecuciones de escenarios interrumpidas.
+
+El ejecutor añade al archivo `checkpoint.jsonl` del directorio de resultados un
+registro por cada fase completada: la verificación de prerrequisitos, cada técnica
+y cada paso, junto con sus resultados y una huella (hash) de su definición. Al
+reanudar con `--resume`, solo se reutilizan los elementos completados con éxito
+cuya definición no ha cambiado desde la ejecución anterior.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, IO, Optional, Tuple
+
+logger = logging.getLogger('run_scenario.checkpoint')
+
+CHECKPOINT_FILE = "checkpoint.jsonl"
+
+
+def fingerprint(definition: Any) -> str:
+    """
+    Calcula la huella de la definición de un elemento del escenario.
+
+    Args:
+        definition: Definición del elemento (paso, técnica o prerrequisitos)
+
+    Returns:
+        Hash SHA-256 de la definición serializada de forma canónica
+    """
+    data = json.dumps(definition, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class RunCheckpoint:
+    """Registro de las fases completadas de una ejecución."""
+
+    def __init__(self, output_dir: str):
+        """
+        Inicializa el punto de control.
+
+        Args:
+            output_dir: Directorio de resultados de la ejecución
+        """
+        self.path = os.path.join(output_dir, CHECKPOINT_FILE)
+        self.scenario_file = ""
+        self.start_time = ""
+        self.prerequisites = ""
+        self.techniques: Dict[Tuple[int, int], Tuple[str, Dict[str, Any]]] = {}
+        self.steps: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._file: Optional[IO[str]] = None
+
+    @classmethod
+    def load(cls, output_dir: str) -> "RunCheckpoint":
+        """
+        Carga el punto de control de un directorio de resultados.
+
+        Args:
+            output_dir: Directorio de resultados de la ejecución
+
+        Returns:
+            Punto de control con los registros existentes (vacío si no hay archivo)
+        """
+        checkpoint = cls(output_dir)
+        if not os.path.exists(checkpoint.path):
+            return checkpoint
+
+        with open(checkpoint.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                kind = record.get("type")
+                if kind == "run":
+                    checkpoint.scenario_file = record.get("scenario_file", "")
+                    checkpoint.start_time = record.get("start_time", "")
+                elif kind == "prerequisites":
+                    checkpoint.prerequisites = record.get("fingerprint", "")
+                elif kind == "technique":
+                    key = (record["step_index"], record["technique_index"])
+                    checkpoint.techniques[key] = (record.get("fingerprint", ""), record.get("result", {}))
+                elif kind == "step":
+                    checkpoint.steps[record["step_index"]] = (record.get("fingerprint", ""), record.get("result", {}))
+
+        return checkpoint
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        """Añade un registro al archivo y lo vuelca a disco."""
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def start(self, scenario_file: str, start_time: str, resume: bool) -> None:
+        """
+        Registra el inicio de una ejecución.
+
+        Args:
+            scenario_file: Archivo del escenario
+            start_time: Hora de inicio de la ejecución original
+            resume: Si se reanuda una ejecución; en caso contrario se descartan los registros previos
+        """
+        if not resume:
+            self.prerequisites = ""
+            self.techniques.clear()
+            self.steps.clear()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        self.scenario_file = scenario_file
+        self.start_time = start_time
+        self._append({"type": "run", "scenario_file": os.path.abspath(scenario_file), "start_time": start_time})
+
+    def record_prerequisites(self, definition_fingerprint: str) -> None:
+        """Registra que los prerrequisitos se verificaron correctamente."""
+        self.prerequisites = definition_fingerprint
+        self._append({"type": "prerequisites", "fingerprint": definition_fingerprint})
+
+    def record_technique(self, step_index: int, technique_index: int, definition_fingerprint: str,
+                         result: Dict[str, Any]) -> None:
+        """Registra el resultado de una técnica."""
+        with self._lock:
+            self.techniques[(step_index, technique_index)] = (definition_fingerprint, result)
+        self._append({"type": "technique", "step_index": step_index, "technique_index": technique_index,
+                      "fingerprint": definition_fingerprint, "result": result})
+
+    def record_step(self, step_index: int, definition_fingerprint: str, result: Dict[str, Any]) -> None:
+        """Registra el resultado de un paso."""
+        with self._lock:
+            self.steps[step_index] = (definition_fingerprint, result)
+        self._append({"type": "step", "step_index": step_index, "fingerprint": definition_fingerprint,
+                      "result": result})
+
+    def completed_technique(self, step_index: int, technique_index: int,
+                            definition_fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene el resultado de una técnica completada con éxito y sin cambios.
+
+        Returns:
+            Resultado de la técnica, o None si se debe volver a ejecutar
+        """
+        with self._lock:
+            recorded = self.techniques.get((step_index, technique_index))
+        if recorded and recorded[0] == definition_fingerprint and recorded[1].get("status") == "success":
+            return recorded[1]
+        return None
+
+    def completed_step(self, step_index: int, definition_fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene el resultado de un paso completado con éxito y sin cambios.
+
+        Returns:
+            Resultado del paso, o None si se debe volver a ejecutar
+        """
+        with self._lock:
+            recorded = self.steps.get(step_index)
+        if recorded and recorded[0] == definition_fingerprint and recorded[1].get("status") == "success":
+            return recorded[1]
+        return None
+
+    def close(self) -> None:
+        """Cierra el archivo del punto de control."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
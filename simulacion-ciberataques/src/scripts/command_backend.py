@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+
+"""
+Backend asíncrono para la ejecución de comandos del sistema.
+
+Las salidas de los comandos se leen sobre un único bucle de eventos asyncio que se
+ejecuta en un hilo dedicado. Los hilos del planificador envían sus comandos a ese
+bucle y esperan el resultado, de forma que todas las técnicas en curso comparten un
+solo bucle para la lectura de sus salidas. La salida se procesa línea a línea a
+medida que se produce, se aplican tiempos máximos por comando y los procesos en
+curso se pueden cancelar.
+
+Para medir los recursos consumidos por cada comando, los procesos se recogen con
+`os.wait4` en lugar de con el vigilante de procesos hijos de asyncio, que descarta
+esa información. Cada resultado incluye el tiempo real, el tiempo de CPU de usuario
+y de sistema, la memoria residente máxima y la señal que terminó el proceso.
+"""
+
+import asyncio
+import codecs
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from capture import OutputCapture
+
+logger = logging.getLogger('run_scenario.backend')
+
+# Tamaño de lectura de las tuberías y longitud máxima de una línea antes de emitirla
+READ_CHUNK_SIZE = 64 * 1024
+
+LineCallback = Callable[[str, str], None]
+
+
+class CommandResult:
+    """Resultado de la ejecución de un comando."""
+
+    def __init__(self, returncode: int, stdout: str, stderr: str, timed_out: bool = False,
+                 wall_seconds: float = 0.0, user_seconds: float = 0.0, sys_seconds: float = 0.0,
+                 max_rss_kb: int = 0, exit_signal: Optional[int] = None,
+                 spills: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.timed_out = timed_out
+        self.wall_seconds = wall_seconds
+        self.user_seconds = user_seconds
+        self.sys_seconds = sys_seconds
+        self.max_rss_kb = max_rss_kb
+        self.exit_signal = exit_signal
+        # Referencias a los archivos con la salida completa de los flujos truncados
+        self.spills = spills or {}
+
+    def resources(self) -> Dict[str, Any]:
+        """Devuelve los recursos consumidos por el comando como diccionario serializable."""
+        return {
+            "wall_seconds": round(self.wall_seconds, 6),
+            "cpu_user_seconds": round(self.user_seconds, 6),
+            "cpu_sys_seconds": round(self.sys_seconds, 6),
+            "max_rss_kb": self.max_rss_kb,
+            "signal": self.exit_signal
+        }
+
+
+class _ChildProcess:
+    """Proceso hijo cuyas tuberías se leen en el bucle y que se recoge con os.wait4."""
+
+    def __init__(self, popen: subprocess.Popen):
+        self.popen = popen
+        self.pid = popen.pid
+        self.reaped = False
+
+    def kill(self) -> None:
+        """Envía SIGKILL al proceso si todavía no se ha recogido."""
+        if self.reaped:
+            return
+        try:
+            if hasattr(os, "wait4"):
+                # Popen.kill consultaría el estado del proceso y competiría con wait4
+                os.kill(self.pid, signal.SIGKILL)
+            else:
+                self.popen.kill()
+        except OSError:
+            pass
+
+    def wait(self) -> Dict[str, Any]:
+        """Espera a que el proceso termine (bloqueante) y devuelve su estado y recursos."""
+        if not hasattr(os, "wait4"):
+            # Sin wait4 (por ejemplo, en Windows) no se dispone de los recursos del proceso
+            returncode = self.popen.wait()
+            self.reaped = True
+            return {"returncode": returncode, "user": 0.0, "sys": 0.0, "max_rss_kb": 0}
+
+        while True:
+            try:
+                _, status, usage = os.wait4(self.pid, 0)
+                break
+            except InterruptedError:
+                continue
+        self.reaped = True
+        if os.WIFSIGNALED(status):
+            returncode = -os.WTERMSIG(status)
+        else:
+            returncode = os.WEXITSTATUS(status)
+        # Evita que Popen intente recoger de nuevo el proceso
+        self.popen.returncode = returncode
+        # ru_maxrss se expresa en bytes en macOS y en kilobytes en Linux
+        max_rss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+        return {"returncode": returncode, "user": usage.ru_utime, "sys": usage.ru_stime, "max_rss_kb": max_rss}
+
+
+class AsyncCommandBackend:
+    """Ejecuta comandos en un bucle de eventos asyncio compartido."""
+
+    def __init__(self, default_timeout: Optional[float] = None, max_concurrency: int = 32):
+        """
+        Inicializa el backend.
+
+        Args:
+            default_timeout: Tiempo máximo por comando en segundos (None para no limitarlo)
+            max_concurrency: Número máximo de comandos simultáneos; cada comando en curso
+                ocupa un hilo del ejecutor propio del backend mientras espera al proceso
+        """
+        self.default_timeout = default_timeout
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._waiters: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._processes: Set[_ChildProcess] = set()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        """Arranca el bucle de eventos en su hilo si aún no está en marcha."""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def _serve() -> None:
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._waiters = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                   thread_name_prefix='command-wait')
+                self._thread = threading.Thread(target=_serve, name='command-backend', daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def run(self, command: List[str], cwd: Optional[str] = None, timeout: Optional[float] = None,
+            on_line: Optional[LineCallback] = None,
+            captures: Optional[Dict[str, OutputCapture]] = None,
+            key: Optional[List[str]] = None) -> CommandResult:
+        """
+        Ejecuta un comando y espera a que finalice.
+
+        Args:
+            command: Lista con el comando y sus argumentos
+            cwd: Directorio de trabajo para el comando
+            timeout: Tiempo máximo en segundos (por defecto, el del backend)
+            on_line: Función invocada con ("stdout"|"stderr", línea) por cada línea producida
+            captures: Capturas acotadas para "stdout" y "stderr" (por defecto, sin límite)
+            key: Comando lógico, antes de aplicar el transporte del objetivo; lo usan los
+                backends de grabación y reproducción y aquí se ignora
+
+        Returns:
+            Resultado del comando
+        """
+        loop = self._ensure_started()
+        if timeout is None:
+            timeout = self.default_timeout
+        captures = dict(captures or {})
+        for name in ("stdout", "stderr"):
+            captures.setdefault(name, OutputCapture(limit=0))
+        future = asyncio.run_coroutine_threadsafe(self._run(command, cwd, timeout, on_line, captures), loop)
+        try:
+            return future.result()
+        finally:
+            for capture in captures.values():
+                capture.close()
+
+    @staticmethod
+    async def _reader(pipe: Any) -> Tuple[asyncio.StreamReader, asyncio.BaseTransport]:
+        """Conecta una tubería del proceso al bucle de eventos."""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=READ_CHUNK_SIZE, loop=loop)
+        transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader, loop=loop), pipe)
+        return reader, transport
+
+    async def _pump(self, stream: asyncio.StreamReader, name: str, sink: OutputCapture,
+                    on_line: Optional[LineCallback]) -> None:
+        """
+        Lee una tubería por bloques y emite cada línea completa en cuanto está disponible.
+
+        Los bloques se decodifican con un decodificador incremental, de modo que un
+        carácter multibyte partido entre dos lecturas se reconstruye correctamente.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pending = ""
+        while True:
+            chunk = await stream.read(READ_CHUNK_SIZE)
+            pending += decoder.decode(chunk, final=not chunk)
+            if not chunk:
+                break
+            lines = pending.splitlines(keepends=True)
+            pending = ""
+            if lines and not lines[-1].endswith(("\n", "\r")) and len(lines[-1]) < READ_CHUNK_SIZE:
+                pending = lines.pop()
+            for line in lines:
+                sink.write(line)
+                if on_line:
+                    on_line(name, line)
+        if pending:
+            sink.write(pending)
+            if on_line:
+                on_line(name, pending)
+
+    async def _run(self, command: List[str], cwd: Optional[str], timeout: Optional[float],
+                   on_line: Optional[LineCallback], captures: Dict[str, OutputCapture]) -> CommandResult:
+        """Corrutina que lanza el proceso, transmite su salida y aplica el tiempo máximo."""
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        process = _ChildProcess(subprocess.Popen(
+            command,
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        ))
+        self._processes.add(process)
+        # La espera del proceso ocupa un hilo del ejecutor del backend mientras el comando está en curso
+        waiter = loop.run_in_executor(self._waiters, process.wait)
+
+        stdout = captures["stdout"]
+        stderr = captures["stderr"]
+        timed_out = False
+        transports = []
+        try:
+            stdout_reader, transport = await self._reader(process.popen.stdout)
+            transports.append(transport)
+            stderr_reader, transport = await self._reader(process.popen.stderr)
+            transports.append(transport)
+            await asyncio.wait_for(
+                asyncio.gather(
+                    self._pump(stdout_reader, "stdout", stdout, on_line),
+                    self._pump(stderr_reader, "stderr", stderr, on_line),
+                    asyncio.shield(waiter)
+                ),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            timed_out = True
+            process.kill()
+            await waiter
+            message = f"\n[TIMEOUT] Comando detenido tras {timeout}s\n"
+            stderr.write(message)
+            if on_line:
+                on_line("stderr", message)
+        except asyncio.CancelledError:
+            process.kill()
+            await waiter
+            raise
+        finally:
+            for transport in transports:
+                transport.close()
+            self._processes.discard(process)
+
+        status = waiter.result()
+        returncode = status["returncode"]
+        return CommandResult(
+            returncode, stdout.text(), stderr.text(), timed_out,
+            wall_seconds=time.monotonic() - start,
+            user_seconds=status["user"],
+            sys_seconds=status["sys"],
+            max_rss_kb=status["max_rss_kb"],
+            exit_signal=-returncode if returncode < 0 else None,
+            spills={name: capture.spill_info() for name, capture in captures.items() if capture.spill_info()}
+        )
+
+    def cancel_all(self) -> None:
+        """Detiene todos los procesos en curso."""
+        loop = self._loop
+        if loop is None:
+            return
+
+        def _cancel() -> None:
+            for process in list(self._processes):
+                process.kill()
+
+        loop.call_soon_threadsafe(_cancel)
+
+    def close(self) -> None:
+        """Detiene los procesos en curso y el bucle de eventos."""
+        with self._lock:
+            loop, thread, waiters = self._loop, self._thread, self._waiters
+            self._loop = self._thread = self._waiters = None
+        if loop is None:
+            return
+
+        async def _shutdown() -> None:
+            for process in list(self._processes):
+                process.kill()
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(_shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+        waiters.shutdown(wait=False)
@@ -9,31 +9,64 @@ de ciberataques, incluyendo gráficos, estadísticas y recomendaciones.
 
 Uso:
     python generate_report.py --input <directorio_resultados> --output <archivo_informe>
+    python generate_report.py --input "<patrón>" [<directorio> ...] --output <directorio_informes>
+    python generate_report.py --trend --index <base_de_datos> --output <archivo_informe>
     
 Opciones:
-    --input DIRECTORIO    Directorio con los resultados de la simulación
-    --output ARCHIVO      Archivo de salida para el informe (PDF o HTML)
+    --input DIRECTORIO    Directorio con los resultados de la simulación (results.json o,
+                          si la ejecución se interrumpió, su diario journal.jsonl). Se
+                          pueden indicar varios directorios o patrones glob, o un
+                          directorio que contenga varias ejecuciones: los informes se
+                          generan en lote en el directorio --output, con una página
+                          índice (index.html o index.json) que enlaza todos ellos
+    --output ARCHIVO      Archivo de salida para el informe (PDF, HTML o JSON)
+    --format FORMATO      Formato del informe: html, pdf o json (por defecto, según la
+                          extensión de --output). El formato json es un resumen con las
+                          estadísticas, recomendaciones, técnicas y pasos, sin gráficos
+                          ni plantillas, y no carga matplotlib, jinja2 ni pdfkit
     --template ARCHIVO    Plantilla personalizada para el informe
     --logo ARCHIVO        Logo para incluir en el informe
+    --chart-format FMT    Formato de los gráficos: png (por defecto) o svg, vectorial y
+                          más barato de generar
+    --chart-workers N     Número máximo de procesos para dibujar los gráficos (y de
+                          informes generados a la vez en un lote). Solo se
+                          dibujan los gráficos cuyos datos han cambiado desde la última
+                          generación (charts/manifest.json)
+    --output-limit N      Caracteres de la salida de cada comando incluidos en el informe
+                          HTML (8192 por defecto, 0 = sin límite). Las salidas mayores se
+                          recortan y enlazan con su versión completa. El HTML se escribe
+                          por fragmentos, sin construirlo entero en memoria
+    --trend               Generar un informe de tendencias a partir del índice creado con
+                          index_results.py, sin leer los resultados de cada ejecución:
+                          tasa de éxito por técnica a lo largo del tiempo, regresiones de
+                          duración y técnicas que han cambiado de resultado por objetivo.
+                          La salida puede ser HTML, PDF o JSON
+    --index ARCHIVO       Base de datos del índice (por defecto, results_index.db)
+    --scenario NOMBRE     Limitar el informe de tendencias a un escenario
+    --since FECHA         Limitar el informe de tendencias a las ejecuciones desde FECHA
+    --period PERIODO      Agrupación de las tasas de éxito: day, week o month
+    --window N            Ejecuciones recientes comparadas con las anteriores (5)
+    --threshold F         Aumento relativo de duración considerado regresión (0.25)
 """
 
 import argparse
 import datetime
+import functools
+import glob
 import json
 import logging
 import os
 import sys
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 
-import matplotlib
-matplotlib.use('Agg')  # Usar backend no interactivo
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
-from jinja2 import Environment, FileSystemLoader
-import pdfkit
-import markdown
+# Las dependencias pesadas (jinja2, pdfkit y matplotlib) se importan solo en las
+# funciones que las usan, de forma que el resumen JSON arranca sin cargarlas
+from analytics import DEFAULT_INDEX, PERIODS, ResultsIndex, find_run_dirs
+from charts import CHART_FORMATS, ChartRenderer
+from journal import JOURNAL_FILE, RESULTS_FILE, load_results
 
 # Configuración del logger
 logging.basicConfig(
@@ -45,10 +78,175 @@ logging.basicConfig(
 )
 logger = logging.getLogger('generate_report')
 
+OUTPUT_FORMATS = ("html", "pdf", "json")
+
+# Caracteres de la salida de cada comando que se incluyen en el informe HTML (la
+# mitad del principio y la mitad del final); el resto se enlaza en un archivo aparte
+DEFAULT_REPORT_OUTPUT_LIMIT = 8 * 1024
+OUTPUT_STREAMS = ("stdout", "stderr")
+
+
+def output_format(output_file: str, fmt: Optional[str] = None) -> str:
+    """
+    Determina el formato de un informe.
+    
+    Args:
+        output_file: Archivo de salida
+        fmt: Formato indicado explícitamente (html, pdf o json); si no se indica, se
+            deduce de la extensión del archivo
+            
+    Returns:
+        Extensión del formato ('.html', '.pdf' o '.json')
+    """
+    if fmt:
+        return f".{fmt}"
+    extension = os.path.splitext(output_file)[1].lower()
+    if extension not in [f".{f}" for f in OUTPUT_FORMATS]:
+        logger.warning(f"Formato de salida no reconocido: {extension}. Se usará HTML.")
+        return '.html'
+    return extension
+
+
+def _to_datetime(value: str) -> datetime.datetime:
+    """Filtro de plantilla que convierte una fecha ISO 8601 en datetime."""
+    return datetime.datetime.fromisoformat(value)
+
+
+@functools.lru_cache(maxsize=None)
+def template_environment(template_path: str) -> Any:
+    """
+    Obtiene el entorno Jinja2 de un directorio de plantillas.
+    
+    El entorno se comparte entre todos los informes generados en el proceso, de
+    forma que cada plantilla se compila una sola vez.
+    
+    Args:
+        template_path: Directorio de plantillas (ruta absoluta)
+        
+    Returns:
+        Entorno Jinja2
+    """
+    from jinja2 import Environment, FileSystemLoader
+    env = Environment(loader=FileSystemLoader(template_path), auto_reload=False)
+    env.filters['to_datetime'] = _to_datetime
+    return env
+
+
+# Plantilla del informe de tendencias
+TREND_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{{ title }}</title>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; margin: 0; padding: 20px; color: #333; }
+        .container { max-width: 1200px; margin: 0 auto; }
+        h1 { color: #2c3e50; }
+        h2 { color: #3498db; margin-top: 30px; padding-bottom: 10px; border-bottom: 1px solid #eee; }
+        table { width: 100%; border-collapse: collapse; margin: 20px 0; }
+        th, td { padding: 8px 10px; text-align: left; border-bottom: 1px solid #ddd; }
+        th { background-color: #f2f2f2; }
+        .success { color: green; }
+        .failed { color: red; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>{{ title }}</h1>
+        <p>Fecha: {{ date }} &middot; Escenario: {{ scenario }}{% if since %} &middot; Desde: {{ since }}{% endif %}
+           &middot; Ejecuciones indexadas: {{ runs }}</p>
+
+        <h2>Tasa de Éxito por Técnica ({{ period }})</h2>
+        <table>
+            <thead><tr><th>Técnica</th>{% for p in periods %}<th>{{ p }}</th>{% endfor %}</tr></thead>
+            <tbody>
+                {% for row in success_table %}
+                <tr><td>{{ row.id }}</td>{% for rate in row.rates %}<td>{% if rate is not none %}{{ rate }}%{% endif %}</td>{% endfor %}</tr>
+                {% endfor %}
+            </tbody>
+        </table>
+
+        <h2>Regresiones de Duración</h2>
+        {% if duration_regressions %}
+        <table>
+            <thead><tr><th>Técnica</th><th>Mediana anterior (s)</th><th>Mediana reciente (s)</th><th>Cambio</th><th>Ejecuciones</th></tr></thead>
+            <tbody>
+                {% for r in duration_regressions %}
+                <tr><td>{{ r.technique_id }}</td><td>{{ r.baseline_seconds }}</td><td>{{ r.recent_seconds }}</td>
+                    <td class="failed">+{{ r.change }}%</td><td>{{ r.baseline_runs }} / {{ r.recent_runs }}</td></tr>
+                {% endfor %}
+            </tbody>
+        </table>
+        {% else %}
+        <p>No se han detectado regresiones de duración.</p>
+        {% endif %}
+
+        <h2>Cambios de Resultado por Objetivo</h2>
+        {% if outcome_changes %}
+        <table>
+            <thead><tr><th>Escenario</th><th>Técnica</th><th>Objetivo</th><th>Antes</th><th>Ahora</th><th>Ejecución</th></tr></thead>
+            <tbody>
+                {% for c in outcome_changes %}
+                <tr><td>{{ c.scenario }}</td><td>{{ c.technique_id }}</td><td>{{ c.target }}</td>
+                    <td class="{% if c.previous_status == 'success' %}success{% else %}failed{% endif %}">{{ c.previous_status }} ({{ c.previous_time }})</td>
+                    <td class="{% if c.current_status == 'success' %}success{% else %}failed{% endif %}">{{ c.current_status }} ({{ c.current_time }})</td>
+                    <td>{{ c.run }}</td></tr>
+                {% endfor %}
+            </tbody>
+        </table>
+        {% else %}
+        <p>Ninguna técnica ha cambiado de resultado en la última ejecución.</p>
+        {% endif %}
+    </div>
+</body>
+</html>"""
+
+# Plantilla de la página índice de un lote de informes
+INDEX_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{{ title }}</title>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; margin: 0; padding: 20px; color: #333; }
+        .container { max-width: 1200px; margin: 0 auto; }
+        h1 { color: #2c3e50; }
+        table { width: 100%; border-collapse: collapse; margin: 20px 0; }
+        th, td { padding: 8px 10px; text-align: left; border-bottom: 1px solid #ddd; }
+        th { background-color: #f2f2f2; }
+        .success { color: green; }
+        .failed { color: red; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>{{ title }}</h1>
+        <p>Fecha: {{ date }} &middot; Informes: {{ reports|length }}{% if errors %} &middot; <span class="failed">Con errores: {{ errors }}</span>{% endif %}</p>
+        <table>
+            <thead><tr><th>Ejecución</th><th>Escenario</th><th>Estado</th><th>Inicio</th><th>Técnicas exitosas</th></tr></thead>
+            <tbody>
+                {% for r in reports %}
+                <tr>
+                    <td>{% if r.report %}<a href="{{ r.report }}">{{ r.name }}</a>{% else %}{{ r.name }}{% endif %}</td>
+                    <td>{{ r.scenario }}</td>
+                    <td class="{% if r.status == 'completed' %}success{% else %}failed{% endif %}">{{ r.status }}{% if r.error %} ({{ r.error }}){% endif %}</td>
+                    <td>{{ r.start_time }}</td>
+                    <td>{% if r.success_rate is not none %}{{ r.success_rate|round(1) }}%{% endif %}</td>
+                </tr>
+                {% endfor %}
+            </tbody>
+        </table>
+    </div>
+</body>
+</html>"""
+
+
 class ReportGenerator:
     """Clase para generar informes de simulaciones de ciberataques."""
     
-    def __init__(self, input_dir: str, output_file: str, template_file: Optional[str] = None, logo_file: Optional[str] = None):
+    def __init__(self, input_dir: str, output_file: str, template_file: Optional[str] = None, logo_file: Optional[str] = None,
+                 chart_format: str = "png", chart_workers: Optional[int] = None, fmt: Optional[str] = None,
+                 chart_pool: Optional[Executor] = None, output_limit: int = DEFAULT_REPORT_OUTPUT_LIMIT):
         """
         Inicializa el generador de informes.
         
@@ -57,31 +255,37 @@ class ReportGenerator:
             output_file: Archivo de salida para el informe
             template_file: Plantilla personalizada para el informe
             logo_file: Logo para incluir en el informe
+            chart_format: Formato de los gráficos (png o svg)
+            chart_workers: Número máximo de procesos para dibujar los gráficos
+            fmt: Formato del informe (html, pdf o json); por defecto, según la extensión
+                de output_file. El formato json es un resumen sin gráficos ni plantillas
+            chart_pool: Pool de procesos para dibujar los gráficos, compartido con otros informes
+            output_limit: Caracteres de la salida de cada comando que se incluyen en el
+                informe HTML (0 para no limitar)
         """
         self.input_dir = input_dir
         self.output_file = output_file
         self.template_file = template_file
         self.logo_file = logo_file
+        self.chart_format = chart_format
+        self.chart_workers = chart_workers
+        self.chart_pool = chart_pool
+        self.output_limit = output_limit
         self.results = {}
         self.report_data = {}
         
         # Determinar formato de salida
-        self.output_format = os.path.splitext(output_file)[1].lower()
-        if self.output_format not in ['.pdf', '.html']:
-            logger.warning(f"Formato de salida no reconocido: {self.output_format}. Se usará HTML.")
-            self.output_format = '.html'
+        self.output_format = output_format(output_file, fmt)
             
         self._load_results()
         
     def _load_results(self) -> None:
-        """Carga los resultados de la simulación."""
-        results_file = os.path.join(self.input_dir, "results.json")
+        """Carga los resultados de la simulación desde results.json o desde el diario de eventos."""
         try:
-            with open(results_file, 'r') as f:
-                self.results = json.load(f)
-            logger.debug(f"Resultados cargados desde {results_file}")
-        except FileNotFoundError:
-            logger.error(f"Archivo de resultados no encontrado: {results_file}")
+            self.results = load_results(self.input_dir)
+            logger.debug(f"Resultados cargados desde {self.input_dir}")
+        except FileNotFoundError as e:
+            logger.error(f"Archivo de resultados no encontrado: {e}")
             sys.exit(1)
         except json.JSONDecodeError as e:
             logger.error(f"Error al parsear el archivo JSON: {e}")
@@ -91,162 +295,17 @@ class ReportGenerator:
         """
         Genera gráficos para el informe.
         
+        Solo se dibujan los gráficos cuyos datos han cambiado desde la última
+        generación (véase charts.py).
+        
         Returns:
             Diccionario con rutas a los archivos de gráficos generados
         """
         logger.info("Generando gráficos para el informe...")
         
-        charts_dir = os.path.join(self.input_dir, "charts")
-        os.makedirs(charts_dir, exist_ok=True)
-        
-        charts = {}
-        
-        # Gráfico de técnicas por estado
-        try:
-            techniques = self.results.get("techniques", [])
-            if techniques:
-                status_counts = {"success": 0, "failed": 0}
-                for technique in techniques:
-                    status = technique.get("status", "unknown")
-                    if status in status_counts:
-                        status_counts[status] += 1
-                    else:
-                        status_counts[status] = 1
-                        
-                # Crear gráfico de barras
-                plt.figure(figsize=(8, 6))
-                bars = plt.bar(
-                    status_counts.keys(),
-                    status_counts.values(),
-                    color=['green', 'red']
-                )
-                
-                # Añadir etiquetas
-                plt.title('Resultado de Técnicas de Ataque')
-                plt.xlabel('Estado')
-                plt.ylabel('Cantidad')
-                
-                # Añadir valores en las barras
-                for bar in bars:
-                    height = bar.get_height()
-                    plt.text(
-                        bar.get_x() + bar.get_width()/2.,
-                        height,
-                        f'{height}',
-                        ha='center',
-                        va='bottom'
-                    )
-                    
-                # Guardar gráfico
-                techniques_chart_path = os.path.join(charts_dir, "techniques_status.png")
-                plt.savefig(techniques_chart_path)
-                plt.close()
-                
-                charts["techniques_status"] = techniques_chart_path
-                logger.debug(f"Gráfico de técnicas generado: {techniques_chart_path}")
-        except Exception as e:
-            logger.error(f"Error al generar gráfico de técnicas: {e}")
-            
-        # Gráfico de línea de tiempo
-        try:
-            steps = self.results.get("steps", [])
-            if steps:
-                step_names = []
-                durations = []
-                
-                for step in steps:
-                    name = step.get("name", "Unknown")
-                    start_time = datetime.datetime.fromisoformat(step.get("start_time", ""))
-                    end_time = datetime.datetime.fromisoformat(step.get("end_time", ""))
-                    duration = (end_time - start_time).total_seconds() / 60  # Duración en minutos
-                    
-                    step_names.append(name)
-                    durations.append(duration)
-                    
-                # Crear gráfico de barras horizontales
-                plt.figure(figsize=(10, 6))
-                bars = plt.barh(step_names, durations)
-                
-                # Añadir etiquetas
-                plt.title('Duración de Pasos de Ataque')
-                plt.xlabel('Duración (minutos)')
-                plt.ylabel('Paso')
-                
-                # Añadir valores en las barras
-                for bar in bars:
-                    width = bar.get_width()
-                    plt.text(
-                        width + 0.1,
-                        bar.get_y() + bar.get_height()/2.,
-                        f'{width:.2f} min',
-                        ha='left',
-                        va='center'
-                    )
-                    
-                # Guardar gráfico
-                timeline_chart_path = os.path.join(charts_dir, "steps_timeline.png")
-                plt.savefig(timeline_chart_path)
-                plt.close()
-                
-                charts["steps_timeline"] = timeline_chart_path
-                logger.debug(f"Gráfico de línea de tiempo generado: {timeline_chart_path}")
-        except Exception as e:
-            logger.error(f"Error al generar gráfico de línea de tiempo: {e}")
-            
-        # Gráfico de mapa de calor de técnicas MITRE ATT&CK
-        try:
-            techniques = self.results.get("techniques", [])
-            if techniques:
-                # Agrupar técnicas por tácticas (primeros caracteres del ID)
-                tactics = {}
-                for technique in techniques:
-                    technique_id = technique.get("id", "")
-                    if technique_id.startswith("T"):
-                        tactic = technique_id[:4]  # Tomar los primeros 4 caracteres (ej: T1078)
-                        if tactic in tactics:
-                            tactics[tactic] += 1
-                        else:
-                            tactics[tactic] = 1
-                            
-                if tactics:
-                    # Crear gráfico de barras
-                    plt.figure(figsize=(12, 6))
-                    bars = plt.bar(
-                        tactics.keys(),
-                        tactics.values(),
-                        color='blue'
-                    )
-                    
-                    # Añadir etiquetas
-                    plt.title('Técnicas MITRE ATT&CK Utilizadas')
-                    plt.xlabel('ID de Técnica')
-                    plt.ylabel('Frecuencia')
-                    plt.xticks(rotation=45)
-                    
-                    # Añadir valores en las barras
-                    for bar in bars:
-                        height = bar.get_height()
-                        plt.text(
-                            bar.get_x() + bar.get_width()/2.,
-                            height,
-                            f'{height}',
-                            ha='center',
-                            va='bottom'
-                        )
-                        
-                    plt.tight_layout()
-                    
-                    # Guardar gráfico
-                    mitre_chart_path = os.path.join(charts_dir, "mitre_techniques.png")
-                    plt.savefig(mitre_chart_path)
-                    plt.close()
-                    
-                    charts["mitre_techniques"] = mitre_chart_path
-                    logger.debug(f"Gráfico de técnicas MITRE generado: {mitre_chart_path}")
-        except Exception as e:
-            logger.error(f"Error al generar gráfico de técnicas MITRE: {e}")
-            
-        return charts
+        renderer = ChartRenderer(os.path.join(self.input_dir, "charts"), fmt=self.chart_format,
+                                 workers=self.chart_workers, pool=self.chart_pool)
+        return renderer.render(self.results)
         
     def _generate_statistics(self) -> Dict[str, Any]:
         """
@@ -358,8 +417,8 @@ class ReportGenerator:
         """Prepara los datos para el informe."""
         logger.info("Preparando datos para el informe...")
         
-        # Generar gráficos
-        charts = self._generate_charts()
+        # Generar gráficos (el resumen JSON no los incluye)
+        charts = self._generate_charts() if self.output_format != '.json' else {}
         
         # Generar estadísticas
         stats = self._generate_statistics()
@@ -402,10 +461,13 @@ class ReportGenerator:
             template_path = os.path.join(os.path.dirname(__file__), "templates")
             template_file = "report_template.html"
             
-            # Si no existe la plantilla predeterminada, crear una básica
-            if not os.path.exists(os.path.join(template_path, template_file)):
+            # Si no existe la plantilla predeterminada, crear una básica (de forma
+            # atómica, ya que en un lote varios informes pueden crearla a la vez)
+            default_template = os.path.join(template_path, template_file)
+            if not os.path.exists(default_template):
                 os.makedirs(template_path, exist_ok=True)
-                with open(os.path.join(template_path, template_file), 'w') as f:
+                tmp_template = f"{default_template}.tmp.{os.getpid()}.{threading.get_ident()}"
+                with open(tmp_template, 'w') as f:
                     f.write("""<!DOCTYPE html>
 <html>
 <head>
@@ -509,6 +571,12 @@ class ReportGenerator:
         .low-priority {
             border-left-color: #2ecc71;
         }
+        .command-output pre {
+            background-color: #f8f9fa;
+            padding: 10px;
+            overflow-x: auto;
+            white-space: pre-wrap;
+        }
         .footer {
             margin-top: 50px;
             text-align: center;
@@ -625,6 +693,23 @@ class ReportGenerator:
             </tbody>
         </table>
 
+        <h2>Salida de los Comandos</h2>
+        {% for step in steps %}
+        {% for technique in step.techniques %}
+        {% for out in technique.output %}
+        <details class="command-output">
+            <summary>{{ step.name }} &middot; {{ technique.id }} &middot; <code>{{ out.command|e }}</code> (código {{ out.returncode }})</summary>
+            {% for stream in ["stdout", "stderr"] %}
+            {% if out[stream] %}
+            <pre>{{ out[stream]|e }}</pre>
+            {% if out[stream ~ "_link"] %}<p><a href="{{ out[stream ~ "_link"] }}">Salida completa ({{ stream }})</a></p>{% endif %}
+            {% endif %}
+            {% endfor %}
+        </details>
+        {% endfor %}
+        {% endfor %}
+        {% endfor %}
+
         <h2>Recomendaciones</h2>
         <div class="recommendations">
             {% for rec in recommendations %}
@@ -641,32 +726,119 @@ class ReportGenerator:
     </div>
 </body>
 </html>""")
+                os.replace(tmp_template, default_template)
                 
-        # Configurar entorno Jinja2
-        env = Environment(loader=FileSystemLoader(template_path))
-        
-        # Añadir filtro para convertir strings a datetime
-        def to_datetime(value):
-            return datetime.datetime.fromisoformat(value)
-        env.filters['to_datetime'] = to_datetime
-        
-        # Cargar plantilla
-        template = env.get_template(template_file)
+        # Cargar plantilla (compilada una sola vez por proceso)
+        template = template_environment(os.path.abspath(template_path)).get_template(template_file)
         
-        # Renderizar HTML
-        html_content = template.render(**self.report_data)
-        
-        # Guardar HTML
         html_output = self.output_file
         if not html_output.endswith('.html'):
             html_output = f"{os.path.splitext(html_output)[0]}.html"
             
-        with open(html_output, 'w') as f:
-            f.write(html_content)
+        # Los gráficos se referencian de forma relativa al informe
+        report_dir = os.path.dirname(os.path.abspath(html_output))
+        charts = {name: os.path.relpath(os.path.abspath(path), report_dir)
+                  for name, path in self.report_data["charts"].items()}
+        
+        os.makedirs(report_dir, exist_ok=True)
+        steps = self._report_steps(report_dir, f"{os.path.splitext(html_output)[0]}_outputs")
+        
+        # Renderizar el HTML por fragmentos directamente al archivo, sin construirlo en memoria
+        with open(html_output, 'w', encoding='utf-8') as f:
+            for chunk in template.generate(**dict(self.report_data, charts=charts, steps=steps)):
+                f.write(chunk)
             
         logger.debug(f"Informe HTML generado: {html_output}")
         return html_output
         
+    def _report_steps(self, report_dir: str, outputs_dir: str) -> List[Dict[str, Any]]:
+        """
+        Prepara los pasos para el informe HTML acotando la salida de los comandos.
+        
+        Las salidas que superan el límite se recortan al principio y al final y se
+        enlazan con su versión completa: el archivo comprimido que el ejecutor volcó
+        en el directorio de resultados o, si no existe, un archivo de texto que se
+        escribe en outputs_dir. Cada salida recortada incluye `<flujo>_truncated` y
+        `<flujo>_link` (ruta relativa al informe).
+        
+        Args:
+            report_dir: Directorio del informe
+            outputs_dir: Directorio para las salidas completas que no están en disco
+            
+        Returns:
+            Pasos con sus técnicas y las salidas acotadas
+        """
+        if not self.output_limit:
+            return self.report_data["steps"]
+            
+        head = self.output_limit // 2
+        tail = self.output_limit - head
+        written = 0
+        steps = []
+        for i, step in enumerate(self.report_data["steps"]):
+            techniques = []
+            for j, technique in enumerate(step.get("techniques", [])):
+                outputs = []
+                for k, output in enumerate(technique.get("output", [])):
+                    output = dict(output)
+                    for stream in OUTPUT_STREAMS:
+                        text = output.get(stream) or ""
+                        spill = output.get(f"{stream}_file")
+                        if len(text) <= self.output_limit and not spill:
+                            continue
+                        if spill:
+                            link = os.path.join(os.path.abspath(self.input_dir), spill)
+                        else:
+                            os.makedirs(outputs_dir, exist_ok=True)
+                            link = os.path.join(outputs_dir, f"step{i}_technique{j}_command{k}.{stream}.txt")
+                            with open(link, 'w', encoding='utf-8') as f:
+                                f.write(text)
+                            written += 1
+                        if len(text) > self.output_limit:
+                            omitted = len(text) - self.output_limit
+                            text = f"{text[:head]}\n[... {omitted} caracteres omitidos ...]\n{text[-tail:]}"
+                        output[stream] = text
+                        output[f"{stream}_truncated"] = True
+                        output[f"{stream}_link"] = os.path.relpath(link, report_dir)
+                    outputs.append(output)
+                techniques.append(dict(technique, output=outputs))
+            steps.append(dict(step, techniques=techniques))
+            
+        if written:
+            logger.info(f"Salidas completas de {written} comandos guardadas en {outputs_dir}")
+        return steps
+        
+    def _generate_json_report(self) -> str:
+        """
+        Genera un resumen del informe en formato JSON, sin gráficos ni plantillas.
+        
+        Las técnicas de cada paso se resumen sin la salida de sus comandos.
+        
+        Returns:
+            Ruta al archivo JSON generado
+        """
+        logger.info("Generando resumen JSON...")
+        
+        summary = {k: v for k, v in self.report_data.items() if k not in ("logo", "charts", "steps")}
+        summary["steps"] = [
+            dict({k: v for k, v in step.items() if k != "techniques"},
+                 techniques=[{k: v for k, v in t.items() if k != "output"} for t in step.get("techniques", [])])
+            for step in self.report_data["steps"]
+        ]
+        for key in ("timing", "resources", "latency"):
+            if key in self.results:
+                summary[key] = self.results[key]
+                
+        json_output = self.output_file
+        if not json_output.endswith('.json'):
+            json_output = f"{os.path.splitext(json_output)[0]}.json"
+            
+        with open(json_output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+            
+        logger.debug(f"Resumen JSON generado: {json_output}")
+        return json_output
+        
     def _generate_pdf_report(self) -> str:
         """
         Genera el informe en formato PDF.
@@ -685,6 +857,7 @@ class ReportGenerator:
             pdf_output = f"{os.path.splitext(pdf_output)[0]}.pdf"
             
         try:
+            import pdfkit
             pdfkit.from_file(html_file, pdf_output)
             logger.debug(f"Informe PDF generado: {pdf_output}")
             return pdf_output
@@ -706,26 +879,319 @@ class ReportGenerator:
         self._prepare_report_data()
         
         # Generar informe según formato
-        if self.output_format == '.pdf':
+        if self.output_format == '.json':
+            return self._generate_json_report()
+        elif self.output_format == '.pdf':
             return self._generate_pdf_report()
         else:
             return self._generate_html_report()
             
+class TrendReportGenerator:
+    """Clase para generar informes de tendencias a partir del índice de resultados."""
+    
+    # Periodos más recientes que se muestran en la tabla de tasas de éxito del informe HTML
+    MAX_PERIODS = 14
+    
+    def __init__(self, index_file: str, output_file: str, scenario: Optional[str] = None,
+                 since: Optional[str] = None, period: str = "day", window: int = 5, threshold: float = 0.25,
+                 fmt: Optional[str] = None):
+        """
+        Inicializa el generador de informes de tendencias.
+        
+        Args:
+            index_file: Base de datos creada con index_results.py
+            output_file: Archivo de salida para el informe (HTML, PDF o JSON)
+            scenario: Limitar el informe a las ejecuciones de un escenario
+            since: Limitar el informe a las ejecuciones iniciadas a partir de esta fecha
+            period: Agrupación temporal de las tasas de éxito (day, week o month)
+            window: Número de ejecuciones recientes que se comparan para detectar regresiones
+            threshold: Aumento relativo de duración que se considera una regresión
+            fmt: Formato del informe (html, pdf o json); por defecto, según la extensión
+        """
+        self.index_file = index_file
+        self.output_file = output_file
+        self.scenario = scenario
+        self.since = since
+        self.period = period
+        self.window = window
+        self.threshold = threshold
+        
+        self.output_format = output_format(output_file, fmt)
+            
+    def _collect(self) -> Dict[str, Any]:
+        """Consulta las tendencias en el índice."""
+        if not os.path.exists(self.index_file):
+            logger.error(f"Índice de resultados no encontrado: {self.index_file} (créelo con index_results.py)")
+            sys.exit(1)
+            
+        with ResultsIndex(self.index_file) as index:
+            trend = index.success_trend(self.period, self.scenario, self.since)
+            data = {
+                "title": "Informe de Tendencias de Simulaciones",
+                "date": datetime.datetime.now().strftime("%Y-%m-%d"),
+                "scenario": self.scenario or "Todos",
+                "since": self.since or "",
+                "period": self.period,
+                "runs": index.run_count(),
+                "success_trend": trend,
+                "duration_regressions": index.duration_regressions(self.window, self.threshold,
+                                                                   self.scenario, self.since),
+                "outcome_changes": index.outcome_changes(self.scenario, self.since)
+            }
+            
+        # Tabla técnica x periodo con los periodos más recientes
+        periods = sorted({row["period"] for row in trend})[-self.MAX_PERIODS:]
+        rates: Dict[str, Dict[str, float]] = {}
+        for row in trend:
+            rates.setdefault(row["technique_id"], {})[row["period"]] = row["success_rate"]
+        data["periods"] = periods
+        data["success_table"] = [
+            {"id": technique_id, "rates": [by_period.get(p) for p in periods]}
+            for technique_id, by_period in sorted(rates.items())
+        ]
+        return data
+        
+    def generate(self) -> str:
+        """
+        Genera el informe de tendencias.
+        
+        Returns:
+            Ruta al archivo de informe generado
+        """
+        logger.info(f"Generando informe de tendencias desde {self.index_file}...")
+        data = self._collect()
+        
+        if self.output_format == '.json':
+            json_output = f"{os.path.splitext(self.output_file)[0]}.json"
+            data = {k: v for k, v in data.items() if k not in ("periods", "success_table")}
+            with open(json_output, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            return json_output
+            
+        from jinja2 import Environment
+        html_output = f"{os.path.splitext(self.output_file)[0]}.html"
+        env = Environment()
+        with open(html_output, 'w', encoding='utf-8') as f:
+            f.write(env.from_string(TREND_TEMPLATE).render(**data))
+        if self.output_format != '.pdf':
+            return html_output
+            
+        pdf_output = f"{os.path.splitext(self.output_file)[0]}.pdf"
+        try:
+            import pdfkit
+            pdfkit.from_file(html_output, pdf_output)
+            return pdf_output
+        except Exception as e:
+            logger.error(f"Error al generar PDF: {e}")
+            logger.warning(f"Se utilizará el informe HTML: {html_output}")
+            return html_output
+            
+def is_run_dir(path: str) -> bool:
+    """Comprueba si un directorio contiene los resultados de una ejecución."""
+    return os.path.isfile(os.path.join(path, RESULTS_FILE)) or os.path.isfile(os.path.join(path, JOURNAL_FILE))
+
+
+def _report_names(run_dirs: List[str]) -> List[str]:
+    """Nombres de archivo únicos para los informes de varias ejecuciones, según su ruta."""
+    common = os.path.commonpath(run_dirs) if len(run_dirs) > 1 else os.path.dirname(run_dirs[0])
+    names = []
+    used: Dict[str, int] = {}
+    for run_dir in run_dirs:
+        relative = os.path.relpath(run_dir, common)
+        name = relative.replace(os.sep, "_") if relative != "." else os.path.basename(run_dir)
+        count = used.get(name, 0)
+        used[name] = count + 1
+        names.append(name if not count else f"{name}_{count + 1}")
+    return names
+
+
+class BatchReportGenerator:
+    """Genera los informes de muchas ejecuciones en un solo proceso, con una página índice."""
+    
+    def __init__(self, input_dirs: List[str], output_dir: str, fmt: str = "html",
+                 template_file: Optional[str] = None, logo_file: Optional[str] = None,
+                 chart_format: str = "png", workers: Optional[int] = None,
+                 output_limit: int = DEFAULT_REPORT_OUTPUT_LIMIT):
+        """
+        Inicializa el generador de informes en lote.
+        
+        Args:
+            input_dirs: Directorios de resultados de las ejecuciones
+            output_dir: Directorio en el que se guardan los informes y el índice
+            fmt: Formato de los informes (html, pdf o json)
+            template_file: Plantilla personalizada para los informes
+            logo_file: Logo para incluir en los informes
+            chart_format: Formato de los gráficos (png o svg)
+            workers: Número de informes que se generan a la vez y de procesos para
+                dibujar los gráficos (por defecto, uno por CPU)
+            output_limit: Caracteres de la salida de cada comando incluidos en los informes HTML
+        """
+        self.input_dirs = input_dirs
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.template_file = template_file
+        self.logo_file = logo_file
+        self.chart_format = chart_format
+        self.workers = workers or os.cpu_count() or 1
+        self.output_limit = output_limit
+        
+    def _generate_one(self, run_dir: str, name: str, chart_pool: Optional[Executor]) -> Dict[str, Any]:
+        """Genera el informe de una ejecución y devuelve su entrada del índice."""
+        entry = {"name": name, "input": run_dir, "report": "", "scenario": "", "status": "error",
+                 "start_time": "", "success_rate": None, "error": ""}
+        try:
+            generator = ReportGenerator(
+                input_dir=run_dir,
+                output_file=os.path.join(self.output_dir, f"{name}.{self.fmt}"),
+                template_file=self.template_file,
+                logo_file=self.logo_file,
+                chart_format=self.chart_format,
+                fmt=self.fmt,
+                chart_pool=chart_pool,
+                output_limit=self.output_limit
+            )
+            report = generator.generate()
+        except SystemExit:
+            entry["error"] = "no se pudieron cargar los resultados"
+            return entry
+        except Exception as e:
+            logger.error(f"Error al generar el informe de {run_dir}: {e}")
+            entry["error"] = str(e)
+            return entry
+            
+        stats = generator.report_data["statistics"]
+        entry.update({
+            "report": os.path.relpath(report, self.output_dir),
+            "scenario": stats["scenario_name"],
+            "status": stats["status"],
+            "start_time": generator.report_data["start_time"],
+            "success_rate": stats["techniques"]["success_rate"]
+        })
+        return entry
+        
+    def generate(self) -> Tuple[str, int]:
+        """
+        Genera todos los informes y la página índice.
+        
+        Los informes se generan en paralelo en hilos que comparten el entorno de
+        plantillas compiladas y un único pool de procesos para los gráficos.
+        
+        Returns:
+            Tupla con (ruta de la página índice, número de informes con errores)
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        names = _report_names(self.input_dirs)
+        logger.info(f"Generando {len(self.input_dirs)} informes en {self.output_dir} ({self.workers} en paralelo)")
+        
+        chart_pool = None
+        if self.fmt != "json":
+            from concurrent.futures import ProcessPoolExecutor
+            chart_pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                reports = list(pool.map(lambda job: self._generate_one(job[0], job[1], chart_pool),
+                                        zip(self.input_dirs, names)))
+        finally:
+            if chart_pool is not None:
+                chart_pool.shutdown()
+                
+        errors = sum(1 for r in reports if r["error"])
+        index = {
+            "title": "Informes de Simulaciones de Ciberataques",
+            "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "errors": errors,
+            "reports": reports
+        }
+        if self.fmt == "json":
+            index_file = os.path.join(self.output_dir, "index.json")
+            with open(index_file, 'w', encoding='utf-8') as f:
+                json.dump(index, f, indent=2, ensure_ascii=False)
+        else:
+            from jinja2 import Environment
+            index_file = os.path.join(self.output_dir, "index.html")
+            with open(index_file, 'w', encoding='utf-8') as f:
+                f.write(Environment().from_string(INDEX_TEMPLATE).render(**index))
+        return index_file, errors
+        
+        
 def main():
     """Función principal."""
     parser = argparse.ArgumentParser(description='Generar informe de simulación de ciberataques')
-    parser.add_argument('--input', required=True, help='Directorio con los resultados de la simulación')
-    parser.add_argument('--output', required=True, help='Archivo de salida para el informe (PDF o HTML)')
+    parser.add_argument('--input', nargs='+',
+                        help='Directorio con los resultados de la simulación, o varios directorios o patrones '
+                             'glob para generar los informes en lote')
+    parser.add_argument('--output', required=True, help='Archivo de salida para el informe (PDF, HTML o JSON)')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS,
+                        help='Formato del informe (por defecto, según la extensión de --output)')
     parser.add_argument('--template', help='Plantilla personalizada para el informe')
     parser.add_argument('--logo', help='Logo para incluir en el informe')
+    parser.add_argument('--chart-format', choices=CHART_FORMATS, default='png',
+                        help='Formato de los gráficos (svg es vectorial y más rápido de generar)')
+    parser.add_argument('--chart-workers', type=int, help='Número máximo de procesos para dibujar los gráficos')
+    parser.add_argument('--output-limit', type=int, default=DEFAULT_REPORT_OUTPUT_LIMIT,
+                        help='Caracteres de la salida de cada comando incluidos en el informe HTML (0 = sin límite)')
+    parser.add_argument('--trend', action='store_true',
+                        help='Generar un informe de tendencias desde el índice de resultados')
+    parser.add_argument('--index', default=DEFAULT_INDEX, help='Base de datos creada con index_results.py')
+    parser.add_argument('--scenario', help='Limitar el informe de tendencias a un escenario')
+    parser.add_argument('--since', help='Limitar el informe de tendencias a las ejecuciones desde esta fecha')
+    parser.add_argument('--period', choices=list(PERIODS), default='day',
+                        help='Agrupación temporal de las tasas de éxito')
+    parser.add_argument('--window', type=int, default=5,
+                        help='Ejecuciones recientes que se comparan para detectar regresiones de duración')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Aumento relativo de duración que se considera una regresión (0.25 = 25 %%)')
     
     args = parser.parse_args()
     
+    if args.trend:
+        trend = TrendReportGenerator(
+            index_file=args.index,
+            output_file=args.output,
+            scenario=args.scenario,
+            since=args.since,
+            period=args.period,
+            window=args.window,
+            threshold=args.threshold,
+            fmt=args.format
+        )
+        output_file = trend.generate()
+        logger.info(f"Informe de tendencias generado correctamente: {output_file}")
+        return
+        
+    if not args.input:
+        parser.error("se requiere --input (o --trend)")
+        
+    # Varios directorios, patrones glob o un directorio que contiene ejecuciones: informes en lote
+    if len(args.input) > 1 or any(glob.has_magic(p) for p in args.input) or \
+            (os.path.isdir(args.input[0]) and not is_run_dir(args.input[0])):
+        run_dirs = find_run_dirs(args.input)
+        if not run_dirs:
+            logger.error(f"No se encontraron resultados en: {' '.join(args.input)}")
+            sys.exit(1)
+        batch = BatchReportGenerator(
+            input_dirs=run_dirs,
+            output_dir=args.output,
+            fmt=args.format or "html",
+            template_file=args.template,
+            logo_file=args.logo,
+            chart_format=args.chart_format,
+            workers=args.chart_workers,
+            output_limit=args.output_limit
+        )
+        index_file, errors = batch.generate()
+        logger.info(f"Informes generados: {len(run_dirs) - errors} de {len(run_dirs)}. Índice: {index_file}")
+        sys.exit(1 if errors else 0)
+        
     generator = ReportGenerator(
-        input_dir=args.input,
+        input_dir=args.input[0],
         output_file=args.output,
         template_file=args.template,
-        logo_file=args.logo
+        logo_file=args.logo,
+        chart_format=args.chart_format,
+        chart_workers=args.chart_workers,
+        fmt=args.format,
+        output_limit=args.output_limit
     )
     
     output_file = generator.generate()
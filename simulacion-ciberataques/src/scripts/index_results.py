@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Script para indexar resultados de simulaciones en una base de datos de análisis.
+
+Este script recorre los directorios de resultados de muchas ejecuciones (incluidos
+los escenarios de un lote y los objetivos del modo matriz) y los indexa en una base
+de datos SQLite con tablas de ejecuciones, pasos, técnicas y comandos. Las
+ejecuciones ya indexadas cuyo archivo de resultados no ha cambiado no se vuelven a
+leer. El índice se consulta con `generate_report.py --trend`.
+
+Uso:
+    python index_results.py --index <base_de_datos> <directorio> [<directorio> ...]
+
+Opciones:
+    --index ARCHIVO   Base de datos SQLite del índice (por defecto, results_index.db)
+    --force           Volver a indexar todas las ejecuciones aunque no hayan cambiado
+    --prune           Eliminar del índice las ejecuciones cuyo directorio ya no existe
+    DIRECTORIO        Directorios o patrones glob con resultados de ejecuciones
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+
+from analytics import DEFAULT_INDEX, ResultsIndex, find_run_dirs
+
+# Configuración del logger
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger('index_results')
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Indexar resultados de simulaciones para análisis de tendencias')
+    parser.add_argument('paths', nargs='*', metavar='DIRECTORIO',
+                        help='Directorios o patrones glob con resultados de ejecuciones')
+    parser.add_argument('--index', default=DEFAULT_INDEX, help='Base de datos SQLite del índice')
+    parser.add_argument('--force', action='store_true',
+                        help='Volver a indexar todas las ejecuciones aunque no hayan cambiado')
+    parser.add_argument('--prune', action='store_true',
+                        help='Eliminar del índice las ejecuciones cuyo directorio ya no existe')
+
+    args = parser.parse_args()
+
+    if not (args.paths or args.prune):
+        parser.error("se requiere al menos un directorio o --prune")
+
+    start = time.monotonic()
+    indexed = unchanged = errors = 0
+    with ResultsIndex(args.index) as index:
+        if args.prune:
+            logger.info(f"Ejecuciones eliminadas del índice: {index.prune()}")
+
+        for run_dir in find_run_dirs(args.paths):
+            try:
+                if index.ingest(run_dir, force=args.force):
+                    indexed += 1
+                    logger.debug(f"Ejecución indexada: {run_dir}")
+                else:
+                    unchanged += 1
+            except (OSError, json.JSONDecodeError) as e:
+                errors += 1
+                logger.error(f"No se pudo indexar {run_dir}: {e}")
+
+        total = index.run_count()
+
+    logger.info(f"Índice {args.index}: {indexed} ejecuciones indexadas, {unchanged} sin cambios, "
+                f"{errors} con errores ({total} en total, {time.monotonic() - start:.2f}s)")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
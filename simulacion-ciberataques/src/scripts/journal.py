@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+
+"""
+Diario de eventos (JSON Lines) de la ejecución de un escenario.
+
+Durante la ejecución, el ejecutor añade al archivo `journal.jsonl` del directorio de
+resultados un evento por línea (`run_started`, `step_started`, `technique_started`,
+`command_output_chunk`, `command_finished`, `technique_finished`, `step_finished`,
+`step_skipped`, `run_finished`), que se vuelca a disco en cuanto se produce. Si la
+ejecución se interrumpe, el diario conserva todo lo ejecutado hasta ese momento.
+
+La compactación reconstruye a partir del diario un diccionario con la misma forma
+que `results.json`.
+"""
+
+import datetime
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, IO, Optional
+
+logger = logging.getLogger('run_scenario.journal')
+
+JOURNAL_FILE = "journal.jsonl"
+RESULTS_FILE = "results.json"
+
+STATUS_INTERRUPTED = "interrupted"
+
+
+class ResultsJournal:
+    """Escritor del diario de eventos, seguro para varios hilos."""
+
+    def __init__(self, output_dir: str, append: bool = False):
+        """
+        Inicializa el diario.
+
+        Args:
+            output_dir: Directorio de resultados en el que se crea el diario
+            append: Si se deben conservar los eventos de un diario existente
+        """
+        self.path = os.path.join(output_dir, JOURNAL_FILE)
+        self.append = append
+        self._lock = threading.Lock()
+        self._file: Optional[IO[str]] = None
+
+    def emit(self, event: str, **fields: Any) -> None:
+        """
+        Añade un evento al diario y lo vuelca a disco.
+
+        Args:
+            event: Tipo de evento
+            **fields: Campos del evento
+        """
+        record = {"event": event, "ts": datetime.datetime.now().isoformat()}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, 'a' if self.append else 'w', encoding='utf-8')
+                self.append = True
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        """Cierra el archivo del diario."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def write_results(path: str, results: Dict[str, Any]) -> None:
+    """
+    Escribe un archivo de resultados de forma atómica.
+
+    Args:
+        path: Ruta del archivo de resultados
+        results: Resultados a guardar
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def compact_journal(journal_path: str) -> Dict[str, Any]:
+    """
+    Reconstruye los resultados de una ejecución a partir de su diario.
+
+    Los pasos y técnicas que no llegaron a finalizar se marcan como interrumpidos.
+
+    Args:
+        journal_path: Ruta al archivo journal.jsonl
+
+    Returns:
+        Diccionario con la forma de results.json
+    """
+    results: Dict[str, Any] = {
+        "scenario": "",
+        "start_time": "",
+        "end_time": "",
+        "status": STATUS_INTERRUPTED,
+        "techniques": [],
+        "steps": []
+    }
+    steps: Dict[int, Dict[str, Any]] = {}
+    techniques: Dict[tuple, Dict[str, Any]] = {}
+    commands: Dict[tuple, Dict[str, Any]] = {}
+    skipped_steps = []
+    last_ts = ""
+    finished = False
+
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Una última línea incompleta es esperable tras una interrupción
+                logger.warning(f"Línea {number} del diario no válida; se ignora")
+                continue
+
+            event = record.get("event")
+            last_ts = record.get("ts", last_ts)
+
+            if event == "run_started":
+                results["scenario"] = record.get("scenario", "")
+                results["start_time"] = record.get("start_time", record.get("ts", ""))
+                results["status"] = "running"
+            elif event == "step_started":
+                steps[record["step_index"]] = {
+                    "name": record.get("name", ""),
+                    "status": "running",
+                    "start_time": record.get("start_time", record.get("ts", "")),
+                    "end_time": "",
+                    "techniques": []
+                }
+            elif event == "step_finished":
+                step = steps.setdefault(record["step_index"], {"name": record.get("name", ""), "techniques": []})
+                step.update({k: record[k] for k in ("name", "status", "start_time", "end_time") if k in record})
+            elif event == "step_skipped":
+                skipped_steps.append(record.get("name", ""))
+            elif event == "technique_started":
+                key = (record["step_index"], record["technique_index"])
+                # Al reanudar una ejecución, una técnica repetida sustituye a la anterior
+                for command_key in [c for c in commands if c[:2] == key]:
+                    del commands[command_key]
+                techniques[key] = {
+                    "id": record.get("id", ""),
+                    "name": record.get("name", ""),
+                    "target": record.get("target"),
+                    "status": "running",
+                    "start_time": record.get("start_time", record.get("ts", "")),
+                    "end_time": "",
+                    "output": [],
+                    "error": ""
+                }
+            elif event == "command_output_chunk":
+                key = (record["step_index"], record["technique_index"], record["command_index"])
+                command = commands.setdefault(key, {"command": "", "returncode": None, "stdout": "", "stderr": ""})
+                stream = record.get("stream", "stdout")
+                command[stream] = command.get(stream, "") + record.get("data", "")
+            elif event == "command_finished":
+                key = (record["step_index"], record["technique_index"], record["command_index"])
+                command = commands.setdefault(key, {"command": "", "returncode": None, "stdout": "", "stderr": ""})
+                command.update({k: v for k, v in record.items()
+                                if k not in ("event", "ts", "step_index", "technique_index", "command_index")})
+            elif event == "technique_finished":
+                key = (record["step_index"], record["technique_index"])
+                technique = techniques.setdefault(key, {"output": []})
+                technique.update({k: v for k, v in record.items()
+                                  if k not in ("event", "ts", "step_index", "technique_index")})
+            elif event == "run_finished":
+                finished = True
+                results.update({k: v for k, v in record.items() if k not in ("event", "ts")})
+
+    # Asociar comandos a técnicas y técnicas a pasos, en orden de declaración
+    for (step_index, technique_index, _), command in sorted(commands.items()):
+        technique = techniques.setdefault((step_index, technique_index), {"output": []})
+        technique.setdefault("output", []).append(command)
+
+    for (step_index, _), technique in sorted(techniques.items()):
+        if technique.get("status") == "running":
+            technique["status"] = STATUS_INTERRUPTED
+            technique["end_time"] = last_ts
+        step = steps.setdefault(step_index, {"name": "", "status": "running", "start_time": "",
+                                             "end_time": "", "techniques": []})
+        step["techniques"].append(technique)
+
+    for step in steps.values():
+        if step.get("status") == "running":
+            step["status"] = STATUS_INTERRUPTED
+            step["end_time"] = last_ts
+
+    results["steps"] = [steps[i] for i in sorted(steps)]
+    results["techniques"] = [
+        {"id": t.get("id", ""), "name": t.get("name", ""), "status": t.get("status", "")}
+        for step in results["steps"] for t in step.get("techniques", [])
+    ]
+    if skipped_steps:
+        results["skipped_steps"] = skipped_steps
+    if not finished:
+        results["status"] = STATUS_INTERRUPTED
+        results["end_time"] = last_ts
+
+    return results
+
+
+def load_results(input_dir: str) -> Dict[str, Any]:
+    """
+    Carga los resultados de una ejecución desde results.json o, si no existe, desde su diario.
+
+    Args:
+        input_dir: Directorio de resultados
+
+    Returns:
+        Diccionario con los resultados
+
+    Raises:
+        FileNotFoundError: Si no existe ninguno de los dos archivos
+        json.JSONDecodeError: Si results.json no es un JSON válido
+    """
+    results_file = os.path.join(input_dir, RESULTS_FILE)
+    if os.path.exists(results_file):
+        with open(results_file, 'r') as f:
+            return json.load(f)
+
+    journal_file = os.path.join(input_dir, JOURNAL_FILE)
+    if os.path.exists(journal_file):
+        logger.info(f"results.json no encontrado; se compacta el diario {journal_file}")
+        return compact_journal(journal_file)
+
+    raise FileNotFoundError(results_file)
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+"""
+Ejecución de un escenario en modo matriz sobre todos sus objetivos.
+
+En modo matriz, el grafo completo de pasos y técnicas del escenario se ejecuta una
+vez por cada objetivo declarado, en paralelo. Los comandos y los campos `target`
+de pasos y técnicas pueden usar variables del objetivo con la sintaxis de
+`string.Template`, que se sustituyen en cada copia del escenario:
+
+    ${target}         Valor del objetivo (por ejemplo, la IP o el nombre de la VM)
+    ${target_type}    Tipo del objetivo
+    ${target_name}    Nombre del objetivo (o su valor si no tiene nombre)
+    ${target_index}   Posición del objetivo en la lista, empezando por 0
+    ${target_<campo>} Cualquier otro campo simple del objetivo (por ejemplo, ${target_user})
+
+Solo se sustituyen las variables `${target...}` entre llaves, de forma que el resto
+de usos de `$` en los comandos (variables de la shell) no se modifican. Cada
+objetivo guarda sus resultados en `targets/<objetivo>/` y el resumen comparativo
+de todos ellos se escribe en `matrix.json`, con el estado de cada técnica en cada
+objetivo, identificada por el nombre de su paso y su identificador (por ejemplo,
+`Reconocimiento / T1046`; véase metrics.technique_statuses).
+"""
+
+import copy
+import datetime
+import logging
+import os
+import re
+import string
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from batch import run_and_summarize, summarize_entries
+from journal import write_results
+from metrics import merge_latencies
+
+logger = logging.getLogger('run_scenario.matrix')
+
+MATRIX_FILE = "matrix.json"
+TARGETS_DIR = "targets"
+
+# Clave del plan expandido con el objetivo de la matriz, que usan por defecto los
+# pasos y técnicas que no indican su objetivo
+MATRIX_TARGET_KEY = "matrix_target"
+
+
+class TargetTemplate(string.Template):
+    """Plantilla que solo sustituye las variables ${target...} entre llaves."""
+
+    pattern = r"""
+    \$(?:
+      (?P<escaped>(?!))                       |
+      (?P<named>(?!))                         |
+      {(?P<braced>target(?:_[a-z0-9_]+)?)}    |
+      (?P<invalid>(?!))
+    )
+    """
+
+
+def target_variables(target: Dict[str, Any], index: int) -> Dict[str, str]:
+    """
+    Obtiene las variables de plantilla de un objetivo.
+
+    Args:
+        target: Objetivo del escenario
+        index: Posición del objetivo en la lista de objetivos
+
+    Returns:
+        Diccionario nombre de variable -> valor
+    """
+    variables = {
+        f"target_{key}": str(value)
+        for key, value in target.items()
+        if isinstance(value, (str, int, float, bool)) and re.fullmatch(r"[a-z0-9_]+", str(key))
+    }
+    variables.update({
+        "target": str(target.get("value", "")),
+        "target_type": str(target.get("type", "")),
+        "target_name": str(target.get("name") or target.get("value", "")),
+        "target_index": str(index)
+    })
+    return variables
+
+
+def _substitute(value: Any, variables: Dict[str, str], where: str) -> Any:
+    """Sustituye las variables en una cadena o en una lista de argumentos."""
+    if isinstance(value, str):
+        try:
+            return TargetTemplate(value).substitute(variables)
+        except KeyError as e:
+            raise ValueError(f"{where}: variable de objetivo desconocida {e}") from None
+    if isinstance(value, list):
+        return [_substitute(item, variables, where) for item in value]
+    return value
+
+
+def expand_for_target(plan: Dict[str, Any], target: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """
+    Crea la copia del plan de un escenario para un objetivo.
+
+    Args:
+        plan: Plan compilado del escenario
+        target: Objetivo para el que se instancia el escenario
+        index: Posición del objetivo en la lista de objetivos
+
+    Returns:
+        Plan con las variables del objetivo sustituidas, solo ese objetivo en `targets`
+        y su valor en `matrix_target`
+
+    Raises:
+        ValueError: Si un comando usa una variable que el objetivo no define
+    """
+    variables = target_variables(target, index)
+    expanded = copy.deepcopy(plan)
+    expanded["targets"] = [copy.deepcopy(target)]
+    expanded[MATRIX_TARGET_KEY] = str(target.get("value", ""))
+    for i, step in enumerate(expanded.get("steps", [])):
+        if "target" in step:
+            step["target"] = _substitute(step["target"], variables, f"steps[{i}].target")
+        for j, technique in enumerate(step.get("techniques", [])):
+            where = f"steps[{i}].techniques[{j}]"
+            if "target" in technique:
+                technique["target"] = _substitute(technique["target"], variables, f"{where}.target")
+            technique["commands"] = [
+                _substitute(command, variables, f"{where}.commands[{k}]")
+                for k, command in enumerate(technique.get("commands", []))
+            ]
+    return expanded
+
+
+def _target_slug(target: Dict[str, Any], used: Dict[str, int]) -> str:
+    """Nombre de directorio único y seguro para un objetivo."""
+    name = str(target.get("name") or target.get("value") or "target")
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._") or "target"
+    count = used.get(slug, 0)
+    used[slug] = count + 1
+    return slug if not count else f"{slug}_{count + 1}"
+
+
+class MatrixRunner:
+    """Ejecuta un escenario sobre cada uno de sus objetivos y compara los resultados."""
+
+    def __init__(self, scenario_file: str, plan: Dict[str, Any], output_dir: str,
+                 runner_factory: Callable[[Dict[str, Any], str], Any], max_targets: int = 4):
+        """
+        Inicializa el ejecutor en modo matriz.
+
+        Args:
+            scenario_file: Archivo del escenario
+            plan: Plan compilado del escenario
+            output_dir: Directorio de resultados; cada objetivo usa targets/<objetivo>/
+            runner_factory: Función (plan del objetivo, directorio de salida) -> ScenarioRunner
+            max_targets: Número máximo de objetivos ejecutándose en paralelo
+        """
+        self.scenario_file = scenario_file
+        self.plan = plan
+        self.output_dir = output_dir
+        self.runner_factory = runner_factory
+        self.max_targets = max(1, max_targets)
+
+    def expand(self) -> List[Tuple[Dict[str, Any], Dict[str, Any], str]]:
+        """
+        Instancia el escenario para cada objetivo.
+
+        Returns:
+            Lista de tuplas (objetivo, plan del objetivo, directorio de salida)
+
+        Raises:
+            ValueError: Si el escenario no declara objetivos o alguna plantilla no es válida
+        """
+        targets = self.plan.get("targets", [])
+        if not targets:
+            raise ValueError("el escenario no declara objetivos")
+        used: Dict[str, int] = {}
+        return [
+            (target, expand_for_target(self.plan, target, i),
+             os.path.join(self.output_dir, TARGETS_DIR, _target_slug(target, used)))
+            for i, target in enumerate(targets)
+        ]
+
+    def run(self) -> bool:
+        """
+        Ejecuta el escenario sobre todos los objetivos.
+
+        Returns:
+            True si la ejecución se completó correctamente en todos los objetivos
+        """
+        try:
+            jobs = self.expand()
+        except ValueError as e:
+            logger.error(f"No se puede ejecutar {self.scenario_file} en modo matriz: {e}")
+            return False
+
+        logger.info(f"Ejecutando {self.plan.get('name', 'Unknown')} sobre {len(jobs)} objetivos "
+                    f"({self.max_targets} en paralelo)")
+        os.makedirs(self.output_dir, exist_ok=True)
+        summary = {
+            "scenario": self.plan.get("name", "Unknown"),
+            "scenario_file": self.scenario_file,
+            "start_time": datetime.datetime.now().isoformat(),
+            "end_time": "",
+            "status": "running",
+            "targets": []
+        }
+
+        def run_target(job: Tuple[Dict[str, Any], Dict[str, Any], str]) -> Tuple[Dict[str, Any], Dict[str, List[float]], Dict[str, str]]:
+            target, plan, output_dir = job
+            entry = {
+                "target": target.get("value", ""),
+                "type": target.get("type", ""),
+                "output_dir": output_dir
+            }
+            return run_and_summarize(lambda: self.runner_factory(plan, output_dir), entry,
+                                     f"{self.scenario_file} ({entry['target']})")
+
+        with ThreadPoolExecutor(max_workers=self.max_targets) as pool:
+            outcomes = list(pool.map(run_target, jobs))
+        summary["targets"] = [entry for entry, _, _ in outcomes]
+
+        # Estado de cada técnica en cada objetivo
+        techniques: Dict[str, Dict[str, str]] = {}
+        for entry, _, statuses in outcomes:
+            for technique_id, status in statuses.items():
+                techniques.setdefault(technique_id, {})[str(entry["target"])] = status
+
+        success = all(entry["status"] == "completed" for entry in summary["targets"])
+        summary["status"] = "completed" if success else "failed"
+        summary["end_time"] = datetime.datetime.now().isoformat()
+        summary["summary"] = summarize_entries(summary["targets"], "targets")
+        summary["techniques"] = techniques
+        summary["latency"] = merge_latencies(latencies for _, latencies, _ in outcomes)
+
+        matrix_file = os.path.join(self.output_dir, MATRIX_FILE)
+        write_results(matrix_file, summary)
+        logger.info(f"Matriz finalizada: {summary['summary']['completed']} de {summary['summary']['targets']} "
+                    f"objetivos completados. Resumen: {matrix_file}")
+        return success
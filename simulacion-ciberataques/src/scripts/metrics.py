@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+"""
+Métricas de rendimiento de las ejecuciones de escenarios.
+
+Agrupa las duraciones de las técnicas por identificador MITRE ATT&CK y calcula
+sus percentiles, tanto para una ejecución como para varias ejecuciones repetidas
+(por ejemplo, las de un lote). También suma los recursos consumidos por los
+comandos, lo que permite distinguir si una ejecución lenta se debe al objetivo
+(tiempo real sin consumo de CPU), a las herramientas (tiempo de CPU de los
+comandos) o al propio ejecutor (diferencia con el tiempo total).
+"""
+
+import math
+from typing import Any, Dict, Iterable, List
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """
+    Calcula un percentil por interpolación lineal.
+
+    Args:
+        sorted_values: Valores ordenados de menor a mayor (no vacío)
+        p: Percentil entre 0 y 100
+
+    Returns:
+        Valor del percentil
+    """
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * p / 100.0
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    fraction = rank - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def technique_latencies(results: Dict[str, Any]) -> Dict[str, List[float]]:
+    """
+    Obtiene las duraciones de las técnicas de una ejecución, agrupadas por identificador.
+
+    Args:
+        results: Resultados de la ejecución (con la forma de results.json)
+
+    Returns:
+        Diccionario identificador de técnica -> lista de duraciones en segundos
+    """
+    latencies: Dict[str, List[float]] = {}
+    for step in results.get("steps", []):
+        for technique in step.get("techniques", []):
+            if "wall_seconds" in technique:
+                latencies.setdefault(technique.get("id", "unknown"), []).append(technique["wall_seconds"])
+    return latencies
+
+
+def technique_statuses(results: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Obtiene el estado final de cada técnica de una ejecución.
+
+    Las técnicas se identifican por el nombre de su paso y su identificador (por
+    ejemplo, `Reconocimiento / T1046`), porque un escenario puede repetir
+    identificadores en varios pasos o no indicarlos; si aun así se repiten, se
+    numeran por orden de aparición (`Reconocimiento / T1046 (2)`).
+
+    Args:
+        results: Resultados de la ejecución (con la forma de results.json)
+
+    Returns:
+        Diccionario paso e identificador de técnica -> estado
+    """
+    statuses: Dict[str, str] = {}
+    for step in results.get("steps", []):
+        for technique in step.get("techniques", []):
+            base = f"{step.get('name', '')} / {technique.get('id', 'unknown')}"
+            key = base
+            count = 1
+            while key in statuses:
+                count += 1
+                key = f"{base} ({count})"
+            statuses[key] = technique.get("status", "")
+    return statuses
+
+
+def latency_summary(runs: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    Calcula los percentiles de duración por técnica en una o varias ejecuciones.
+
+    Args:
+        runs: Resultados de las ejecuciones
+
+    Returns:
+        Diccionario identificador de técnica -> {count, min, mean, p50, p90, p95, p99, max}
+    """
+    return merge_latencies(technique_latencies(results) for results in runs)
+
+
+def merge_latencies(runs: Iterable[Dict[str, List[float]]]) -> Dict[str, Dict[str, float]]:
+    """
+    Calcula los percentiles de duración por técnica a partir de las duraciones de
+    varias ejecuciones.
+
+    Permite resumir un lote guardando solo las duraciones de cada ejecución (ver
+    technique_latencies) en lugar de sus resultados completos.
+
+    Args:
+        runs: Duraciones de las técnicas de cada ejecución
+
+    Returns:
+        Diccionario identificador de técnica -> {count, min, mean, p50, p90, p95, p99, max}
+    """
+    latencies: Dict[str, List[float]] = {}
+    for run in runs:
+        for technique_id, values in run.items():
+            latencies.setdefault(technique_id, []).extend(values)
+
+    summary = {}
+    for technique_id, values in sorted(latencies.items()):
+        values = sorted(values)
+        stats = {
+            "count": len(values),
+            "min": round(values[0], 6),
+            "mean": round(sum(values) / len(values), 6)
+        }
+        for p in PERCENTILES:
+            stats[f"p{p}"] = round(percentile(values, p), 6)
+        stats["max"] = round(values[-1], 6)
+        summary[technique_id] = stats
+    return summary
+
+
+def resource_totals(results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Suma los recursos consumidos por los comandos de una ejecución.
+
+    Args:
+        results: Resultados de la ejecución (con la forma de results.json)
+
+    Returns:
+        Diccionario con el número de comandos, el tiempo real y de CPU acumulados,
+        la memoria residente máxima y el número de comandos terminados por una señal
+    """
+    totals = {
+        "commands": 0,
+        "wall_seconds": 0.0,
+        "cpu_user_seconds": 0.0,
+        "cpu_sys_seconds": 0.0,
+        "max_rss_kb": 0,
+        "signaled": 0
+    }
+    for step in results.get("steps", []):
+        for technique in step.get("techniques", []):
+            output = technique.get("output")
+            if not isinstance(output, list):
+                continue
+            for command in output:
+                resources = command.get("resources")
+                if not resources:
+                    continue
+                totals["commands"] += 1
+                totals["wall_seconds"] += resources.get("wall_seconds", 0.0)
+                totals["cpu_user_seconds"] += resources.get("cpu_user_seconds", 0.0)
+                totals["cpu_sys_seconds"] += resources.get("cpu_sys_seconds", 0.0)
+                totals["max_rss_kb"] = max(totals["max_rss_kb"], resources.get("max_rss_kb", 0))
+                if resources.get("signal") is not None:
+                    totals["signaled"] += 1
+    for key in ("wall_seconds", "cpu_user_seconds", "cpu_sys_seconds"):
+        totals[key] = round(totals[key], 6)
+    return totals
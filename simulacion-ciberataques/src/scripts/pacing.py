@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+
+"""
+Políticas de espaciado (pacing) entre técnicas y pasos de un escenario.
+
+Un escenario puede definir cómo se espacian las técnicas y los pasos mediante la
+sección `pacing`, tanto a nivel de escenario como de cada paso:
+
+    pacing:
+      techniques: {policy: jitter, delay: 1, jitter: 0.5}
+      steps: {policy: fixed, delay: 2}
+
+Políticas disponibles:
+    none        Sin espera
+    fixed       Espera fija de `delay` segundos tras cada elemento
+    jitter      Espera aleatoria en [delay - jitter, delay + jitter]
+    rate_limit  Token bucket por objetivo: `rate` ejecuciones por segundo y ráfagas de `burst`
+    until       Espera antes de cada elemento hasta que `command` finalice con código 0,
+                reintentando cada `interval` segundos durante un máximo de `timeout`
+
+Se puede indicar una lista de políticas para combinarlas, y un número como atajo
+de una espera fija. Si la sección del escenario no indica `techniques` o `steps`,
+se mantiene para ese tipo el espaciado por defecto (1 segundo entre técnicas y 2
+entre pasos); para no esperar hay que indicar `policy: none` o `0`.
+"""
+
+import logging
+import random
+import shlex
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('run_scenario.pacing')
+
+CommandRunner = Callable[[List[str]], Tuple[int, str, str]]
+
+# Espaciado histórico del ejecutor: 1 segundo entre técnicas y 2 entre pasos
+DEFAULT_PACING = {
+    "techniques": {"policy": "fixed", "delay": 1},
+    "steps": {"policy": "fixed", "delay": 2}
+}
+
+
+class PacingPolicy:
+    """Política base: no introduce ninguna espera."""
+
+    def before(self, target: str) -> None:
+        """Espera previa a la ejecución de un elemento sobre un objetivo."""
+
+    def after(self, target: str) -> None:
+        """Espera posterior a la ejecución de un elemento sobre un objetivo."""
+
+
+class FixedDelay(PacingPolicy):
+    """Espera fija tras cada elemento."""
+
+    def __init__(self, delay: float):
+        self.delay = max(0.0, float(delay))
+
+    def after(self, target: str) -> None:
+        if self.delay:
+            time.sleep(self.delay)
+
+
+class JitteredDelay(PacingPolicy):
+    """Espera aleatoria uniforme alrededor de un valor central."""
+
+    def __init__(self, delay: float, jitter: float):
+        self.delay = max(0.0, float(delay))
+        self.jitter = max(0.0, float(jitter))
+
+    def after(self, target: str) -> None:
+        delay = max(0.0, random.uniform(self.delay - self.jitter, self.delay + self.jitter))
+        if delay:
+            time.sleep(delay)
+
+
+class TokenBucket(PacingPolicy):
+    """Limita la frecuencia de ejecución por objetivo con un token bucket."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if float(rate) <= 0:
+            raise ValueError("La política rate_limit requiere un valor 'rate' positivo")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, List[float]] = {}
+
+    def before(self, target: str) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, updated = self._buckets.get(target, [float(self.burst), now])
+                tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+                if tokens >= 1:
+                    self._buckets[target] = [tokens - 1, now]
+                    return
+                self._buckets[target] = [tokens, now]
+                wait_time = (1 - tokens) / self.rate
+            time.sleep(wait_time)
+
+
+class WaitUntil(PacingPolicy):
+    """Espera hasta que un comando de sondeo finalice correctamente."""
+
+    def __init__(self, command: Any, run_command: CommandRunner, interval: float = 1.0, timeout: float = 60.0):
+        if not command:
+            raise ValueError("La política until requiere un comando 'command'")
+        if isinstance(command, str):
+            # Igual que los comandos de las técnicas, respetando las comillas
+            try:
+                self.command = shlex.split(command)
+            except ValueError as e:
+                raise ValueError(f"No se puede dividir el comando de la política until ({e})")
+        else:
+            self.command = [str(c) for c in command]
+        self.run_command = run_command
+        self.interval = max(0.0, float(interval))
+        self.timeout = max(0.0, float(timeout))
+
+    def before(self, target: str) -> None:
+        command = [part.replace("{target}", target) for part in self.command]
+        deadline = time.monotonic() + self.timeout
+        while True:
+            returncode, _, _ = self.run_command(command)
+            if returncode == 0:
+                return
+            if time.monotonic() + self.interval > deadline:
+                logger.warning(f"La condición de espera no se cumplió en {self.timeout}s: {' '.join(command)}")
+                return
+            time.sleep(self.interval)
+
+
+class CompositePolicy(PacingPolicy):
+    """Aplica varias políticas en orden."""
+
+    def __init__(self, policies: List[PacingPolicy]):
+        self.policies = policies
+
+    def before(self, target: str) -> None:
+        for policy in self.policies:
+            policy.before(target)
+
+    def after(self, target: str) -> None:
+        for policy in self.policies:
+            policy.after(target)
+
+
+def build_policy(spec: Any, run_command: CommandRunner) -> PacingPolicy:
+    """
+    Construye una política de espaciado a partir de su definición en el escenario.
+
+    Args:
+        spec: Definición de la política (diccionario, lista, número o None)
+        run_command: Función para ejecutar los comandos de sondeo
+
+    Returns:
+        Política de espaciado
+
+    Raises:
+        ValueError: Si la definición no es válida
+    """
+    if spec is None:
+        return PacingPolicy()
+    if isinstance(spec, (int, float)):
+        return FixedDelay(spec)
+    if isinstance(spec, list):
+        return CompositePolicy([build_policy(item, run_command) for item in spec])
+    if not isinstance(spec, dict):
+        raise ValueError(f"Definición de pacing no válida: {spec!r}")
+
+    policy = spec.get("policy", "fixed")
+    if policy == "none":
+        return PacingPolicy()
+    if policy == "fixed":
+        return FixedDelay(spec.get("delay", 0))
+    if policy == "jitter":
+        return JitteredDelay(spec.get("delay", 0), spec.get("jitter", 0))
+    if policy == "rate_limit":
+        return TokenBucket(spec.get("rate", 0), spec.get("burst", 1))
+    if policy == "until":
+        return WaitUntil(spec.get("command"), run_command, spec.get("interval", 1), spec.get("timeout", 60))
+    raise ValueError(f"Política de pacing desconocida: {policy}")
+
+
+class Pacer:
+    """Aplica las políticas de espaciado del escenario y contabiliza el tiempo de espera."""
+
+    def __init__(self, scenario_pacing: Optional[Dict[str, Any]], run_command: CommandRunner, enabled: bool = True):
+        """
+        Inicializa el planificador de espaciado.
+
+        Args:
+            scenario_pacing: Sección `pacing` del escenario (None para el espaciado por
+                defecto); los tipos que no indica usan también el de por defecto
+            run_command: Función para ejecutar los comandos de sondeo
+            enabled: Si es False no se aplica ninguna espera
+        """
+        self.enabled = enabled
+        self.run_command = run_command
+        pacing = dict(DEFAULT_PACING, **(scenario_pacing or {}))
+        self._technique_policy = self._build(pacing["techniques"])
+        self._step_policy = self._build(pacing["steps"])
+        self._step_overrides: Dict[int, Dict[str, PacingPolicy]] = {}
+        self._lock = threading.Lock()
+        self.pacing_seconds = 0.0
+
+    def _build(self, spec: Any) -> PacingPolicy:
+        """Construye una política, o una política vacía si el espaciado está desactivado."""
+        if not self.enabled:
+            return PacingPolicy()
+        return build_policy(spec, self.run_command)
+
+    def configure_step(self, step_index: int, step_pacing: Optional[Dict[str, Any]]) -> None:
+        """
+        Registra las políticas propias de un paso, que sustituyen a las del escenario.
+
+        Args:
+            step_index: Índice del paso en el escenario
+            step_pacing: Sección `pacing` del paso
+        """
+        if not step_pacing:
+            return
+        overrides = {}
+        for kind in ("techniques", "steps"):
+            if kind in step_pacing:
+                overrides[kind] = self._build(step_pacing[kind])
+        self._step_overrides[step_index] = overrides
+
+    def _policy(self, kind: str, step_index: int) -> PacingPolicy:
+        """Obtiene la política aplicable a técnicas o pasos de un paso concreto."""
+        default = self._technique_policy if kind == "techniques" else self._step_policy
+        return self._step_overrides.get(step_index, {}).get(kind, default)
+
+    def _timed(self, action: Callable[[str], None], target: str) -> None:
+        """Ejecuta una espera y acumula su duración."""
+        start = time.monotonic()
+        action(target)
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self.pacing_seconds += elapsed
+
+    def before_technique(self, step_index: int, target: str) -> None:
+        """Aplica la espera previa a una técnica del paso indicado."""
+        self._timed(self._policy("techniques", step_index).before, target)
+
+    def after_technique(self, step_index: int, target: str) -> None:
+        """Aplica la espera posterior a una técnica del paso indicado."""
+        self._timed(self._policy("techniques", step_index).after, target)
+
+    def before_step(self, step_index: int, target: str) -> None:
+        """Aplica la espera previa al inicio de un paso."""
+        self._timed(self._policy("steps", step_index).before, target)
+
+    def after_step(self, step_index: int, target: str) -> None:
+        """Aplica la espera posterior al cierre de un paso."""
+        self._timed(self._policy("steps", step_index).after, target)
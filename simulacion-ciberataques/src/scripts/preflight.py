@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+"""
+Verificaciones previas a la ejecución de un escenario.
+
+Comprueba los prerrequisitos y el estado de los objetivos de forma concurrente
+sobre un pool de hilos acotado. Los comandos requeridos se buscan en el PATH sin
+lanzar procesos, los contenedores Docker se consultan con una única llamada a
+`docker ps` y el estado de los objetivos se guarda en una caché con un tiempo de
+validez corto que se comparte entre ejecuciones.
+"""
+
+import importlib.util
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from cache_paths import user_cache_dir
+
+logger = logging.getLogger('run_scenario.preflight')
+
+CommandRunner = Callable[[List[str]], Tuple[int, str, str]]
+
+DEFAULT_CACHE_FILE = user_cache_dir("probes.json")
+
+
+class ProbeCache:
+    """Caché en disco del estado de los objetivos, con tiempo de validez."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_FILE, ttl: float = 60.0):
+        """
+        Inicializa la caché.
+
+        Args:
+            path: Archivo JSON de la caché
+            ttl: Segundos durante los que un resultado se considera válido (0 la desactiva)
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        if ttl > 0:
+            try:
+                with open(path, 'r') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+
+    def get(self, key: str) -> Optional[bool]:
+        """Obtiene el estado guardado de un objetivo si sigue siendo válido."""
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and time.time() - entry.get("ts", 0) < self.ttl:
+            return bool(entry.get("ok"))
+        return None
+
+    def put(self, key: str, ok: bool) -> None:
+        """Guarda el estado de un objetivo."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = {"ok": ok, "ts": time.time()}
+            self._dirty = True
+
+    def save(self) -> None:
+        """Escribe la caché en disco, descartando las entradas caducadas."""
+        if self.ttl <= 0 or not self._dirty:
+            return
+        now = time.time()
+        with self._lock:
+            entries = {k: v for k, v in self._entries.items() if now - v.get("ts", 0) < self.ttl}
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.debug(f"No se pudo guardar la caché de sondeos: {e}")
+
+
+def check_prerequisite(prereq_type: str, prereq_value: str) -> Optional[str]:
+    """
+    Comprueba un prerrequisito sin lanzar procesos.
+
+    Args:
+        prereq_type: Tipo de prerrequisito (command, file, directory, environment, python_module)
+        prereq_value: Valor a comprobar
+
+    Returns:
+        Mensaje de error si el prerrequisito no se cumple, None en caso contrario
+    """
+    if prereq_type == "command":
+        if shutil.which(prereq_value) is None:
+            return f"comando '{prereq_value}' no encontrado"
+    elif prereq_type == "file":
+        if not os.path.exists(prereq_value):
+            return f"archivo '{prereq_value}' no encontrado"
+    elif prereq_type == "directory":
+        if not os.path.isdir(prereq_value):
+            return f"directorio '{prereq_value}' no encontrado"
+    elif prereq_type == "environment":
+        if prereq_value not in os.environ:
+            return f"variable de entorno '{prereq_value}' no definida"
+    elif prereq_type == "python_module":
+        try:
+            found = importlib.util.find_spec(prereq_value) is not None
+        except (ImportError, ValueError):
+            found = False
+        if not found:
+            return f"módulo Python '{prereq_value}' no instalado"
+    return None
+
+
+class Preflight:
+    """Ejecuta las verificaciones previas de un escenario de forma concurrente."""
+
+    def __init__(self, run_command: CommandRunner, max_workers: int = 8, cache: Optional[ProbeCache] = None):
+        """
+        Inicializa las verificaciones previas.
+
+        Args:
+            run_command: Función para ejecutar los comandos de sondeo
+            max_workers: Número máximo de comprobaciones simultáneas
+            cache: Caché de estado de objetivos (None para no usarla)
+        """
+        self.run_command = run_command
+        self.max_workers = max(1, max_workers)
+        self.cache = cache
+
+    def check_prerequisites(self, prerequisites: List[Dict[str, Any]]) -> List[str]:
+        """
+        Comprueba todos los prerrequisitos.
+
+        Args:
+            prerequisites: Lista de prerrequisitos del escenario
+
+        Returns:
+            Lista de mensajes de los prerrequisitos no cumplidos
+        """
+        checks = [
+            (p.get("type", ""), p.get("value", ""))
+            for p in prerequisites
+            if p.get("type", "") and p.get("value", "")
+        ]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            errors = pool.map(lambda check: check_prerequisite(*check), checks)
+            return [error for error in errors if error]
+
+    def _running_containers(self) -> Set[str]:
+        """Obtiene los nombres de los contenedores en ejecución con una sola llamada a docker."""
+        returncode, stdout, _ = self.run_command(["docker", "ps", "--format", "{{.Names}}"])
+        if returncode != 0:
+            return set()
+        return {line.strip() for line in stdout.splitlines() if line.strip()}
+
+    def _probe(self, target_type: str, target_value: str, containers: Optional[Set[str]]) -> bool:
+        """Comprueba si un objetivo está disponible."""
+        if target_type == "ip":
+            returncode, _, _ = self.run_command(["ping", "-c", "1", target_value])
+            return returncode == 0
+        if target_type == "docker":
+            # Igual que el filtro name= de docker ps, se admiten coincidencias parciales
+            return any(target_value in name for name in containers or ())
+        if target_type == "vm":
+            _, stdout, _ = self.run_command(["vagrant", "status", target_value])
+            return "running" in stdout.lower()
+        return True
+
+    def probe_targets(self, targets: List[Dict[str, Any]]) -> Dict[Tuple[str, str], bool]:
+        """
+        Comprueba el estado de todos los objetivos.
+
+        Args:
+            targets: Lista de objetivos del escenario
+
+        Returns:
+            Diccionario (tipo, valor) -> disponible
+        """
+        pending = []
+        status: Dict[Tuple[str, str], bool] = {}
+        for target in targets:
+            key = (target.get("type", ""), target.get("value", ""))
+            if not key[0] or not key[1] or key in status:
+                continue
+            cached = self.cache.get(f"{key[0]}:{key[1]}") if self.cache else None
+            if cached is not None:
+                logger.debug(f"Estado del objetivo {key[0]} - {key[1]} obtenido de la caché")
+                status[key] = cached
+            else:
+                status[key] = False
+                pending.append(key)
+
+        containers = None
+        if any(target_type == "docker" for target_type, _ in pending):
+            containers = self._running_containers()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = pool.map(lambda key: self._probe(key[0], key[1], containers), pending)
+            for key, ok in zip(pending, results):
+                status[key] = ok
+                if self.cache:
+                    self.cache.put(f"{key[0]}:{key[1]}", ok)
+
+        if self.cache:
+            self.cache.save()
+        return status
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+"""
+Grabación y reproducción de los comandos de una ejecución.
+
+Con `--record ARCHIVO`, cada comando ejecutado (técnicas, sondeos de objetivos y
+esperas condicionales) se guarda en un archivo de grabación JSON Lines con su
+código de salida, su salida completa (aunque en los resultados se trunque), su
+duración y los recursos consumidos. Con
+`--replay ARCHIVO`, los comandos no se ejecutan: se devuelven los resultados
+grabados, opcionalmente con el tiempo comprimido (`--time-scale`), de forma que se
+puede ejecutar un escenario completo, con su diario y sus resultados, sin tocar
+ninguna máquina virtual. Sirve para probar informes y para medir el coste del
+propio ejecutor y del planificador.
+
+Los comandos se identifican por su lista de argumentos antes de aplicar el
+transporte del objetivo. Si un mismo comando se grabó varias veces, las
+reproducciones devuelven las grabaciones en orden y después repiten la última.
+"""
+
+import gzip
+import itertools
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Dict, IO, List, Optional
+
+from capture import OutputCapture
+from command_backend import CommandResult, LineCallback
+
+logger = logging.getLogger('run_scenario.replay')
+
+# Código de salida de los comandos que no están en la grabación, como el de un comando no encontrado
+MISSING_RETURNCODE = 127
+
+
+def _key(command: List[str]) -> str:
+    """Clave con la que se identifica un comando en la grabación."""
+    return json.dumps(list(command), ensure_ascii=False)
+
+
+class FixtureWriter:
+    """Escritor de un archivo de grabación, compartido por todos los ejecutores de una sesión."""
+
+    def __init__(self, path: str):
+        """
+        Inicializa el escritor; el archivo se sobrescribe al grabar el primer comando.
+
+        Args:
+            path: Archivo de grabación (JSON Lines)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file: Optional[IO[str]] = None
+        self._append = False
+
+    def write(self, command: List[str], cwd: Optional[str], result: CommandResult,
+              streams: Optional[Dict[str, str]] = None) -> None:
+        """
+        Añade un comando y su resultado a la grabación.
+
+        Args:
+            command: Comando con el que se identifica la grabación
+            cwd: Directorio de trabajo del comando
+            result: Resultado del comando
+            streams: Salida completa de cada flujo (stdout, stderr), si la del resultado
+                puede estar truncada
+        """
+        streams = streams or {}
+        record = {
+            "command": list(command),
+            "cwd": cwd,
+            "returncode": result.returncode,
+            "stdout": streams.get("stdout", result.stdout),
+            "stderr": streams.get("stderr", result.stderr),
+            "timed_out": result.timed_out,
+            "resources": result.resources()
+        }
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, 'a' if self._append else 'w', encoding='utf-8')
+                self._append = True
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        """Cierra el archivo de grabación."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class Fixture:
+    """Grabación cargada en memoria, compartida por todos los ejecutores de una sesión."""
+
+    def __init__(self, path: str):
+        """
+        Carga una grabación.
+
+        Args:
+            path: Archivo de grabación (JSON Lines)
+
+        Raises:
+            OSError: Si no se puede leer el archivo
+        """
+        self.path = path
+        self._records: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        with open(path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Línea {number} de la grabación no válida; se ignora")
+                    continue
+                self._records.setdefault(_key(record.get("command", [])), []).append(record)
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self._records.values())
+
+    def next(self, command: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene la siguiente grabación de un comando.
+
+        Returns:
+            Grabación del comando, o None si el comando no se grabó
+        """
+        key = _key(command)
+        with self._lock:
+            records = self._records.get(key)
+            if not records:
+                return None
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            return records[min(cursor, len(records) - 1)]
+
+
+def _full_text(capture: OutputCapture) -> str:
+    """Devuelve el flujo completo de una captura, leyéndolo de su volcado si se ha truncado."""
+    if not capture.truncated:
+        return capture.text()
+    with gzip.open(capture.spill_path, 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+class RecordingBackend:
+    """Backend que ejecuta los comandos con otro backend y graba sus resultados."""
+
+    def __init__(self, backend: Any, writer: FixtureWriter):
+        """
+        Inicializa el backend.
+
+        Args:
+            backend: Backend que ejecuta realmente los comandos
+            writer: Escritor de la grabación
+        """
+        self.backend = backend
+        self.writer = writer
+        # La salida que supera el límite de memoria se vuelca aquí hasta grabarla
+        self._spill_dir = tempfile.mkdtemp(prefix="simcib-record-")
+        self._sequence = itertools.count()
+
+    def run(self, command: List[str], cwd: Optional[str] = None, timeout: Optional[float] = None,
+            on_line: Optional[LineCallback] = None, captures: Optional[Dict[str, OutputCapture]] = None,
+            key: Optional[List[str]] = None) -> CommandResult:
+        """
+        Ejecuta un comando y graba su resultado con la clave indicada (por defecto, el propio comando).
+
+        La salida se graba completa aunque la del resultado se trunque: cada línea se
+        copia también a una captura propia que vuelca el flujo a un archivo temporal.
+        """
+        number = next(self._sequence)
+        recorded = {
+            name: OutputCapture(spill_path=os.path.join(self._spill_dir, f"{number}.{name}.gz"))
+            for name in ("stdout", "stderr")
+        }
+
+        def tee(name: str, line: str) -> None:
+            recorded[name].write(line)
+            if on_line:
+                on_line(name, line)
+
+        try:
+            try:
+                result = self.backend.run(command, cwd=cwd, timeout=timeout, on_line=tee, captures=captures)
+            except Exception as e:
+                # Un comando que no se puede lanzar se reproduce como un fallo con el mismo mensaje
+                self.writer.write(key or command, cwd, CommandResult(-1, "", str(e)))
+                raise
+            for capture in recorded.values():
+                capture.close()
+            self.writer.write(key or command, cwd, result,
+                              {name: _full_text(capture) for name, capture in recorded.items()})
+            return result
+        finally:
+            for capture in recorded.values():
+                capture.close()
+                if capture.truncated and os.path.exists(capture.spill_path):
+                    os.unlink(capture.spill_path)
+
+    def cancel_all(self) -> None:
+        """Detiene todos los procesos en curso."""
+        self.backend.cancel_all()
+
+    def close(self) -> None:
+        """Cierra el backend subyacente; la grabación se vuelca a disco con cada comando."""
+        self.backend.close()
+        shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+
+class ReplayBackend:
+    """Backend que reproduce los resultados grabados sin ejecutar ningún proceso."""
+
+    def __init__(self, fixture: Fixture, time_scale: float = 1.0):
+        """
+        Inicializa el backend.
+
+        Args:
+            fixture: Grabación a reproducir
+            time_scale: Factor aplicado a la duración grabada de cada comando
+                (1 reproduce el tiempo real, 0.1 es diez veces más rápido, 0 no espera)
+        """
+        self.fixture = fixture
+        self.time_scale = max(0.0, time_scale)
+        self._cancelled = threading.Event()
+
+    def run(self, command: List[str], cwd: Optional[str] = None, timeout: Optional[float] = None,
+            on_line: Optional[LineCallback] = None, captures: Optional[Dict[str, OutputCapture]] = None,
+            key: Optional[List[str]] = None) -> CommandResult:
+        """Devuelve el resultado grabado de un comando, respetando su duración escalada."""
+        start = time.monotonic()
+        captures = dict(captures or {})
+        for name in ("stdout", "stderr"):
+            captures.setdefault(name, OutputCapture(limit=0))
+
+        record = self.fixture.next(key or command)
+        if record is None:
+            logger.warning(f"Comando no grabado: {' '.join(key or command)}")
+            record = {
+                "returncode": MISSING_RETURNCODE,
+                "stdout": "",
+                "stderr": f"[REPLAY] Comando no grabado: {' '.join(key or command)}\n",
+                "resources": {}
+            }
+
+        resources = record.get("resources", {})
+        delay = resources.get("wall_seconds", 0.0) * self.time_scale
+        if delay > 0:
+            self._cancelled.wait(delay)
+
+        try:
+            for name in ("stdout", "stderr"):
+                for line in record.get(name, "").splitlines(keepends=True):
+                    captures[name].write(line)
+                    if on_line:
+                        on_line(name, line)
+        finally:
+            for capture in captures.values():
+                capture.close()
+
+        returncode = record.get("returncode", 0)
+        return CommandResult(
+            returncode,
+            captures["stdout"].text(),
+            captures["stderr"].text(),
+            record.get("timed_out", False),
+            wall_seconds=time.monotonic() - start,
+            user_seconds=resources.get("cpu_user_seconds", 0.0),
+            sys_seconds=resources.get("cpu_sys_seconds", 0.0),
+            max_rss_kb=resources.get("max_rss_kb", 0),
+            exit_signal=resources.get("signal"),
+            spills={name: capture.spill_info() for name, capture in captures.items() if capture.spill_info()}
+        )
+
+    def cancel_all(self) -> None:
+        """Interrumpe las esperas en curso."""
+        self._cancelled.set()
+
+    def close(self) -> None:
+        """No hay procesos ni conexiones que cerrar."""
@@ -7,6 +7,12 @@ Script para ejecutar un escenario de simulación de ciberataques.
 Este script ejecuta un escenario de simulación de ciberataques definido en un archivo YAML,
 siguiendo las técnicas y pasos especificados en el marco MITRE ATT&CK.
 
+Los pasos y las técnicas pueden declarar dependencias mediante el campo
+`depends_on` (identificador o nombre, o una lista de ellos). Los nodos sin
+`depends_on` dependen implícitamente del elemento anterior, por lo que los
+escenarios existentes se siguen ejecutando en orden. Un `depends_on: []`
+explícito permite ejecutar el elemento en paralelo con los demás.
+
 Uso:
     python run_scenario.py --scenario <archivo_escenario>
     
@@ -15,20 +21,97 @@ Opciones:
     --verbose            Mostrar información detallada durante la ejecución
     --dry-run            Mostrar acciones sin ejecutarlas
     --output DIRECTORIO  Directorio para guardar los resultados
+    --max-workers N      Número máximo de técnicas ejecutándose en paralelo
+    --pacing MODO        Espaciado entre técnicas y pasos: auto (por defecto; sin
+                         esperas en dry-run o si la variable CI está definida),
+                         scenario (políticas del escenario) o none (sin esperas)
+    --command-timeout S  Tiempo máximo por comando en segundos. El escenario puede
+                         definir `command_timeout` y cada técnica su propio `timeout`
+    --compact DIRECTORIO Reconstruir results.json a partir del diario journal.jsonl
+                         de una ejecución interrumpida
+    --probe-workers N    Número máximo de comprobaciones previas simultáneas
+    --probe-ttl S        Segundos de validez de la caché de estado de objetivos
+                         (0 para desactivarla)
+    --resume DIRECTORIO  Reanudar una ejecución interrumpida a partir de su punto de
+                         control (checkpoint.jsonl). Se omiten los prerrequisitos ya
+                         verificados y las técnicas completadas con éxito cuya
+                         definición no ha cambiado
+    --batch PATRÓN       Ejecutar todos los escenarios de un directorio o patrón glob
+                         (por ejemplo, "escenarios/*.yaml"); cada escenario guarda sus
+                         resultados en un subdirectorio de --output y se genera un
+                         índice index.json con el resumen del lote
+    --max-scenarios N    Número máximo de escenarios ejecutándose en paralelo en un lote
+    --target-concurrency N
+                         Número máximo de escenarios del lote que actúan a la vez
+                         sobre un mismo objetivo
+    --no-plan-cache      No usar la caché de escenarios compilados
+    --output-limit N     Caracteres de cada salida de comando que se guardan en los
+                         resultados (principio y final). Si una salida lo supera, se
+                         guarda completa en outputs/ comprimida con gzip y se
+                         referencia por su ruta y hash SHA-256 (0 para no limitar)
+    --matrix             Ejecutar el escenario sobre cada uno de sus objetivos en
+                         paralelo. Los comandos pueden usar variables ${target},
+                         ${target_type}, ${target_name}, ${target_index} y
+                         ${target_<campo>} (véase matrix.py). Cada objetivo guarda sus
+                         resultados en targets/<objetivo>/ y el resumen comparativo
+                         se escribe en matrix.json
+    --max-targets N      Número máximo de objetivos ejecutándose en paralelo en modo matriz
+    --record ARCHIVO     Grabar los comandos ejecutados, con su salida, su código de
+                         salida y su duración, en un archivo JSON Lines
+    --replay ARCHIVO     Reproducir una grabación en lugar de ejecutar los comandos;
+                         los resultados y el diario se generan como en una ejecución real
+    --time-scale F       Factor aplicado a la duración de los comandos reproducidos
+                         (1 por defecto; 0.1 es diez veces más rápido, 0 no espera)
+    --repeat N           Ejecutar el escenario N veces como un lote; el índice del lote
+                         incluye los percentiles de duración de cada técnica
+    --status-addr DIRECCIÓN
+                         Publicar el estado en vivo de la ejecución en un servidor HTTP
+                         local (host:puerto o unix:/ruta): /status en JSON y /metrics
+                         en formato Prometheus (véase status.py)
+
+El escenario se valida y compila antes de ejecutarse; los escenarios mal formados
+se rechazan sin tocar ningún objetivo. El plan compilado se guarda en una caché
+indexada por el hash del archivo, por lo que las ejecuciones repetidas no vuelven
+a analizar el YAML.
+
+Los objetivos pueden declarar un campo `transport` (local, ssh o vagrant) para
+ejecutar los comandos de sus técnicas a través de una conexión SSH persistente
+que se reutiliza durante toda la ejecución (véase transports.py).
+
+Durante la ejecución se registra cada evento en `journal.jsonl` dentro del
+directorio de resultados; `results.json` se escribe al finalizar.
 """
 
 import argparse
+import atexit
+import contextlib
 import datetime
-import json
+import functools
 import logging
 import os
-import subprocess
+import shlex
 import sys
+import threading
 import time
 import yaml
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 
+from batch import BatchRunner, TargetPool, resolve_scenarios
+from capture import DEFAULT_OUTPUT_LIMIT, OutputCapture
+from matrix import MATRIX_TARGET_KEY, MatrixRunner
+from checkpoint import RunCheckpoint, fingerprint
+from command_backend import AsyncCommandBackend, CommandResult
+from journal import JOURNAL_FILE, RESULTS_FILE, ResultsJournal, compact_journal, write_results
+from metrics import latency_summary, resource_totals
+from pacing import Pacer
+from preflight import Preflight, ProbeCache
+from replay import Fixture, FixtureWriter, RecordingBackend, ReplayBackend
+from scenario_plan import PlanCache, ScenarioValidationError, load_plan, resolve_dependencies
+from scheduler import DagScheduler, DependencyError, STATUS_SKIPPED
+from status import RunStatus, StatusServer
+from transports import TransportError, TransportPool
+
 # Configuración del logger
 logging.basicConfig(
     level=logging.INFO,
@@ -39,10 +122,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger('run_scenario')
 
+# Tamaño aproximado de los fragmentos de salida registrados en el diario
+JOURNAL_CHUNK_SIZE = 64 * 1024
+
+# Subdirectorio de resultados con la salida completa de los comandos truncados
+OUTPUTS_DIR = "outputs"
+
 class ScenarioRunner:
     """Clase para ejecutar escenarios de simulación de ciberataques."""
     
-    def __init__(self, scenario_file: str, verbose: bool = False, dry_run: bool = False, output_dir: Optional[str] = None):
+    def __init__(self, scenario_file: str, verbose: bool = False, dry_run: bool = False, output_dir: Optional[str] = None,
+                 max_workers: int = 4, pacing: str = "auto", command_timeout: Optional[float] = None,
+                 resume: bool = False, probe_workers: int = 8, probe_ttl: float = 60.0,
+                 target_pool: Optional[TargetPool] = None, plan_cache: bool = True,
+                 output_limit: int = DEFAULT_OUTPUT_LIMIT, plan: Optional[Dict[str, Any]] = None,
+                 record: Optional[FixtureWriter] = None, replay: Optional[Fixture] = None,
+                 time_scale: float = 1.0, status: Optional[RunStatus] = None):
         """
         Inicializa el ejecutor de escenarios.
         
@@ -51,10 +146,35 @@ class ScenarioRunner:
             verbose: Si se debe mostrar información detallada
             dry_run: Si se deben mostrar acciones sin ejecutarlas
             output_dir: Directorio para guardar los resultados
+            max_workers: Número máximo de técnicas ejecutándose en paralelo
+            pacing: Modo de espaciado entre técnicas y pasos (auto, scenario o none)
+            command_timeout: Tiempo máximo por comando en segundos
+            resume: Si se debe reanudar la ejecución registrada en output_dir
+            probe_workers: Número máximo de comprobaciones previas simultáneas
+            probe_ttl: Segundos de validez de la caché de estado de objetivos
+            target_pool: Pool de objetivos compartido con otros escenarios de un lote
+            plan_cache: Si se debe usar la caché de planes compilados
+            output_limit: Caracteres de cada flujo de salida que se conservan en memoria;
+                el resto se vuelca a disco (0 para no limitar)
+            plan: Plan ya compilado del escenario (por ejemplo, la copia de un objetivo
+                en modo matriz); si se indica, no se carga scenario_file
+            record: Grabación en la que se guardan los comandos ejecutados
+            replay: Grabación cuyos resultados se reproducen en lugar de ejecutar los comandos
+            time_scale: Factor aplicado a la duración de los comandos reproducidos
+            status: Estado en vivo en el que se publica el progreso de la ejecución
         """
         self.scenario_file = scenario_file
         self.verbose = verbose
         self.dry_run = dry_run
+        self.max_workers = max(1, max_workers)
+        self.pacing_mode = pacing
+        self.pacer: Optional[Pacer] = None
+        self.command_timeout = command_timeout
+        self.resume = resume
+        self.target_pool = target_pool
+        self.status = status
+        self.plan_cache = PlanCache() if plan_cache else None
+        self.output_limit = max(0, output_limit)
         self.output_dir = output_dir or f"results_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
         self.scenario = {}
         self.results = {
@@ -66,16 +186,47 @@ class ScenarioRunner:
             "steps": []
         }
         
+        # Estado compartido entre los hilos del planificador
+        self._lock = threading.Lock()
+        self._step_start_times: Dict[int, str] = {}
+        self._technique_results: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        self._step_results: Dict[int, Dict[str, Any]] = {}
+        self._execution_seconds = 0.0
+        
         if verbose:
             logger.setLevel(logging.DEBUG)
             
-        self._load_scenario()
+        if plan is not None:
+            self.scenario = plan
+            self.results["scenario"] = plan.get("name", "Unknown")
+        else:
+            self._load_scenario()
+        
+        # El tiempo máximo indicado por línea de comandos prevalece sobre el del escenario
+        if self.command_timeout is None:
+            self.command_timeout = self.scenario.get("command_timeout")
+        self.replay = replay
+        if replay is not None:
+            self.backend = ReplayBackend(replay, time_scale=time_scale)
+        else:
+            # Las técnicas del planificador y las comprobaciones previas pueden ejecutar comandos a la vez
+            self.backend = AsyncCommandBackend(default_timeout=self.command_timeout,
+                                               max_concurrency=self.max_workers + probe_workers)
+            if record is not None:
+                self.backend = RecordingBackend(self.backend, record)
+        self.journal: Optional[ResultsJournal] = None
+        self.checkpoint: Optional[RunCheckpoint] = None
+        
+        # En dry-run y al reproducir no se guarda el estado de objetivos, que no se ha comprobado realmente
+        cache = ProbeCache(ttl=probe_ttl) if not (dry_run or replay) and probe_ttl > 0 else None
+        self.preflight = Preflight(self._run_command, max_workers=probe_workers, cache=cache)
+        # Al reproducir no se abren conexiones: los comandos se identifican sin su transporte
+        self.transports = TransportPool([] if replay else self.scenario.get("targets", []), self._run_command)
         
     def _load_scenario(self) -> None:
-        """Carga el escenario desde el archivo YAML."""
+        """Carga el plan compilado del escenario desde el archivo YAML o la caché."""
         try:
-            with open(self.scenario_file, 'r') as f:
-                self.scenario = yaml.safe_load(f)
+            self.scenario = load_plan(self.scenario_file, self.plan_cache)
             logger.debug(f"Escenario cargado desde {self.scenario_file}")
             
             # Actualizar información básica en resultados
@@ -87,45 +238,121 @@ class ScenarioRunner:
         except yaml.YAMLError as e:
             logger.error(f"Error al parsear el archivo YAML: {e}")
             sys.exit(1)
+        except ScenarioValidationError as e:
+            logger.error(f"El escenario {self.scenario_file} no es válido:")
+            for error in e.errors:
+                logger.error(f"  - {error}")
+            sys.exit(1)
+            
+    def _emit(self, event: str, **fields: Any) -> None:
+        """Registra un evento en el diario de la ejecución, si está activo."""
+        if self.journal is not None:
+            self.journal.emit(event, **fields)
             
-    def _run_command(self, command: List[str], cwd: Optional[str] = None) -> Tuple[int, str, str]:
+    def _run_command(self, command: List[str], cwd: Optional[str] = None,
+                     timeout: Optional[float] = None) -> Tuple[int, str, str]:
         """
         Ejecuta un comando del sistema.
         
         Args:
             command: Lista con el comando y sus argumentos
             cwd: Directorio de trabajo para el comando
+            timeout: Tiempo máximo en segundos (por defecto, el del ejecutor)
             
         Returns:
             Tupla con (código de salida, salida estándar, salida de error)
         """
+        result = self._execute_command(command, cwd=cwd, timeout=timeout)
+        return result.returncode, result.stdout, result.stderr
+        
+    def _spill_paths(self, location: Optional[Tuple[int, int, int]], stream: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Calcula el archivo en el que se vuelca la salida completa de un comando de una técnica.
+        
+        Returns:
+            Tupla con (ruta del archivo, ruta relativa al directorio de resultados), o
+            (None, None) si la salida no se vuelca a disco
+        """
+        if location is None:
+            return None, None
+        name = os.path.join(OUTPUTS_DIR, "step{}_technique{}_command{}.{}.gz".format(*location, stream))
+        return os.path.join(self.output_dir, name), name
+        
+    def _execute_command(self, command: List[str], cwd: Optional[str] = None,
+                         timeout: Optional[float] = None,
+                         location: Optional[Tuple[int, int, int]] = None,
+                         key: Optional[List[str]] = None) -> CommandResult:
+        """
+        Ejecuta un comando del sistema y mide los recursos que consume.
+        
+        Args:
+            command: Lista con el comando y sus argumentos
+            cwd: Directorio de trabajo para el comando
+            timeout: Tiempo máximo en segundos (por defecto, el del ejecutor)
+            location: Índices (paso, técnica, comando) con los que se registra la
+                salida del comando en el diario
+            key: Comando antes de aplicar el transporte del objetivo, con el que se
+                graba y reproduce
+            
+        Returns:
+            Resultado del comando, con su tiempo real, tiempo de CPU y memoria máxima
+        """
         cmd_str = ' '.join(command)
         logger.debug(f"Ejecutando: {cmd_str}")
         
         if self.dry_run:
             logger.info(f"[DRY RUN] Comando: {cmd_str}")
-            return 0, "[DRY RUN] Salida simulada", ""
+            return CommandResult(0, "[DRY RUN] Salida simulada", "")
         
-        try:
-            process = subprocess.Popen(
-                command,
-                cwd=cwd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = process.communicate()
-            
+        captures = {
+            stream: OutputCapture(self.output_limit, *self._spill_paths(location, stream))
+            for stream in ("stdout", "stderr")
+        }
+        journal_output = self.journal is not None and location is not None
+        buffers = {"stdout": [], "stderr": []}
+        buffered = {"stdout": 0, "stderr": 0}
+        
+        def flush_chunk(stream: str) -> None:
+            if buffers[stream]:
+                step_index, technique_index, command_index = location
+                self._emit("command_output_chunk", step_index=step_index, technique_index=technique_index,
+                           command_index=command_index, stream=stream, data="".join(buffers[stream]))
+                buffers[stream] = []
+                buffered[stream] = 0
+                
+        def on_line(stream: str, line: str) -> None:
             if self.verbose:
-                logger.debug(f"Salida: {stdout}")
-                if stderr:
-                    logger.debug(f"Error: {stderr}")
+                if stream == "stdout":
+                    logger.debug(f"Salida: {line.rstrip()}")
+                else:
+                    logger.debug(f"Error: {line.rstrip()}")
+            if journal_output and not captures[stream].truncated:
+                # Las líneas se agrupan en fragmentos para no escribir un evento por línea.
+                # Una salida truncada se registra completa al finalizar el comando
+                buffers[stream].append(line)
+                buffered[stream] += len(line)
+                if buffered[stream] >= JOURNAL_CHUNK_SIZE:
+                    flush_chunk(stream)
                     
-            return process.returncode, stdout, stderr
+        try:
+            result = self.backend.run(command, cwd=cwd, timeout=timeout,
+                                      on_line=on_line if (self.verbose or journal_output) else None,
+                                      captures=captures, key=key)
+            if journal_output:
+                flush_chunk("stdout")
+                flush_chunk("stderr")
+            if result.timed_out:
+                logger.warning(f"Tiempo máximo agotado para el comando: {cmd_str}")
+            elif result.exit_signal is not None:
+                logger.warning(f"Comando terminado por la señal {result.exit_signal}: {cmd_str}")
+            return result
         except Exception as e:
             logger.error(f"Error al ejecutar comando: {cmd_str}")
             logger.error(f"Excepción: {e}")
-            return -1, "", str(e)
+            if journal_output:
+                buffers["stderr"].append(str(e))
+                flush_chunk("stderr")
+            return CommandResult(-1, "", str(e))
             
     def check_prerequisites(self) -> bool:
         """
@@ -141,47 +368,16 @@ class ScenarioRunner:
             logger.info("No se especificaron prerrequisitos para este escenario")
             return True
             
-        all_met = True
-        
-        for prereq in prerequisites:
-            prereq_type = prereq.get("type", "")
-            prereq_value = prereq.get("value", "")
+        errors = self.preflight.check_prerequisites(prerequisites)
+        for error in errors:
+            logger.error(f"Prerrequisito no cumplido: {error}")
             
-            if not prereq_type or not prereq_value:
-                continue
-                
-            logger.debug(f"Verificando prerrequisito: {prereq_type} - {prereq_value}")
-            
-            if prereq_type == "command":
-                returncode, _, _ = self._run_command(["which", prereq_value])
-                if returncode != 0:
-                    logger.error(f"Prerrequisito no cumplido: comando '{prereq_value}' no encontrado")
-                    all_met = False
-            elif prereq_type == "file":
-                if not os.path.exists(prereq_value):
-                    logger.error(f"Prerrequisito no cumplido: archivo '{prereq_value}' no encontrado")
-                    all_met = False
-            elif prereq_type == "directory":
-                if not os.path.isdir(prereq_value):
-                    logger.error(f"Prerrequisito no cumplido: directorio '{prereq_value}' no encontrado")
-                    all_met = False
-            elif prereq_type == "environment":
-                if prereq_value not in os.environ:
-                    logger.error(f"Prerrequisito no cumplido: variable de entorno '{prereq_value}' no definida")
-                    all_met = False
-            elif prereq_type == "python_module":
-                try:
-                    __import__(prereq_value)
-                except ImportError:
-                    logger.error(f"Prerrequisito no cumplido: módulo Python '{prereq_value}' no instalado")
-                    all_met = False
-                    
-        if all_met:
+        if not errors:
             logger.info("Todos los prerrequisitos cumplidos")
         else:
             logger.error("No se cumplen todos los prerrequisitos para ejecutar este escenario")
             
-        return all_met
+        return not errors
         
     def prepare_environment(self) -> bool:
         """
@@ -207,39 +403,33 @@ class ScenarioRunner:
             return True
             
         for target in targets:
-            target_type = target.get("type", "")
-            target_value = target.get("value", "")
-            
-            if not target_type or not target_value:
-                continue
+            if target.get("type", "") and target.get("value", ""):
+                logger.info(f"Preparando objetivo: {target['type']} - {target['value']}")
                 
-            logger.info(f"Preparando objetivo: {target_type} - {target_value}")
-            
+        # Los objetivos se sondean en paralelo; su estado solo genera avisos
+        for (target_type, target_value), available in self.preflight.probe_targets(targets).items():
+            if available:
+                continue
             if target_type == "ip":
-                # Verificar conectividad
-                returncode, _, _ = self._run_command(["ping", "-c", "1", target_value])
-                if returncode != 0:
-                    logger.warning(f"No se puede alcanzar el objetivo: {target_value}")
+                logger.warning(f"No se puede alcanzar el objetivo: {target_value}")
             elif target_type == "docker":
-                # Verificar si el contenedor está en ejecución
-                returncode, stdout, _ = self._run_command(["docker", "ps", "-q", "-f", f"name={target_value}"])
-                if not stdout.strip():
-                    logger.warning(f"El contenedor Docker '{target_value}' no está en ejecución")
+                logger.warning(f"El contenedor Docker '{target_value}' no está en ejecución")
             elif target_type == "vm":
-                # Verificar si la máquina virtual está en ejecución
-                returncode, stdout, _ = self._run_command(["vagrant", "status", target_value])
-                if "running" not in stdout.lower():
-                    logger.warning(f"La máquina virtual '{target_value}' no está en ejecución")
-                    
+                logger.warning(f"La máquina virtual '{target_value}' no está en ejecución")
+                
         logger.info("Entorno preparado correctamente")
         return True
         
-    def execute_technique(self, technique: Dict[str, Any]) -> Dict[str, Any]:
+    def execute_technique(self, technique: Dict[str, Any], location: Optional[Tuple[int, int]] = None,
+                          target: Optional[str] = None) -> Dict[str, Any]:
         """
         Ejecuta una técnica de ataque específica.
         
         Args:
             technique: Diccionario con la definición de la técnica
+            location: Índices (paso, técnica) con los que se registra la técnica en el diario
+            target: Objetivo de la técnica; si declara un transporte, los comandos se
+                ejecutan a través de él
             
         Returns:
             Diccionario con los resultados de la ejecución
@@ -252,6 +442,7 @@ class ScenarioRunner:
         result = {
             "id": technique_id,
             "name": technique_name,
+            "target": target,
             "status": "failed",
             "start_time": datetime.datetime.now().isoformat(),
             "end_time": "",
@@ -259,87 +450,346 @@ class ScenarioRunner:
             "error": ""
         }
         
+        if location is not None:
+            self._emit("technique_started", step_index=location[0], technique_index=location[1],
+                       id=technique_id, name=technique_name, target=target, start_time=result["start_time"])
+            
         commands = technique.get("commands", [])
         if not commands:
             logger.warning(f"No se especificaron comandos para la técnica {technique_id}")
             result["error"] = "No commands specified"
             result["end_time"] = datetime.datetime.now().isoformat()
+            self._emit_technique_finished(result, location)
             return result
             
+        transport = self.transports.get(target) if target else None
+        
         success = True
         outputs = []
+        start = time.monotonic()
         
-        for cmd in commands:
+        for command_index, cmd in enumerate(commands):
             if isinstance(cmd, str):
-                cmd_parts = cmd.split()
+                cmd_parts = shlex.split(cmd)
             else:
                 cmd_parts = cmd
                 
-            returncode, stdout, stderr = self._run_command(cmd_parts)
+            command_location = location + (command_index,) if location is not None else None
+            try:
+                local_parts = transport.wrap(cmd_parts) if transport is not None else cmd_parts
+            except TransportError as e:
+                logger.error(str(e))
+                command_result = CommandResult(-1, "", str(e))
+            else:
+                if self.status is not None:
+                    self.status.command_started(target or "local")
+                command_result = self._execute_command(local_parts, timeout=technique.get("timeout"),
+                                                       location=command_location, key=cmd_parts)
+                if self.status is not None:
+                    self.status.command_finished(target or "local", command_result.wall_seconds,
+                                                 command_result.returncode)
             
             cmd_result = {
                 "command": ' '.join(cmd_parts),
-                "returncode": returncode,
-                "stdout": stdout,
-                "stderr": stderr
+                "returncode": command_result.returncode,
+                "stdout": command_result.stdout,
+                "stderr": command_result.stderr,
+                "resources": command_result.resources()
             }
-            
+            fields = {}
+            for stream, spill in command_result.spills.items():
+                # La salida truncada se registra en el diario junto con la referencia al archivo completo
+                cmd_result[f"{stream}_file"] = fields[f"{stream}_file"] = spill
+                fields[stream] = cmd_result[stream]
+                
             outputs.append(cmd_result)
             
-            if returncode != 0:
+            if command_location is not None:
+                self._emit("command_finished", step_index=location[0], technique_index=location[1],
+                           command_index=command_index, command=cmd_result["command"],
+                           returncode=command_result.returncode, resources=cmd_result["resources"], **fields)
+                
+            if command_result.returncode != 0:
                 success = False
                 
         result["status"] = "success" if success else "failed"
         result["output"] = outputs
+        result["wall_seconds"] = round(time.monotonic() - start, 6)
         result["end_time"] = datetime.datetime.now().isoformat()
+        self._emit_technique_finished(result, location)
         
         return result
         
-    def execute_step(self, step: Dict[str, Any], step_index: int) -> Dict[str, Any]:
+    def _emit_technique_finished(self, result: Dict[str, Any], location: Optional[Tuple[int, int]]) -> None:
+        """Registra en el diario el fin de una técnica; la salida ya se registró por comando."""
+        if location is None:
+            return
+        fields = {k: v for k, v in result.items() if k != "output"}
+        self._emit("technique_finished", step_index=location[0], technique_index=location[1], **fields)
+        
+    @staticmethod
+    def _step_node(step_index: int) -> str:
+        """Identificador del nodo de cierre de un paso en el grafo de ejecución."""
+        return f"step:{step_index}"
+        
+    @staticmethod
+    def _step_start_node(step_index: int) -> str:
+        """Identificador del nodo de inicio de un paso en el grafo de ejecución."""
+        return f"step_start:{step_index}"
+        
+    @staticmethod
+    def _technique_node(step_index: int, technique_index: int) -> str:
+        """Identificador del nodo de una técnica en el grafo de ejecución."""
+        return f"technique:{step_index}:{technique_index}"
+        
+    def _on_progress(self, ready: int, running: int) -> None:
+        """Publica el número de nodos listos y en ejecución del grafo, si hay estado en vivo."""
+        if self.status is not None:
+            self.status.set_queue(self.output_dir, ready, running)
+            
+    def _pacing_enabled(self) -> bool:
+        """Determina si se deben aplicar las políticas de espaciado del escenario."""
+        if self.pacing_mode == "none":
+            return False
+        if self.pacing_mode == "auto":
+            return not (self.dry_run or os.environ.get("CI"))
+        return True
+        
+    def _build_pacer(self, steps: List[Dict[str, Any]]) -> Pacer:
         """
-        Ejecuta un paso del escenario.
+        Construye el planificador de espaciado con las políticas del escenario y de cada paso.
         
-        Args:
-            step: Diccionario con la definición del paso
-            step_index: Índice del paso en el escenario
+        Raises:
+            ValueError: Si alguna política no es válida
+        """
+        pacer = Pacer(self.scenario.get("pacing"), self._run_command, enabled=self._pacing_enabled())
+        for i, step in enumerate(steps):
+            pacer.configure_step(i, step.get("pacing"))
+        return pacer
+        
+    def _target_of(self, step: Dict[str, Any], technique: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Obtiene el objetivo de una técnica o paso, usado para limitar la frecuencia por
+        objetivo y para elegir su transporte.
+        
+        Si ni la técnica ni el paso indican un objetivo, en el modo matriz se usa el
+        objetivo para el que se expandió el escenario y, en otro caso, "default".
+        """
+        if technique and technique.get("target"):
+            return str(technique["target"])
+        return str(step.get("target") or self.scenario.get(MATRIX_TARGET_KEY) or "default")
+        
+    def _pool_targets(self, step: Dict[str, Any], technique: Dict[str, Any]) -> List[str]:
+        """
+        Obtiene los objetivos que una técnica ocupa en el pool compartido del lote.
+        
+        Si ni la técnica ni el paso indican un objetivo, se ocupan todos los
+        objetivos declarados en el escenario.
+        """
+        if technique.get("target") or step.get("target"):
+            return [self._target_of(step, technique)]
+        return [str(t.get("value")) for t in self.scenario.get("targets", []) or [] if t.get("value")]
+        
+    def _reset_execution_state(self) -> None:
+        """Reinicia el estado compartido de la ejecución de pasos y técnicas."""
+        with self._lock:
+            self._step_start_times.clear()
+            self._technique_results.clear()
+            self._step_results.clear()
+            self._execution_seconds = 0.0
             
+    def _completed_step(self, step: Dict[str, Any], step_index: int) -> Optional[Dict[str, Any]]:
+        """Obtiene el resultado de un paso ya completado en una ejecución anterior, si lo hay."""
+        if self.checkpoint is None:
+            return None
+        return self.checkpoint.completed_step(step_index, fingerprint(step))
+        
+    def _start_step(self, step: Dict[str, Any], step_index: int) -> bool:
+        """
+        Inicia un paso una vez finalizadas sus dependencias.
+        
         Returns:
-            Diccionario con los resultados de la ejecución
+            Siempre True; el estado del paso se determina al cerrarlo
         """
-        step_name = step.get("name", f"Step {step_index + 1}")
+        if self._completed_step(step, step_index) is not None:
+            logger.info(f"Paso ya completado en una ejecución anterior: {step.get('name', f'Step {step_index + 1}')}")
+            return True
+            
+        logger.info(f"Ejecutando paso: {step.get('name', f'Step {step_index + 1}')}")
+        self.pacer.before_step(step_index, self._target_of(step))
+        start_time = datetime.datetime.now().isoformat()
+        with self._lock:
+            self._step_start_times[step_index] = start_time
+        self._emit("step_started", step_index=step_index, name=step.get("name", f"Step {step_index + 1}"),
+                   start_time=start_time)
+        return True
+            
+    def _run_technique_node(self, step: Dict[str, Any], step_index: int, technique: Dict[str, Any],
+                            technique_index: int) -> bool:
+        """
+        Ejecuta una técnica como nodo del grafo de ejecución.
         
-        logger.info(f"Ejecutando paso: {step_name}")
+        Returns:
+            True si la técnica se ejecutó con éxito
+        """
+        technique_fingerprint = fingerprint(technique)
+        if self.checkpoint is not None:
+            previous = self.checkpoint.completed_technique(step_index, technique_index, technique_fingerprint)
+            if previous is not None:
+                logger.info(f"Técnica ya completada en una ejecución anterior: {previous.get('id', 'unknown')}")
+                with self._lock:
+                    self._technique_results[(step_index, technique_index)] = previous
+                if self.status is not None:
+                    self.status.technique_finished(self.output_dir, step_index, technique_index, True)
+                return True
+                
+        target = self._target_of(step, technique)
+        self.pacer.before_technique(step_index, target)
         
+        if self.target_pool is not None:
+            hold = self.target_pool.hold(str(id(self)), self._pool_targets(step, technique))
+        else:
+            hold = contextlib.nullcontext()
+            
+        with hold:
+            if self.status is not None:
+                self.status.technique_started(self.output_dir, step_index, technique_index,
+                                              step.get("name", f"Step {step_index + 1}"), technique, target)
+            start = time.monotonic()
+            technique_result = self.execute_technique(technique, location=(step_index, technique_index),
+                                                      target=target)
+            elapsed = time.monotonic() - start
+        if self.status is not None:
+            self.status.technique_finished(self.output_dir, step_index, technique_index,
+                                           technique_result["status"] == "success", elapsed)
+        
+        with self._lock:
+            self._technique_results[(step_index, technique_index)] = technique_result
+            self._execution_seconds += elapsed
+            
+        if self.checkpoint is not None:
+            self.checkpoint.record_technique(step_index, technique_index, technique_fingerprint, technique_result)
+            
+        self.pacer.after_technique(step_index, target)
+        
+        return technique_result["status"] == "success"
+        
+    def _finish_step(self, step: Dict[str, Any], step_index: int) -> bool:
+        """
+        Cierra un paso una vez finalizadas todas sus técnicas.
+        
+        Returns:
+            True si todas las técnicas del paso se ejecutaron con éxito
+        """
+        step_name = step.get("name", f"Step {step_index + 1}")
+        techniques = step.get("techniques", []) or []
+        
+        previous = self._completed_step(step, step_index)
+        if previous is not None:
+            with self._lock:
+                self._step_results[step_index] = previous
+            return True
+            
+        with self._lock:
+            start_time = self._step_start_times.get(step_index, datetime.datetime.now().isoformat())
+            technique_results = [
+                self._technique_results[(step_index, j)]
+                for j in range(len(techniques))
+                if (step_index, j) in self._technique_results
+            ]
+            
         result = {
             "name": step_name,
             "status": "failed",
-            "start_time": datetime.datetime.now().isoformat(),
+            "start_time": start_time,
             "end_time": "",
-            "techniques": []
+            "techniques": technique_results
         }
         
-        techniques = step.get("techniques", [])
         if not techniques:
             logger.warning(f"No se especificaron técnicas para el paso {step_name}")
             result["end_time"] = datetime.datetime.now().isoformat()
-            return result
+        else:
+            success = len(technique_results) == len(techniques) and all(
+                t["status"] == "success" for t in technique_results
+            )
+            result["status"] = "success" if success else "failed"
+            result["end_time"] = datetime.datetime.now().isoformat()
             
-        success = True
+        with self._lock:
+            self._step_results[step_index] = result
+        self._emit("step_finished", step_index=step_index, name=step_name, status=result["status"],
+                   start_time=result["start_time"], end_time=result["end_time"])
+        if self.checkpoint is not None:
+            self.checkpoint.record_step(step_index, fingerprint(step), result)
+            
+        self.pacer.after_step(step_index, self._target_of(step))
         
-        for technique in techniques:
-            technique_result = self.execute_technique(technique)
-            result["techniques"].append(technique_result)
+        return result["status"] == "success"
+        
+    def _add_step_nodes(self, scheduler: DagScheduler, step: Dict[str, Any], step_index: int,
+                        step_dependencies: List[int]) -> None:
+        """
+        Añade al grafo los nodos de un paso: un nodo de inicio, uno por técnica y un nodo de cierre.
+        
+        Args:
+            scheduler: Planificador al que se añaden los nodos
+            step: Diccionario con la definición del paso
+            step_index: Índice del paso en el escenario
+            step_dependencies: Índices de los pasos de los que depende
+        """
+        techniques = step.get("techniques", []) or []
+        technique_dependencies = resolve_dependencies(techniques, "Técnica")
+        start_node = self._step_start_node(step_index)
+        
+        scheduler.add_node(
+            start_node,
+            functools.partial(self._start_step, step, step_index),
+            [self._step_node(d) for d in step_dependencies]
+        )
+        
+        technique_nodes = []
+        for j, technique in enumerate(techniques):
+            node = self._technique_node(step_index, j)
+            deps = [start_node] + [self._technique_node(step_index, k) for k in technique_dependencies[j]]
+            scheduler.add_node(
+                node,
+                functools.partial(self._run_technique_node, step, step_index, technique, j),
+                deps
+            )
+            technique_nodes.append(node)
             
-            if technique_result["status"] != "success":
-                success = False
-                
-            # Pausa entre técnicas
-            time.sleep(1)
+        scheduler.add_node(
+            self._step_node(step_index),
+            functools.partial(self._finish_step, step, step_index),
+            [start_node] + technique_nodes,
+            stop_on_failure=bool(step.get("stop_on_failure", False))
+        )
+        
+    def execute_step(self, step: Dict[str, Any], step_index: int) -> Dict[str, Any]:
+        """
+        Ejecuta un paso del escenario.
+        
+        Las técnicas del paso se ejecutan según sus dependencias sobre el pool
+        de trabajadores del ejecutor.
+        
+        Args:
+            step: Diccionario con la definición del paso
+            step_index: Índice del paso en el escenario
             
-        result["status"] = "success" if success else "failed"
-        result["end_time"] = datetime.datetime.now().isoformat()
+        Returns:
+            Diccionario con los resultados de la ejecución
+        """
+        if self.pacer is None:
+            self.pacer = self._build_pacer([])
+        self.pacer.configure_step(step_index, step.get("pacing"))
         
-        return result
+        scheduler = DagScheduler(self.max_workers)
+        self._add_step_nodes(scheduler, step, step_index, [])
+        scheduler.run(on_interrupt=self.backend.cancel_all, on_progress=self._on_progress)
+        
+        with self._lock:
+            return self._step_results[step_index]
         
     def run(self) -> bool:
         """
@@ -348,17 +798,58 @@ class ScenarioRunner:
         Returns:
             True si la ejecución fue exitosa, False en caso contrario
         """
+        if not self.dry_run:
+            self.journal = ResultsJournal(self.output_dir, append=self.resume)
+            self.checkpoint = RunCheckpoint.load(self.output_dir) if self.resume else RunCheckpoint(self.output_dir)
+            
+        try:
+            return self._run_scenario()
+        finally:
+            if self.status is not None:
+                self.status.finish_run(self.output_dir, self.results["status"], self.results.get("timing"))
+            self.transports.close()
+            self.backend.close()
+            if self.journal is not None:
+                self.journal.close()
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+            
+    def _run_scenario(self) -> bool:
+        """Ejecuta las fases del escenario: prerrequisitos, entorno y grafo de pasos."""
         logger.info(f"Iniciando ejecución del escenario: {self.scenario.get('name', 'Unknown')}")
         
         self.results["start_time"] = datetime.datetime.now().isoformat()
         self.results["status"] = "running"
+        if self.status is not None:
+            self.status.start_run(self.output_dir, self.results["scenario"],
+                                  sum(len(step.get("techniques", []) or []) for step in self.scenario.get("steps", [])))
+        
+        prerequisites_fingerprint = fingerprint(self.scenario.get("prerequisites", []))
+        prerequisites_verified = False
+        if self.checkpoint is not None:
+            if self.resume and self.checkpoint.start_time:
+                # Se conserva la hora de inicio de la ejecución original
+                logger.info(f"Reanudando la ejecución iniciada el {self.checkpoint.start_time}")
+                self.results["start_time"] = self.checkpoint.start_time
+                self.results["resumed_at"] = datetime.datetime.now().isoformat()
+                prerequisites_verified = self.checkpoint.prerequisites == prerequisites_fingerprint
+            self.checkpoint.start(self.scenario_file, self.results["start_time"], resume=self.resume)
+            
+        self._emit("run_started", scenario=self.results["scenario"], start_time=self.results["start_time"])
         
         # Verificar prerrequisitos
-        if not self.check_prerequisites():
+        if prerequisites_verified:
+            logger.info("Prerrequisitos ya verificados en la ejecución anterior")
+        elif self.replay is not None:
+            # Los prerrequisitos se refieren al equipo en el que se grabó la ejecución
+            logger.info("Reproduciendo una grabación: se omite la verificación de prerrequisitos")
+        elif not self.check_prerequisites():
             self.results["status"] = "failed"
             self.results["end_time"] = datetime.datetime.now().isoformat()
             self._save_results()
             return False
+        elif self.checkpoint is not None:
+            self.checkpoint.record_prerequisites(prerequisites_fingerprint)
             
         # Preparar entorno
         if not self.prepare_environment():
@@ -376,20 +867,72 @@ class ScenarioRunner:
             self._save_results()
             return True
             
+        # Construir y ejecutar el grafo de pasos y técnicas
+        self._reset_execution_state()
+        wall_start = time.monotonic()
+        try:
+            self.pacer = self._build_pacer(steps)
+            scheduler = DagScheduler(self.max_workers)
+            step_dependencies = resolve_dependencies(steps, "Paso")
+            for i, step in enumerate(steps):
+                self._add_step_nodes(scheduler, step, i, step_dependencies[i])
+            statuses = scheduler.run(on_interrupt=self.backend.cancel_all, on_progress=self._on_progress)
+        except DependencyError as e:
+            logger.error(f"Error en las dependencias del escenario: {e}")
+            self.results["status"] = "failed"
+            self.results["end_time"] = datetime.datetime.now().isoformat()
+            self._save_results()
+            return False
+        except ValueError as e:
+            logger.error(f"Error en la configuración de pacing del escenario: {e}")
+            self.results["status"] = "failed"
+            self.results["end_time"] = datetime.datetime.now().isoformat()
+            self._save_results()
+            return False
+            
         success = True
+        skipped_steps = []
         
         for i, step in enumerate(steps):
-            step_result = self.execute_step(step, i)
+            step_name = step.get("name", f"Step {i + 1}")
+            if statuses.get(self._step_node(i)) == STATUS_SKIPPED:
+                logger.warning(f"Paso omitido por el fallo de una dependencia: {step_name}")
+                self._emit("step_skipped", step_index=i, name=step_name)
+                skipped_steps.append(step_name)
+                success = False
+                continue
+                
+            step_result = self._step_results[i]
             self.results["steps"].append(step_result)
             
             if step_result["status"] != "success":
                 success = False
                 if step.get("stop_on_failure", False):
-                    logger.error(f"Paso {i+1} falló y está configurado para detener la ejecución")
-                    break
+                    logger.error(f"Paso {i+1} falló y está configurado para detener la ejecución de sus dependientes")
                     
-            # Pausa entre pasos
-            time.sleep(2)
+        if skipped_steps:
+            self.results["skipped_steps"] = skipped_steps
+            
+        # Tiempo dedicado a esperas frente a tiempo de ejecución de técnicas
+        self.results["timing"] = {
+            "wall_seconds": round(time.monotonic() - wall_start, 3),
+            "execution_seconds": round(self._execution_seconds, 3),
+            "pacing_seconds": round(self.pacer.pacing_seconds, 3)
+        }
+        logger.info(
+            f"Tiempo total: {self.results['timing']['wall_seconds']}s "
+            f"(ejecución de técnicas: {self.results['timing']['execution_seconds']}s, "
+            f"esperas: {self.results['timing']['pacing_seconds']}s)"
+        )
+        
+        # Recursos de los comandos y percentiles de duración por técnica
+        self.results["resources"] = resource_totals(self.results)
+        self.results["latency"] = latency_summary([self.results])
+        logger.info(
+            f"CPU de los comandos: {self.results['resources']['cpu_user_seconds']}s usuario, "
+            f"{self.results['resources']['cpu_sys_seconds']}s sistema; "
+            f"memoria máxima: {self.results['resources']['max_rss_kb']} KB"
+        )
             
         # Recopilar técnicas ejecutadas
         all_techniques = []
@@ -412,15 +955,18 @@ class ScenarioRunner:
         return success
         
     def _save_results(self) -> None:
-        """Guarda los resultados de la ejecución en un archivo JSON."""
+        """Registra el fin de la ejecución en el diario y guarda los resultados en un archivo JSON."""
         if self.dry_run:
             logger.info("[DRY RUN] Se guardarían los resultados")
             return
             
+        summary = {k: v for k, v in self.results.items() if k not in ("scenario", "start_time", "steps", "techniques")}
+        self._emit("run_finished", **summary)
+        
         try:
-            results_file = os.path.join(self.output_dir, "results.json")
-            with open(results_file, 'w') as f:
-                json.dump(self.results, f, indent=2)
+            os.makedirs(self.output_dir, exist_ok=True)
+            results_file = os.path.join(self.output_dir, RESULTS_FILE)
+            write_results(results_file, self.results)
             logger.debug(f"Resultados guardados en {results_file}")
         except Exception as e:
             logger.error(f"Error al guardar resultados: {e}")
@@ -428,18 +974,200 @@ class ScenarioRunner:
 def main():
     """Función principal."""
     parser = argparse.ArgumentParser(description='Ejecutar escenario de simulación de ciberataques')
-    parser.add_argument('--scenario', required=True, help='Archivo YAML con la definición del escenario')
+    parser.add_argument('--scenario', help='Archivo YAML con la definición del escenario')
+    parser.add_argument('--compact', metavar='DIRECTORIO',
+                        help='Reconstruir results.json a partir del diario de una ejecución')
+    parser.add_argument('--probe-workers', type=int, default=8, help='Número máximo de comprobaciones previas simultáneas')
+    parser.add_argument('--probe-ttl', type=float, default=60.0,
+                        help='Segundos de validez de la caché de estado de objetivos (0 para desactivarla)')
+    parser.add_argument('--resume', metavar='DIRECTORIO',
+                        help='Reanudar la ejecución interrumpida guardada en el directorio indicado')
     parser.add_argument('--verbose', action='store_true', help='Mostrar información detallada durante la ejecución')
     parser.add_argument('--dry-run', action='store_true', help='Mostrar acciones sin ejecutarlas')
     parser.add_argument('--output', help='Directorio para guardar los resultados')
+    parser.add_argument('--max-workers', type=int, default=4, help='Número máximo de técnicas ejecutándose en paralelo')
+    parser.add_argument('--pacing', choices=['auto', 'scenario', 'none'], default='auto',
+                        help='Espaciado entre técnicas y pasos (auto: sin esperas en dry-run o CI)')
+    parser.add_argument('--command-timeout', type=float, help='Tiempo máximo por comando en segundos')
+    parser.add_argument('--batch', metavar='PATRÓN',
+                        help='Ejecutar todos los escenarios de un directorio o patrón glob')
+    parser.add_argument('--max-scenarios', type=int, default=2,
+                        help='Número máximo de escenarios ejecutándose en paralelo en un lote')
+    parser.add_argument('--target-concurrency', type=int, default=1,
+                        help='Número máximo de escenarios del lote que actúan a la vez sobre un mismo objetivo')
+    parser.add_argument('--no-plan-cache', action='store_true', help='No usar la caché de escenarios compilados')
+    parser.add_argument('--output-limit', type=int, default=DEFAULT_OUTPUT_LIMIT,
+                        help='Caracteres de cada salida de comando que se conservan en memoria (0 para no limitar)')
+    parser.add_argument('--matrix', action='store_true',
+                        help='Ejecutar el escenario sobre cada uno de sus objetivos en paralelo')
+    parser.add_argument('--max-targets', type=int, default=4,
+                        help='Número máximo de objetivos ejecutándose en paralelo en modo matriz')
+    parser.add_argument('--record', metavar='ARCHIVO', help='Grabar los comandos ejecutados en un archivo')
+    parser.add_argument('--replay', metavar='ARCHIVO', help='Reproducir una grabación en lugar de ejecutar los comandos')
+    parser.add_argument('--time-scale', type=float, default=1.0,
+                        help='Factor aplicado a la duración de los comandos reproducidos')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Ejecutar el escenario N veces y resumir los percentiles de duración por técnica')
+    parser.add_argument('--status-addr', metavar='DIRECCIÓN',
+                        help='Publicar el estado en vivo y las métricas en host:puerto o unix:/ruta')
     
     args = parser.parse_args()
     
+    if not (args.scenario or args.compact or args.resume or args.batch):
+        parser.error("se requiere --scenario, --batch, --compact o --resume")
+        
+    if args.record and args.replay:
+        parser.error("--record y --replay no se pueden usar a la vez")
+    if args.dry_run and (args.record or args.replay):
+        parser.error("--dry-run no se puede combinar con --record ni con --replay")
+        
+    record = FixtureWriter(args.record) if args.record else None
+    replay = None
+    if args.replay:
+        try:
+            replay = Fixture(args.replay)
+        except OSError as e:
+            logger.error(f"No se pudo cargar la grabación {args.replay}: {e}")
+            sys.exit(1)
+        logger.info(f"Reproduciendo {len(replay)} comandos grabados en {args.replay}")
+        
+    status = None
+    if args.status_addr and not args.compact:
+        status = RunStatus()
+        server = StatusServer(status, args.status_addr)
+        try:
+            server.start()
+        except (OSError, ValueError) as e:
+            logger.error(f"No se pudo publicar el estado en {args.status_addr}: {e}")
+            sys.exit(1)
+        atexit.register(server.close)
+        
+    if args.compact:
+        journal_file = os.path.join(args.compact, JOURNAL_FILE)
+        if not os.path.exists(journal_file):
+            logger.error(f"Diario no encontrado: {journal_file}")
+            sys.exit(1)
+        results = compact_journal(journal_file)
+        write_results(os.path.join(args.compact, RESULTS_FILE), results)
+        logger.info(f"Resultados reconstruidos en {os.path.join(args.compact, RESULTS_FILE)} (estado: {results['status']})")
+        sys.exit(0)
+        
+    if args.matrix:
+        if not args.scenario:
+            parser.error("--matrix requiere --scenario")
+        try:
+            plan = load_plan(args.scenario, None if args.no_plan_cache else PlanCache())
+        except (OSError, yaml.YAMLError, ScenarioValidationError) as e:
+            logger.error(f"{args.scenario}: {e}")
+            sys.exit(1)
+            
+        def target_runner_factory(target_plan: Dict[str, Any], output_dir: str) -> ScenarioRunner:
+            return ScenarioRunner(
+                scenario_file=args.scenario,
+                verbose=args.verbose,
+                dry_run=args.dry_run,
+                output_dir=output_dir,
+                max_workers=args.max_workers,
+                pacing=args.pacing,
+                command_timeout=args.command_timeout,
+                probe_workers=args.probe_workers,
+                probe_ttl=args.probe_ttl,
+                output_limit=args.output_limit,
+                plan=target_plan,
+                record=record,
+                replay=replay,
+                time_scale=args.time_scale,
+                status=status
+            )
+            
+        matrix = MatrixRunner(
+            args.scenario,
+            plan,
+            args.output or f"matrix_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            target_runner_factory,
+            max_targets=args.max_targets
+        )
+        sys.exit(0 if matrix.run() else 1)
+        
+    if args.batch or (args.scenario and args.repeat > 1):
+        if args.batch:
+            scenario_files = resolve_scenarios(args.batch)
+        else:
+            scenario_files = [args.scenario]
+        scenario_files = scenario_files * max(1, args.repeat)
+        if not scenario_files:
+            logger.error(f"No se encontraron escenarios en: {args.batch}")
+            sys.exit(1)
+            
+        # Validar todos los escenarios antes de ejecutar ninguno
+        plan_cache = None if args.no_plan_cache else PlanCache()
+        invalid = False
+        for scenario_file in scenario_files:
+            try:
+                load_plan(scenario_file, plan_cache)
+            except (OSError, yaml.YAMLError, ScenarioValidationError) as e:
+                logger.error(f"{scenario_file}: {e}")
+                invalid = True
+        if invalid:
+            logger.error("El lote contiene escenarios no válidos; no se ejecuta ninguno")
+            sys.exit(1)
+            
+        def runner_factory(scenario_file: str, output_dir: str, target_pool: TargetPool) -> ScenarioRunner:
+            return ScenarioRunner(
+                scenario_file=scenario_file,
+                verbose=args.verbose,
+                dry_run=args.dry_run,
+                output_dir=output_dir,
+                max_workers=args.max_workers,
+                pacing=args.pacing,
+                command_timeout=args.command_timeout,
+                probe_workers=args.probe_workers,
+                probe_ttl=args.probe_ttl,
+                target_pool=target_pool,
+                plan_cache=not args.no_plan_cache,
+                output_limit=args.output_limit,
+                record=record,
+                replay=replay,
+                time_scale=args.time_scale,
+                status=status
+            )
+            
+        batch = BatchRunner(
+            scenario_files,
+            args.output or f"batch_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            runner_factory,
+            max_scenarios=args.max_scenarios,
+            target_pool=TargetPool(default_limit=args.target_concurrency)
+        )
+        sys.exit(0 if batch.run() else 1)
+        
+    scenario_file = args.scenario
+    output_dir = args.output
+    if args.resume:
+        output_dir = args.resume
+        if not scenario_file:
+            scenario_file = RunCheckpoint.load(args.resume).scenario_file
+            if not scenario_file:
+                logger.error(f"No se encontró un punto de control válido en {args.resume}")
+                sys.exit(1)
+                
     runner = ScenarioRunner(
-        scenario_file=args.scenario,
+        scenario_file=scenario_file,
         verbose=args.verbose,
         dry_run=args.dry_run,
-        output_dir=args.output
+        output_dir=output_dir,
+        max_workers=args.max_workers,
+        pacing=args.pacing,
+        command_timeout=args.command_timeout,
+        resume=bool(args.resume),
+        probe_workers=args.probe_workers,
+        probe_ttl=args.probe_ttl,
+        plan_cache=not args.no_plan_cache,
+        output_limit=args.output_limit,
+        record=record,
+        replay=replay,
+        time_scale=args.time_scale,
+        status=status
     )
     
     success = runner.run()
@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compilación y validación de escenarios.
+
+El compilador valida una sola vez la estructura del archivo YAML del escenario,
+normaliza los comandos (las cadenas se dividen con `shlex`, respetando comillas)
+y resuelve los valores por defecto de pasos y técnicas. El plan compilado se guarda
+en una caché indexada por el hash del archivo, de forma que las ejecuciones
+repetidas y los lotes no vuelven a analizar el YAML. Un escenario mal formado se
+rechaza antes de tocar ningún objetivo.
+
+La caché se guarda en el directorio de caché del usuario
+(`$XDG_CACHE_HOME/simulacion-ciberataques/plans`) en JSON, de modo que cargarla no
+ejecuta código. Como el plan incluye los comandos de las técnicas, solo se usan los
+archivos del propio usuario que no pueden escribir otros. Los planes que no se
+pueden representar en JSON sin cambios (por ejemplo, con fechas o claves numéricas
+en el YAML) no se guardan.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shlex
+import threading
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from cache_paths import user_cache_dir
+from pacing import build_policy
+from scheduler import DagScheduler, DependencyError
+from transports import validate_transport
+
+logger = logging.getLogger('run_scenario.plan')
+
+# Se incrementa cuando cambia la forma del plan compilado, para invalidar la caché
+PLAN_FORMAT_VERSION = 2
+
+DEFAULT_PLAN_CACHE_DIR = user_cache_dir("plans")
+
+# El cargador en C de libyaml es mucho más rápido; se usa el de Python si no está disponible
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class ScenarioValidationError(ValueError):
+    """Error de validación de un escenario, con la lista de problemas encontrados."""
+
+    def __init__(self, scenario_file: str, errors: List[str]):
+        self.scenario_file = scenario_file
+        self.errors = errors
+        super().__init__(f"Escenario no válido {scenario_file}: " + "; ".join(errors))
+
+
+def resolve_dependencies(items: List[Dict[str, Any]], kind: str) -> List[List[int]]:
+    """
+    Resuelve el campo depends_on de una lista de pasos o técnicas.
+
+    Las referencias pueden usar el campo "id" o "name" de otro elemento de la
+    misma lista. Los elementos sin depends_on dependen del elemento anterior.
+
+    Args:
+        items: Lista de pasos o técnicas
+        kind: Tipo de elemento, usado en los mensajes de error
+
+    Returns:
+        Lista con los índices de los que depende cada elemento
+
+    Raises:
+        DependencyError: Si una referencia no existe
+    """
+    index_by_ref = {}
+    for i, item in enumerate(items):
+        for ref in (item.get("id"), item.get("name")):
+            if ref:
+                index_by_ref.setdefault(str(ref), i)
+
+    resolved = []
+    for i, item in enumerate(items):
+        if "depends_on" not in item:
+            resolved.append([i - 1] if i > 0 else [])
+            continue
+
+        refs = item.get("depends_on") or []
+        if not isinstance(refs, list):
+            refs = [refs]
+
+        deps = []
+        for ref in refs:
+            if str(ref) not in index_by_ref:
+                name = item.get("name", item.get("id", i + 1))
+                raise DependencyError(f"{kind} '{name}' depende de '{ref}', que no existe")
+            deps.append(index_by_ref[str(ref)])
+        resolved.append(deps)
+
+    return resolved
+
+
+def _check_dependencies(items: List[Dict[str, Any]], kind: str, where: str, errors: List[str]) -> None:
+    """Comprueba que las dependencias de una lista existen y no forman ciclos."""
+    try:
+        keys = [f"{i + 1}:{item.get('name', item.get('id', ''))}" for i, item in enumerate(items)]
+        scheduler = DagScheduler()
+        for i, deps in enumerate(resolve_dependencies(items, kind)):
+            scheduler.add_node(keys[i], lambda: True, [keys[d] for d in deps])
+        scheduler.validate()
+    except DependencyError as e:
+        errors.append(f"{where}: {e}")
+
+
+def _check_pacing(spec: Any, where: str, errors: List[str]) -> None:
+    """Comprueba que una sección `pacing` define políticas válidas."""
+    if spec is None:
+        return
+    if not isinstance(spec, dict):
+        errors.append(f"{where}: debe ser un diccionario con las claves 'techniques' y/o 'steps'")
+        return
+    for kind in ("techniques", "steps"):
+        if kind in spec:
+            try:
+                build_policy(spec[kind], None)
+            except (ValueError, TypeError) as e:
+                errors.append(f"{where}.{kind}: {e}")
+
+
+def _is_number(value: Any) -> bool:
+    """Indica si un valor es numérico (excluyendo booleanos)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _compile_command(command: Any, where: str, errors: List[str]) -> Optional[List[str]]:
+    """Normaliza un comando como lista de argumentos."""
+    if isinstance(command, str):
+        try:
+            parts = shlex.split(command)
+        except ValueError as e:
+            errors.append(f"{where}: no se puede dividir el comando ({e})")
+            return None
+    elif isinstance(command, list):
+        if any(isinstance(part, (dict, list)) or part is None for part in command):
+            errors.append(f"{where}: los argumentos del comando deben ser valores simples")
+            return None
+        parts = [str(part) for part in command]
+    else:
+        errors.append(f"{where}: el comando debe ser una cadena o una lista de argumentos")
+        return None
+
+    if not parts:
+        errors.append(f"{where}: comando vacío")
+        return None
+    return parts
+
+
+def _compile_entries(scenario: Dict[str, Any], key: str, errors: List[str]) -> List[Dict[str, Any]]:
+    """
+    Valida una lista de objetivos o prerrequisitos con campos type y value.
+
+    Las entradas sin type o sin value se descartan con un aviso, igual que las
+    ignoraba el ejecutor antes de compilar los escenarios.
+    """
+    entries = scenario.get(key)
+    if entries is None:
+        return []
+    if not isinstance(entries, list):
+        errors.append(f"{key}: debe ser una lista")
+        return []
+    compiled = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            errors.append(f"{key}[{i}]: debe ser un diccionario")
+        elif not entry.get("type") or not entry.get("value"):
+            logger.warning(f"{key}[{i}]: faltan los campos 'type' o 'value'; se ignora")
+        else:
+            compiled.append(entry)
+    return compiled
+
+
+def _compile_technique(technique: Any, where: str, errors: List[str]) -> Dict[str, Any]:
+    """Valida una técnica y resuelve sus valores por defecto."""
+    if not isinstance(technique, dict):
+        errors.append(f"{where}: la técnica debe ser un diccionario")
+        return {}
+
+    compiled = dict(technique)
+    compiled.setdefault("id", "unknown")
+    compiled.setdefault("name", "Unknown Technique")
+    if "timeout" in technique and technique["timeout"] is not None and not _is_number(technique["timeout"]):
+        errors.append(f"{where}.timeout: debe ser un número de segundos")
+
+    commands = technique.get("commands")
+    if commands is None:
+        commands = []
+    elif not isinstance(commands, list):
+        errors.append(f"{where}.commands: debe ser una lista")
+        commands = []
+    compiled["commands"] = []
+    for j, command in enumerate(commands):
+        parts = _compile_command(command, f"{where}.commands[{j}]", errors)
+        if parts is not None:
+            compiled["commands"].append(parts)
+    return compiled
+
+
+def _compile_step(step: Any, index: int, errors: List[str]) -> Dict[str, Any]:
+    """Valida un paso y sus técnicas y resuelve sus valores por defecto."""
+    where = f"steps[{index}]"
+    if not isinstance(step, dict):
+        errors.append(f"{where}: el paso debe ser un diccionario")
+        return {}
+
+    compiled = dict(step)
+    compiled.setdefault("name", f"Step {index + 1}")
+    if not isinstance(step.get("stop_on_failure", False), bool):
+        errors.append(f"{where}.stop_on_failure: debe ser true o false")
+
+    techniques = step.get("techniques")
+    if techniques is None:
+        techniques = []
+    elif not isinstance(techniques, list):
+        errors.append(f"{where}.techniques: debe ser una lista")
+        techniques = []
+    compiled["techniques"] = [
+        _compile_technique(technique, f"{where}.techniques[{j}]", errors)
+        for j, technique in enumerate(techniques)
+    ]
+    _check_dependencies(compiled["techniques"], "Técnica", where, errors)
+    _check_pacing(step.get("pacing"), f"{where}.pacing", errors)
+    return compiled
+
+
+def compile_scenario(scenario: Any, scenario_file: str = "<escenario>") -> Dict[str, Any]:
+    """
+    Valida un escenario y lo normaliza como plan de ejecución.
+
+    Args:
+        scenario: Escenario tal como se carga del YAML
+        scenario_file: Archivo de origen, usado en los mensajes de error
+
+    Returns:
+        Plan compilado: el escenario con comandos como listas de argumentos y
+        valores por defecto resueltos
+
+    Raises:
+        ScenarioValidationError: Si el escenario no es válido
+    """
+    if not isinstance(scenario, dict):
+        raise ScenarioValidationError(scenario_file, ["el escenario debe ser un diccionario YAML"])
+
+    errors: List[str] = []
+    plan = dict(scenario)
+    plan.setdefault("name", "Unknown")
+
+    if scenario.get("command_timeout") is not None and not _is_number(scenario["command_timeout"]):
+        errors.append("command_timeout: debe ser un número de segundos")
+
+    plan["targets"] = _compile_entries(scenario, "targets", errors)
+    for i, target in enumerate(plan["targets"]):
+        error = validate_transport(target.get("transport"))
+        if error:
+            errors.append(f"targets[{i}].transport: {error}")
+    plan["prerequisites"] = _compile_entries(scenario, "prerequisites", errors)
+    _check_pacing(scenario.get("pacing"), "pacing", errors)
+
+    steps = scenario.get("steps")
+    if steps is None:
+        steps = []
+    elif not isinstance(steps, list):
+        errors.append("steps: debe ser una lista")
+        steps = []
+    plan["steps"] = [_compile_step(step, i, errors) for i, step in enumerate(steps)]
+    _check_dependencies(plan["steps"], "Paso", "steps", errors)
+
+    if errors:
+        raise ScenarioValidationError(scenario_file, errors)
+    return plan
+
+
+class PlanCache:
+    """Caché en disco de planes compilados, indexada por el hash del archivo del escenario."""
+
+    def __init__(self, cache_dir: str = DEFAULT_PLAN_CACHE_DIR):
+        """
+        Inicializa la caché.
+
+        Args:
+            cache_dir: Directorio en el que se guardan los planes compilados
+        """
+        self.cache_dir = cache_dir
+
+    def _path(self, digest: str) -> str:
+        """Ruta del plan compilado para un hash de archivo."""
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Obtiene un plan compilado, o None si no está en la caché o no es de confianza."""
+        path = self._path(digest)
+        try:
+            info = os.stat(path)
+            if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & 0o022):
+                logger.warning(f"Plan compilado en caché de otro usuario o escribible por otros: {path}; se ignora")
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                plan = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return plan if isinstance(plan, dict) else None
+
+    def put(self, digest: str, plan: Dict[str, Any]) -> None:
+        """Guarda un plan compilado de forma atómica, si se puede representar en JSON."""
+        try:
+            data = json.dumps(plan, ensure_ascii=False)
+        except (TypeError, ValueError):
+            data = None
+        if data is None or json.loads(data) != plan:
+            logger.debug("El plan compilado no se puede guardar en JSON sin cambios; no se guarda en la caché")
+            return
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            tmp_path = f"{self._path(digest)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(digest))
+        except OSError as e:
+            logger.debug(f"No se pudo guardar el plan compilado: {e}")
+
+
+def load_plan(scenario_file: str, cache: Optional[PlanCache] = None) -> Dict[str, Any]:
+    """
+    Carga el plan compilado de un escenario, desde la caché si el archivo no ha cambiado.
+
+    Args:
+        scenario_file: Archivo YAML del escenario
+        cache: Caché de planes compilados (None para no usarla)
+
+    Returns:
+        Plan compilado del escenario
+
+    Raises:
+        FileNotFoundError: Si el archivo no existe
+        yaml.YAMLError: Si el archivo no es un YAML válido
+        ScenarioValidationError: Si el escenario no es válido
+    """
+    with open(scenario_file, 'rb') as f:
+        data = f.read()
+
+    digest = hashlib.sha256(f"{PLAN_FORMAT_VERSION}:".encode('utf-8') + data).hexdigest()
+    if cache is not None:
+        plan = cache.get(digest)
+        if plan is not None:
+            logger.debug(f"Plan compilado de {scenario_file} obtenido de la caché")
+            return plan
+
+    plan = compile_scenario(yaml.load(data, Loader=SafeLoader), scenario_file)
+    if cache is not None:
+        cache.put(digest, plan)
+    return plan
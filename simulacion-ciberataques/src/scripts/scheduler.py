@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+"""
+Planificador de grafos de dependencias para la ejecución concurrente de tareas.
+
+Este módulo proporciona un planificador de grafos acíclicos dirigidos (DAG) que
+ejecuta cada nodo en cuanto todas sus dependencias han finalizado, utilizando un
+pool de hilos de tamaño acotado. Se utiliza para ejecutar en paralelo los pasos y
+técnicas independientes de un escenario de simulación.
+"""
+
+import heapq
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger('run_scenario.scheduler')
+
+STATUS_SUCCESS = "success"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+
+
+class DependencyError(ValueError):
+    """Error en la definición del grafo de dependencias (referencias o ciclos)."""
+
+
+class _Node:
+    """Nodo del grafo de ejecución."""
+
+    def __init__(self, key: str, func: Callable[[], bool], depends_on: List[str], stop_on_failure: bool, order: int):
+        self.key = key
+        self.func = func
+        self.depends_on = depends_on
+        self.stop_on_failure = stop_on_failure
+        self.order = order
+
+
+class DagScheduler:
+    """Ejecuta un grafo de tareas respetando dependencias sobre un pool de hilos acotado."""
+
+    def __init__(self, max_workers: int = 1):
+        """
+        Inicializa el planificador.
+
+        Args:
+            max_workers: Número máximo de nodos ejecutándose simultáneamente
+        """
+        self.max_workers = max(1, int(max_workers))
+        self._nodes: Dict[str, _Node] = {}
+
+    def add_node(self, key: str, func: Callable[[], bool], depends_on: Iterable[str] = (),
+                 stop_on_failure: bool = False) -> None:
+        """
+        Añade un nodo al grafo.
+
+        Args:
+            key: Identificador único del nodo
+            func: Función sin argumentos que ejecuta el nodo y devuelve True si tuvo éxito
+            depends_on: Identificadores de los nodos que deben finalizar antes
+            stop_on_failure: Si un fallo del nodo debe cancelar todos sus descendientes
+        """
+        if key in self._nodes:
+            raise DependencyError(f"Nodo duplicado en el grafo de ejecución: {key}")
+        self._nodes[key] = _Node(key, func, list(dict.fromkeys(depends_on)), stop_on_failure, len(self._nodes))
+
+    def _dependents(self) -> Dict[str, List[str]]:
+        """Construye el mapa inverso nodo -> nodos que dependen de él."""
+        dependents: Dict[str, List[str]] = {key: [] for key in self._nodes}
+        for node in self._nodes.values():
+            for dep in node.depends_on:
+                dependents[dep].append(node.key)
+        return dependents
+
+    def validate(self) -> None:
+        """
+        Verifica que todas las dependencias existan y que el grafo no contenga ciclos.
+
+        Raises:
+            DependencyError: Si hay referencias desconocidas o ciclos
+        """
+        for node in self._nodes.values():
+            for dep in node.depends_on:
+                if dep not in self._nodes:
+                    raise DependencyError(f"El nodo '{node.key}' depende de '{dep}', que no existe")
+
+        # Algoritmo de Kahn: si no se pueden visitar todos los nodos hay un ciclo
+        pending = {key: len(node.depends_on) for key, node in self._nodes.items()}
+        dependents = self._dependents()
+        queue = [key for key, count in pending.items() if count == 0]
+        visited = 0
+        while queue:
+            key = queue.pop()
+            visited += 1
+            for dependent in dependents[key]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    queue.append(dependent)
+
+        if visited != len(self._nodes):
+            cyclic = sorted(key for key, count in pending.items() if count > 0)
+            raise DependencyError(f"Dependencias cíclicas entre: {', '.join(cyclic)}")
+
+    def descendants(self, key: str) -> Set[str]:
+        """
+        Obtiene todos los nodos que dependen directa o indirectamente de un nodo.
+
+        Args:
+            key: Identificador del nodo
+
+        Returns:
+            Conjunto de identificadores de los nodos descendientes
+        """
+        dependents = self._dependents()
+        result: Set[str] = set()
+        stack = list(dependents.get(key, []))
+        while stack:
+            current = stack.pop()
+            if current not in result:
+                result.add(current)
+                stack.extend(dependents[current])
+        return result
+
+    def run(self, on_interrupt: Optional[Callable[[], None]] = None,
+            on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, str]:
+        """
+        Ejecuta el grafo completo.
+
+        Los nodos listos se lanzan en orden de declaración. Cuando un nodo con
+        stop_on_failure falla, se omiten únicamente sus descendientes; el resto
+        del grafo continúa ejecutándose.
+
+        Args:
+            on_interrupt: Función invocada si la ejecución se interrumpe (Ctrl+C),
+                antes de esperar a los nodos en curso, para poder cancelarlos
+            on_progress: Función invocada en cada ronda de planificación con el número
+                de nodos listos a la espera de un trabajador y de nodos en ejecución
+
+        Returns:
+            Diccionario con el estado final de cada nodo (success, failed o skipped)
+        """
+        self.validate()
+
+        dependents = self._dependents()
+        remaining = {key: set(node.depends_on) for key, node in self._nodes.items()}
+        status: Dict[str, str] = {}
+        ready: List = []
+        for key, deps in remaining.items():
+            if not deps:
+                heapq.heappush(ready, (self._nodes[key].order, key))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running: Dict[Future, str] = {}
+
+            while ready or running:
+                # Solo se envían tantos nodos como trabajadores haya, para que
+                # una cancelación no encuentre trabajo ya encolado en el pool
+                while ready and len(running) < self.max_workers:
+                    _, key = heapq.heappop(ready)
+                    if key in status:
+                        continue
+                    running[pool.submit(self._nodes[key].func)] = key
+
+                if on_progress:
+                    on_progress(len(ready), len(running))
+
+                if not running:
+                    break
+
+                try:
+                    done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                except KeyboardInterrupt:
+                    logger.warning("Ejecución interrumpida; cancelando los nodos en curso")
+                    if on_interrupt:
+                        on_interrupt()
+                    raise
+
+                for future in done:
+                    key = running.pop(future)
+                    node = self._nodes[key]
+                    try:
+                        success = bool(future.result())
+                    except Exception as e:
+                        logger.error(f"Error no controlado en el nodo '{key}': {e}")
+                        success = False
+
+                    status[key] = STATUS_SUCCESS if success else STATUS_FAILED
+
+                    if not success and node.stop_on_failure:
+                        skipped = [d for d in self.descendants(key) if d not in status]
+                        for dependent in skipped:
+                            status[dependent] = STATUS_SKIPPED
+                        if skipped:
+                            logger.debug(f"Nodo '{key}' falló; se omiten {len(skipped)} nodos dependientes")
+
+                    for dependent in dependents[key]:
+                        remaining[dependent].discard(key)
+                        if not remaining[dependent] and dependent not in status:
+                            heapq.heappush(ready, (self._nodes[dependent].order, dependent))
+
+        return status
@@ -15,7 +15,33 @@ Opciones:
     --config ARCHIVO     Archivo YAML con la configuración del entorno
     --verbose            Mostrar información detallada durante la ejecución
     --dry-run            Mostrar acciones sin ejecutarlas
-    --force              Forzar la recreación del entorno si ya existe
+    --force              Ignorar el estado guardado y volver a aplicar toda la configuración
+    --vm-parallel N      Número máximo de máquinas virtuales que arrancan a la vez (por
+                         defecto, las que quepan en las CPUs y la memoria del host según
+                         los campos memory y cpus de cada máquina)
+    --cache-dir DIR      Directorio de la caché de artefactos (por defecto, cache_dir de la
+                         configuración o ~/.cache/simulacion-ciberataques)
+    --no-cache           Instalar las herramientas sin la caché de artefactos
+    --plan               Mostrar los cambios pendientes respecto al estado aplicado sin
+                         aplicarlos (código de salida 1 si hay cambios)
+    --max-parallel N     Número máximo de tareas de configuración simultáneas (por
+                         defecto, todas las que sean independientes; 1 = en secuencia)
+
+La configuración se ejecuta como un grafo de tareas: la red y las máquinas
+virtuales, la instalación de herramientas y la generación de escenarios dependen
+solo de la verificación de prerrequisitos, por lo que, por ejemplo, las imágenes
+Docker se descargan mientras arrancan las máquinas virtuales. Al terminar se
+muestra el tiempo de cada tarea.
+
+Lo aplicado se registra en el archivo .setup_state.json del directorio de trabajo,
+junto con la huella de la configuración que lo produjo. Al volver a ejecutar el
+script solo se aplica la diferencia (máquinas virtuales nuevas o modificadas,
+herramientas añadidas, escenarios editados...) y se corrige la deriva detectada.
+
+Las herramientas git, Docker y pip se instalan a través de una caché local de
+artefactos compartida entre entornos (réplicas de repositorios, imágenes fijadas por
+digest y wheels), de modo que las reconstrucciones no vuelven a descargarlo todo y
+funcionan sin red una vez que la caché está completa (ver artifact_cache.py).
 """
 
 import argparse
@@ -25,8 +51,13 @@ import subprocess
 import sys
 import time
 import yaml
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+from artifact_cache import DEFAULT_CACHE_DIR, ArtifactCache
+from scheduler import STATUS_FAILED, STATUS_SKIPPED, STATUS_SUCCESS, DagScheduler
+from setup_state import ITEM_SECTIONS, STATE_FILE, SetupState
 
 # Configuración del logger
 logging.basicConfig(
@@ -38,10 +69,62 @@ logging.basicConfig(
 )
 logger = logging.getLogger('setup_environment')
 
+# Descargas de imágenes Docker simultáneas durante la instalación de herramientas
+DOCKER_PULL_WORKERS = 4
+
+# Caja de Vagrant de las máquinas virtuales que no indican ninguna
+DEFAULT_BOX = 'ubuntu/focal64'
+
+# Memoria del host (MB) que no se asigna a las máquinas virtuales que arrancan en paralelo
+HOST_MEMORY_RESERVE_MB = 2048
+
+
+def host_resources() -> Tuple[int, int]:
+    """
+    Obtiene los recursos del host.
+    
+    Returns:
+        Tupla con (número de CPUs, memoria física en MB; 0 si no se pudo determinar)
+    """
+    try:
+        memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        memory = 0
+    return os.cpu_count() or 1, memory
+
+
+def vm_resources(vm: Dict[str, Any]) -> Tuple[int, int]:
+    """
+    Obtiene la memoria y las CPUs de una máquina virtual de la configuración.
+    
+    Args:
+        vm: Definición de la máquina virtual
+        
+    Returns:
+        Tupla con (memoria en MB, número de CPUs)
+        
+    Raises:
+        ValueError: Si alguno de los campos no es un número entero positivo
+    """
+    values = []
+    for field, default in (('memory', 1024), ('cpus', 1)):
+        value = vm.get(field, default)
+        try:
+            number = int(str(value).strip()) if not isinstance(value, bool) else 0
+        except ValueError:
+            number = 0
+        if number <= 0:
+            raise ValueError(f"valor de {field} no válido: {value!r} (se espera un número entero positivo)")
+        values.append(number)
+    return values[0], values[1]
+    
+
 class EnvironmentSetup:
     """Clase para configurar el entorno de simulación de ciberataques."""
     
-    def __init__(self, config_file: str, verbose: bool = False, dry_run: bool = False, force: bool = False):
+    def __init__(self, config_file: str, verbose: bool = False, dry_run: bool = False, force: bool = False,
+                 max_parallel: Optional[int] = None, vm_parallel: Optional[int] = None,
+                 cache_dir: Optional[str] = None, use_cache: bool = True):
         """
         Inicializa la configuración del entorno.
         
@@ -50,18 +133,35 @@ class EnvironmentSetup:
             verbose: Si se debe mostrar información detallada
             dry_run: Si se deben mostrar acciones sin ejecutarlas
             force: Si se debe forzar la recreación del entorno
+            max_parallel: Número máximo de tareas de configuración simultáneas (por
+                defecto, todas las independientes)
+            vm_parallel: Número máximo de máquinas virtuales que arrancan a la vez (por
+                defecto, las que quepan en las CPUs y la memoria del host)
+            cache_dir: Directorio de la caché de artefactos (por defecto, el indicado en
+                `cache_dir` de la configuración o ~/.cache/simulacion-ciberataques)
+            use_cache: Si las herramientas git, Docker y pip se instalan a través de la caché
         """
         self.config_file = config_file
         self.verbose = verbose
         self.dry_run = dry_run
         self.force = force
+        self.max_parallel = max(1, max_parallel) if max_parallel else None
+        self.vm_parallel = max(1, vm_parallel) if vm_parallel else None
+        self.vm_results: Dict[str, Dict[str, Any]] = {}
         self.config = {}
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self.state: Optional[SetupState] = None
         
         if verbose:
             logger.setLevel(logging.DEBUG)
             
         self._load_config()
         
+        self.cache: Optional[ArtifactCache] = None
+        if use_cache:
+            self.cache = ArtifactCache(cache_dir or self.config.get('cache_dir') or DEFAULT_CACHE_DIR,
+                                       self._run_command, dry_run=dry_run)
+        
     def _load_config(self) -> None:
         """Carga la configuración desde el archivo YAML."""
         try:
@@ -75,13 +175,16 @@ class EnvironmentSetup:
             logger.error(f"Error al parsear el archivo YAML: {e}")
             sys.exit(1)
             
-    def _run_command(self, command: List[str], cwd: Optional[str] = None) -> subprocess.CompletedProcess:
+    def _run_command(self, command: List[str], cwd: Optional[str] = None,
+                     quiet: bool = False) -> subprocess.CompletedProcess:
         """
         Ejecuta un comando del sistema.
         
         Args:
             command: Lista con el comando y sus argumentos
             cwd: Directorio de trabajo para el comando
+            quiet: Si un fallo es un resultado esperado (por ejemplo, al comprobar si
+                algo existe) y solo se registra en modo detallado
             
         Returns:
             Resultado de la ejecución del comando
@@ -105,6 +208,9 @@ class EnvironmentSetup:
                 logger.debug(f"Salida: {result.stdout}")
             return result
         except subprocess.CalledProcessError as e:
+            if quiet:
+                logger.debug(f"El comando terminó con código {e.returncode}: {cmd_str}")
+                raise
             logger.error(f"Error al ejecutar comando: {cmd_str}")
             logger.error(f"Código de salida: {e.returncode}")
             logger.error(f"Salida de error: {e.stderr}")
@@ -156,10 +262,51 @@ class EnvironmentSetup:
         logger.info("Todos los prerrequisitos cumplidos")
         return True
         
+    def _record(self, section: str, applied: List[Dict[str, Any]] = (), removed: List[str] = ()) -> None:
+        """Registra en el estado los elementos aplicados y eliminados de una sección y lo guarda."""
+        if self.state is None or self.dry_run:
+            return
+        self.state.record(section, applied, removed)
+        self.state.save()
+        
+    def _pending(self, section: str, present: Optional[Callable[[Dict[str, Any]], bool]] = None
+                 ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Calcula los elementos de una sección que hay que aplicar.
+        
+        Sin estado (por ejemplo, al llamar a los métodos directamente) se aplican
+        todos los elementos de la configuración.
+        
+        Args:
+            section: Sección de la configuración (virtual_machines, tools o scenarios)
+            present: Función que comprueba si un elemento ya aplicado sigue presente en
+                el sistema; los que no lo están se vuelven a aplicar (deriva)
+                
+        Returns:
+            Tupla con (elementos que hay que aplicar, nombres de los elementos eliminados
+            de la configuración desde la última aplicación)
+        """
+        items = self.config.get(section, []) or []
+        if self.state is None:
+            return list(items), []
+            
+        pending, removed = self.state.delta(section, items)
+        if present is not None and not self.dry_run:
+            drifted = [item for item in items if item.get('name') and item not in pending
+                       and item['name'] in self.state.items[section] and not present(item)]
+            for item in drifted:
+                logger.warning(f"Deriva detectada: {item['name']} ya no está presente; se vuelve a aplicar")
+            pending += drifted
+        return pending, removed
+        
     def setup_network(self) -> bool:
         """
         Configura la red para el entorno de simulación.
         
+        Si la red ya se creó con la misma configuración y sigue existiendo, no se
+        modifica; si la configuración cambió, se elimina la red anterior y se crea
+        de nuevo.
+        
         Returns:
             True si la configuración fue exitosa, False en caso contrario
         """
@@ -169,7 +316,23 @@ class EnvironmentSetup:
         network_name = network_config.get('name', 'cyberattack_sim')
         subnet = network_config.get('subnet', '192.168.56.0/24')
         
+        if self.state is not None and not self.state.network_changed(network_config):
+            try:
+                self._run_command(['docker', 'network', 'inspect', network_name], quiet=True)
+                logger.info(f"Red {network_name} sin cambios")
+                return True
+            except Exception:
+                logger.warning(f"Deriva detectada: la red {network_name} ya no existe; se vuelve a crear")
+                
         try:
+            # Eliminar la red creada con una configuración anterior
+            previous = (self.state.network or {}).get("name") if self.state is not None else None
+            if previous:
+                try:
+                    self._run_command(['docker', 'network', 'rm', previous])
+                except Exception:
+                    logger.debug(f"No se pudo eliminar la red anterior {previous}")
+                    
             # Crear red Docker
             self._run_command([
                 'docker', 'network', 'create',
@@ -182,33 +345,92 @@ class EnvironmentSetup:
                 logger.info("Configurando reglas de firewall para aislar la red...")
                 # Aquí irían comandos para configurar iptables o ufw
                 
+            if self.state is not None and not self.dry_run:
+                self.state.record_network(network_config, network_name)
+                self.state.save()
             logger.info(f"Red {network_name} configurada correctamente")
             return True
         except Exception as e:
             logger.error(f"Error al configurar la red: {e}")
             return False
             
+    def _running_vms(self, vagrant_dir: Path) -> Optional[List[str]]:
+        """
+        Obtiene las máquinas virtuales en ejecución según Vagrant.
+        
+        Returns:
+            Nombres de las máquinas en ejecución, o None si no se pudo consultar
+        """
+        try:
+            result = self._run_command(['vagrant', 'status', '--machine-readable'], cwd=str(vagrant_dir), quiet=True)
+        except Exception:
+            return None
+        running = []
+        for line in result.stdout.splitlines():
+            fields = line.split(',')
+            if len(fields) >= 4 and fields[2] == 'state' and fields[3] == 'running':
+                running.append(fields[1])
+        return running
+        
     def setup_virtual_machines(self) -> bool:
         """
         Configura las máquinas virtuales para el entorno de simulación.
         
+        Solo se actúa sobre la diferencia con el estado aplicado: se arrancan las
+        máquinas nuevas o que ya no están en ejecución, se recargan las modificadas
+        y se destruyen las eliminadas de la configuración. Las máquinas se arrancan
+        en paralelo, cada una con su propio `vagrant up <nombre>`; si alguna falla,
+        las demás terminan igualmente y solo ella se reintenta en la próxima ejecución.
+        
         Returns:
             True si la configuración fue exitosa, False en caso contrario
         """
         logger.info("Configurando máquinas virtuales...")
         
         vms = self.config.get('virtual_machines', [])
+        vagrant_dir = Path(self.config.get('workspace_dir', '.')) / 'vagrant'
+        vagrantfile_path = vagrant_dir / 'Vagrantfile'
+        
+        running = None
+        if self.state is not None and self.state.items['virtual_machines'] and vagrantfile_path.exists():
+            running = self._running_vms(vagrant_dir)
+        pending, removed = self._pending(
+            'virtual_machines', None if running is None else (lambda vm: vm['name'] in running))
+        
+        try:
+            # Destruir las máquinas eliminadas con el Vagrantfile anterior, que aún las define
+            if removed and vagrantfile_path.exists():
+                logger.info(f"Destruyendo máquinas virtuales eliminadas de la configuración: {', '.join(removed)}")
+                self._run_command(['vagrant', 'destroy', '-f'] + removed, cwd=str(vagrant_dir))
+            self._record('virtual_machines', removed=removed)
+        except Exception as e:
+            logger.error(f"Error al destruir las máquinas virtuales eliminadas: {e}")
+            return False
+            
         if not vms:
             logger.warning("No se encontraron definiciones de máquinas virtuales en la configuración")
             return True
+        if not pending:
+            logger.info("Máquinas virtuales sin cambios")
+            return True
             
+        # Las máquinas con memoria o CPUs no válidas se excluyen del Vagrantfile y fallan por separado
+        invalid: Dict[str, Dict[str, Any]] = {}
+        for vm in vms:
+            try:
+                vm_resources(vm)
+            except ValueError as e:
+                logger.error(f"Máquina virtual {vm.get('name', 'default')}: {e}")
+                invalid[vm.get('name', 'default')] = {"action": "validate", "status": STATUS_FAILED,
+                                                      "seconds": 0.0, "error": str(e)}
+        vms = [vm for vm in vms if vm.get('name', 'default') not in invalid]
+        pending = [vm for vm in pending if vm['name'] not in invalid]
+        
         # Crear directorio para Vagrantfile
-        vagrant_dir = Path(self.config.get('workspace_dir', '.')) / 'vagrant'
         os.makedirs(vagrant_dir, exist_ok=True)
         
         # Generar Vagrantfile
         vagrantfile_content = self._generate_vagrantfile(vms)
-        vagrantfile_path = vagrant_dir / 'Vagrantfile'
         
         if self.dry_run:
             logger.info(f"[DRY RUN] Se generaría el siguiente Vagrantfile en {vagrantfile_path}:")
@@ -217,15 +439,157 @@ class EnvironmentSetup:
             with open(vagrantfile_path, 'w') as f:
                 f.write(vagrantfile_content)
                 
-        # Iniciar las máquinas virtuales
+        # Iniciar las máquinas nuevas y recargar las modificadas que ya estaban aplicadas
+        applied = self.state.items['virtual_machines'] if self.state is not None else {}
+        actions = [(vm, 'reload' if vm['name'] in applied and (running is None or vm['name'] in running) else 'up')
+                   for vm in pending]
+        self.vm_results = dict(self._bring_up_vms(actions, vagrant_dir) if actions else {}, **invalid)
+        
+        logger.info(f"  {'Máquina':<20} {'Acción':<8} {'Estado':<8} {'Duración (s)':>13}")
+        for name, result in self.vm_results.items():
+            logger.info(f"  {name:<20} {result['action']:<8} {result['status']:<8} {result['seconds']:>13.1f}")
+        failed = [name for name, result in self.vm_results.items() if result['status'] != STATUS_SUCCESS]
+        if failed:
+            logger.error(f"Error al configurar las máquinas virtuales: {', '.join(failed)} "
+                         f"(se reintentarán en la próxima ejecución)")
+            return False
+        logger.info("Máquinas virtuales configuradas correctamente")
+        return True
+        
+    def _vm_limits(self) -> Tuple[int, int, int]:
+        """
+        Calcula los límites para arrancar máquinas virtuales en paralelo.
+        
+        Returns:
+            Tupla con (máximo de máquinas simultáneas, CPUs disponibles, memoria
+            disponible en MB; 0 si no se pudo determinar)
+        """
+        cpus, memory = host_resources()
+        if memory:
+            memory = max(memory - HOST_MEMORY_RESERVE_MB, 0)
+        return self.vm_parallel or len(self.config.get('virtual_machines', [])) or 1, cpus, memory
+        
+    def _vm_action(self, name: str, action: str, vagrant_dir: Path) -> Dict[str, Any]:
+        """
+        Arranca (up) o recarga (reload) una máquina virtual.
+        
+        Returns:
+            Diccionario con la acción, el estado (success o failed), la duración y el error
+        """
+        command = ['vagrant', 'up', name] if action == 'up' else ['vagrant', 'reload', '--provision', name]
+        logger.info(f"Máquina virtual {name}: {action}...")
+        start = time.monotonic()
         try:
-            self._run_command(['vagrant', 'up'], cwd=str(vagrant_dir))
-            logger.info("Máquinas virtuales configuradas correctamente")
-            return True
+            self._run_command(command, cwd=str(vagrant_dir))
+            status, error = STATUS_SUCCESS, ""
         except Exception as e:
-            logger.error(f"Error al configurar las máquinas virtuales: {e}")
-            return False
+            status, error = STATUS_FAILED, str(e)
+        return {"action": action, "status": status, "seconds": time.monotonic() - start, "error": error}
+        
+    def _add_boxes(self, vms: List[Dict[str, Any]], vagrant_dir: Path) -> Dict[str, str]:
+        """
+        Añade, de una en una, las cajas de Vagrant que aún no están instaladas.
+        
+        Args:
+            vms: Máquinas virtuales que se van a arrancar
+            vagrant_dir: Directorio del Vagrantfile
+            
+        Returns:
+            Diccionario caja -> error, con las cajas que no se pudieron añadir
+        """
+        boxes = list(dict.fromkeys(vm.get('box', DEFAULT_BOX) for vm in vms))
+        if not boxes:
+            return {}
+        installed = set()
+        try:
+            result = self._run_command(['vagrant', 'box', 'list', '--machine-readable'], cwd=str(vagrant_dir),
+                                       quiet=True)
+            for line in result.stdout.splitlines():
+                fields = line.split(',')
+                if len(fields) >= 4 and fields[2] == 'box-name':
+                    installed.add(fields[3])
+        except Exception:
+            logger.debug("No se pudo obtener la lista de cajas de Vagrant")
             
+        errors = {}
+        for box in boxes:
+            if box in installed:
+                continue
+            logger.info(f"Añadiendo la caja de Vagrant {box}...")
+            try:
+                self._run_command(['vagrant', 'box', 'add', box, '--provider', 'virtualbox'], cwd=str(vagrant_dir))
+            except Exception as e:
+                errors[box] = str(e)
+        return errors
+        
+    def _bring_up_vms(self, actions: List[Tuple[Dict[str, Any], str]], vagrant_dir: Path) -> Dict[str, Dict[str, Any]]:
+        """
+        Arranca o recarga varias máquinas virtuales en paralelo.
+        
+        Las máquinas se lanzan en orden de configuración mientras la suma de la
+        memoria (`memory`) y las CPUs (`cpus`) de las que están arrancando quepa en
+        el host; una máquina que no cabe espera a que termine otra (si no hay
+        ninguna en curso, se lanza igualmente). Cada máquina que termina con éxito
+        se registra en el estado, de modo que una ejecución posterior solo
+        reintenta las que fallaron. Antes se añaden en secuencia las cajas que
+        faltan; las máquinas cuya caja no se pudo añadir fallan sin arrancarse.
+        
+        Args:
+            actions: Lista de tuplas (máquina, acción), con acción 'up' o 'reload'
+            vagrant_dir: Directorio del Vagrantfile
+            
+        Returns:
+            Diccionario nombre de la máquina -> resultado (acción, estado, duración y error)
+        """
+        limit, cpu_budget, memory_budget = self._vm_limits()
+        results: Dict[str, Dict[str, Any]] = {}
+        
+        # Las cajas se descargan antes, de una en una: varios `vagrant up` simultáneos
+        # que necesitan la misma caja compiten por el bloqueo de descarga de Vagrant
+        box_errors = self._add_boxes([vm for vm, action in actions if action == 'up'], vagrant_dir)
+        queue = []
+        for vm, action in actions:
+            box = vm.get('box', DEFAULT_BOX)
+            if action == 'up' and box in box_errors:
+                results[vm['name']] = {"action": action, "status": STATUS_FAILED, "seconds": 0.0,
+                                       "error": f"no se pudo añadir la caja {box}: {box_errors[box]}"}
+                logger.error(f"Error al configurar la máquina virtual {vm['name']}: {results[vm['name']]['error']}")
+            else:
+                queue.append((vm, action))
+                
+        logger.info(f"Configurando {len(queue)} máquinas virtuales (hasta {limit} a la vez; host: "
+                    f"{cpu_budget} CPUs, {memory_budget or '?'} MB disponibles)")
+        running: Dict[Future, Tuple[Dict[str, Any], int, int]] = {}
+        used_memory = used_cpus = 0
+        with ThreadPoolExecutor(max_workers=max(1, min(limit, len(queue)))) as pool:
+            while queue or running:
+                while queue and len(running) < limit:
+                    vm, action = queue[0]
+                    memory, cpus = vm_resources(vm)
+                    if running and (used_cpus + cpus > cpu_budget or
+                                    (memory_budget and used_memory + memory > memory_budget)):
+                        break
+                    queue.pop(0)
+                    used_memory += memory
+                    used_cpus += cpus
+                    running[pool.submit(self._vm_action, vm['name'], action, vagrant_dir)] = (vm, memory, cpus)
+                    
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    vm, memory, cpus = running.pop(future)
+                    used_memory -= memory
+                    used_cpus -= cpus
+                    results[vm['name']] = future.result()
+                    if results[vm['name']]['status'] == STATUS_SUCCESS:
+                        self._record('virtual_machines', applied=[vm])
+                    else:
+                        logger.error(f"Error al configurar la máquina virtual {vm['name']}: "
+                                     f"{results[vm['name']]['error']}")
+                        
+        return {vm['name']: results[vm['name']] for vm, _ in actions}
+        
     def _generate_vagrantfile(self, vms: List[Dict[str, Any]]) -> str:
         """
         Genera el contenido del Vagrantfile para las máquinas virtuales.
@@ -245,7 +609,7 @@ class EnvironmentSetup:
         
         for vm in vms:
             name = vm.get('name', 'default')
-            box = vm.get('box', 'ubuntu/focal64')
+            box = vm.get('box', DEFAULT_BOX)
             ip = vm.get('ip', '')
             memory = vm.get('memory', 1024)
             cpus = vm.get('cpus', 1)
@@ -291,78 +655,220 @@ class EnvironmentSetup:
         vagrantfile.append('end')
         return '\n'.join(vagrantfile)
         
+    def _install_batch(self, method: str, install: Callable[[List[str]], Any], tools: List[Dict[str, Any]],
+                       failures: Dict[str, str]) -> None:
+        """
+        Instala los paquetes de varias herramientas con un único comando.
+        
+        Si el comando conjunto falla, se repite por herramienta para atribuir el
+        error solo a las herramientas cuyos paquetes no se pueden instalar.
+        
+        Args:
+            method: Método de instalación (para los mensajes)
+            install: Función que instala una lista de paquetes y lanza una excepción si falla
+            tools: Herramientas del método, con sus paquetes
+            failures: Diccionario herramienta -> error en el que se registran los fallos
+        """
+        tools = [tool for tool in tools if tool.get('packages')]
+        packages = list(dict.fromkeys(p for tool in tools for p in tool['packages']))
+        if not packages:
+            return
+        logger.info(f"Instalando {len(packages)} paquetes {method} de {len(tools)} herramientas: "
+                    f"{', '.join(tool['name'] for tool in tools)}")
+        try:
+            install(packages)
+            return
+        except Exception as e:
+            if len(tools) == 1:
+                failures[tools[0]['name']] = str(e)
+                return
+            logger.warning(f"La instalación conjunta de paquetes {method} falló; reintentando por herramienta")
+            
+        for tool in tools:
+            try:
+                install(tool['packages'])
+            except Exception as e:
+                failures[tool['name']] = str(e)
+                
+    def _pip_install(self, packages: List[str]) -> None:
+        """Instala paquetes de pip, desde la caché de wheels si está habilitada."""
+        if self.cache is not None:
+            self.cache.pip_install(packages)
+        else:
+            self._run_command(['pip', 'install'] + packages)
+            
+    def _tool_present(self, tool: Dict[str, Any]) -> bool:
+        """
+        Comprueba si una herramienta ya instalada sigue presente en el sistema.
+        
+        Solo se comprueban los repositorios git y las imágenes Docker; para el resto
+        de métodos se confía en el estado aplicado.
+        """
+        install_method = tool.get('install_method', '')
+        if install_method == 'git':
+            return os.path.isdir(tool.get('destination', ''))
+        if install_method == 'docker' and tool.get('image'):
+            # La caché reconoce también las imágenes cargadas sin su digest
+            if self.cache is not None:
+                return self.cache.image_present(tool['image'])
+            try:
+                self._run_command(['docker', 'image', 'inspect', tool['image']], quiet=True)
+            except Exception:
+                return False
+        return True
+        
+    def _install_tool(self, tool: Dict[str, Any]) -> None:
+        """
+        Instala una herramienta que no admite instalación por lotes (git, docker o custom).
+        
+        Raises:
+            Exception: Si alguno de los comandos de instalación falla
+        """
+        install_method = tool['install_method']
+        if install_method == 'git':
+            repo = tool.get('repo', '')
+            dest = tool.get('destination', '')
+            if repo and dest:
+                if self.cache is not None:
+                    self.cache.checkout(repo, dest)
+                else:
+                    self._run_command(['git', 'clone', repo, dest])
+                
+                # Ejecutar comandos post-instalación si existen
+                post_install = tool.get('post_install', [])
+                for cmd in post_install:
+                    self._run_command(cmd.split(), cwd=dest)
+        elif install_method == 'docker':
+            image = tool.get('image', '')
+            if image:
+                if self.cache is not None:
+                    self.cache.pull_image(image)
+                else:
+                    self._run_command(['docker', 'pull', image])
+        elif install_method == 'custom':
+            commands = tool.get('commands', [])
+            for cmd in commands:
+                self._run_command(cmd.split())
+                
     def install_tools(self) -> bool:
         """
         Instala las herramientas necesarias para la simulación de ciberataques.
         
+        Primero se planifican todas las herramientas: los paquetes apt se instalan
+        con un único `apt-get update` y un único `apt-get install`, los paquetes pip
+        con un único `pip install`, y las imágenes Docker se descargan en paralelo
+        mientras tanto. Los fallos se atribuyen a cada herramienta, y la instalación
+        solo falla si no se pudo instalar alguna herramienta marcada como `required`.
+        
         Returns:
             True si la instalación fue exitosa, False en caso contrario
         """
         logger.info("Instalando herramientas para simulación de ciberataques...")
         
-        tools = self.config.get('tools', [])
-        if not tools:
+        if not self.config.get('tools', []):
             logger.warning("No se encontraron herramientas para instalar en la configuración")
+            self._record('tools', removed=list(self.state.items['tools']) if self.state is not None else [])
             return True
             
-        for tool in tools:
-            name = tool.get('name', '')
-            install_method = tool.get('install_method', '')
+        tools, removed = self._pending('tools', self._tool_present)
+        self._record('tools', removed=removed)
+        if not tools:
+            logger.info("Herramientas sin cambios")
+            return True
             
-            if not name or not install_method:
+        # Planificar la instalación agrupando las herramientas por método
+        plan: Dict[str, List[Dict[str, Any]]] = {}
+        for tool in tools:
+            if not tool.get('name', '') or not tool.get('install_method', ''):
                 continue
+            plan.setdefault(tool['install_method'], []).append(tool)
+            
+        failures: Dict[str, str] = {}
+        docker_tools = plan.get('docker', [])
+        with ThreadPoolExecutor(max_workers=max(1, min(DOCKER_PULL_WORKERS, len(docker_tools)))) as pool:
+            pulls = {tool['name']: pool.submit(self._install_tool, tool) for tool in docker_tools}
+            if pulls:
+                logger.info(f"Descargando {len(pulls)} imágenes Docker en paralelo...")
                 
-            logger.info(f"Instalando {name}...")
+            apt_tools = [tool for tool in plan.get('apt', []) if tool.get('packages')]
+            if apt_tools:
+                try:
+                    self._run_command(['apt-get', 'update'])
+                except Exception as e:
+                    for tool in apt_tools:
+                        failures[tool['name']] = str(e)
+                    apt_tools = []
+                self._install_batch('apt', lambda packages: self._run_command(['apt-get', 'install', '-y'] + packages),
+                                    apt_tools, failures)
+                
+            self._install_batch('pip', self._pip_install, plan.get('pip', []), failures)
             
-            try:
-                if install_method == 'apt':
-                    packages = tool.get('packages', [])
-                    if packages:
-                        self._run_command(['apt-get', 'update'])
-                        self._run_command(['apt-get', 'install', '-y'] + packages)
-                elif install_method == 'pip':
-                    packages = tool.get('packages', [])
-                    if packages:
-                        self._run_command(['pip', 'install'] + packages)
-                elif install_method == 'git':
-                    repo = tool.get('repo', '')
-                    dest = tool.get('destination', '')
-                    if repo and dest:
-                        self._run_command(['git', 'clone', repo, dest])
-                        
-                        # Ejecutar comandos post-instalación si existen
-                        post_install = tool.get('post_install', [])
-                        for cmd in post_install:
-                            self._run_command(cmd.split(), cwd=dest)
-                elif install_method == 'docker':
-                    image = tool.get('image', '')
-                    if image:
-                        self._run_command(['docker', 'pull', image])
-                elif install_method == 'custom':
-                    commands = tool.get('commands', [])
-                    for cmd in commands:
-                        self._run_command(cmd.split())
-            except Exception as e:
-                logger.error(f"Error al instalar {name}: {e}")
+            for tool in plan.get('git', []) + plan.get('custom', []):
+                logger.info(f"Instalando {tool['name']}...")
+                try:
+                    self._install_tool(tool)
+                except Exception as e:
+                    failures[tool['name']] = str(e)
+                    
+            for name, future in pulls.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    failures[name] = str(e)
+                    
+        self._record('tools', applied=[tool for tool in tools if tool.get('name') not in failures])
+        
+        required_failed = []
+        for tool in tools:
+            name = tool.get('name', '')
+            if name in failures:
+                logger.error(f"Error al instalar {name}: {failures[name]}")
                 if tool.get('required', False):
-                    return False
+                    required_failed.append(name)
                     
-        logger.info("Herramientas instaladas correctamente")
+        if required_failed:
+            logger.error(f"No se pudieron instalar herramientas requeridas: {', '.join(required_failed)}")
+            return False
+        if failures:
+            logger.warning(f"Herramientas instaladas con {len(failures)} errores en herramientas opcionales")
+        else:
+            logger.info("Herramientas instaladas correctamente")
         return True
         
+    def _scenario_file(self, name: str) -> Path:
+        """Ruta del archivo YAML generado para un escenario."""
+        scenarios_dir = Path(self.config.get('workspace_dir', '.')) / 'escenarios'
+        return scenarios_dir / f"{name.lower().replace(' ', '_')}.yaml"
+        
     def configure_scenarios(self) -> bool:
         """
         Configura los escenarios de ataque para la simulación.
         
+        Solo se escriben los escenarios nuevos, modificados o cuyo archivo ha
+        desaparecido, y se eliminan los archivos de los escenarios que ya no están
+        en la configuración.
+        
         Returns:
             True si la configuración fue exitosa, False en caso contrario
         """
         logger.info("Configurando escenarios de ataque...")
         
-        scenarios = self.config.get('scenarios', [])
-        if not scenarios:
+        scenarios, removed = self._pending('scenarios', lambda scenario: self._scenario_file(scenario['name']).exists())
+        for name in removed:
+            scenario_file = self._scenario_file(name)
+            if self.dry_run:
+                logger.info(f"[DRY RUN] Se eliminaría el archivo de escenario {scenario_file}")
+            elif scenario_file.exists():
+                logger.info(f"Eliminando escenario retirado de la configuración: {name}")
+                scenario_file.unlink()
+        self._record('scenarios', removed=removed)
+        
+        if not self.config.get('scenarios', []):
             logger.warning("No se encontraron escenarios para configurar en la configuración")
             return True
+        if not scenarios:
+            logger.info("Escenarios sin cambios")
+            return True
             
         scenarios_dir = Path(self.config.get('workspace_dir', '.')) / 'escenarios'
         os.makedirs(scenarios_dir, exist_ok=True)
@@ -378,7 +884,7 @@ class EnvironmentSetup:
             logger.info(f"Configurando escenario: {name}")
             
             # Crear archivo YAML para el escenario
-            scenario_file = scenarios_dir / f"{name.lower().replace(' ', '_')}.yaml"
+            scenario_file = self._scenario_file(name)
             
             scenario_data = {
                 'name': name,
@@ -395,51 +901,174 @@ class EnvironmentSetup:
                 with open(scenario_file, 'w') as f:
                     yaml.dump(scenario_data, f, default_flow_style=False)
                     
+        self._record('scenarios', applied=[scenario for scenario in scenarios if scenario.get('name')])
         logger.info("Escenarios configurados correctamente")
         return True
         
+    def _setup_tasks(self) -> List[Tuple[str, Callable[[], bool], List[str]]]:
+        """
+        Define el grafo de tareas de la configuración.
+        
+        Returns:
+            Lista de tuplas (nombre, función, dependencias) en orden de declaración,
+            que es el orden de ejecución cuando no hay paralelismo
+        """
+        return [
+            ("prerequisites", self.check_prerequisites, []),
+            ("network", self.setup_network, ["prerequisites"]),
+            ("virtual_machines", self.setup_virtual_machines, ["network"]),
+            ("tools", self.install_tools, ["prerequisites"]),
+            ("scenarios", self.configure_scenarios, ["prerequisites"])
+        ]
+        
+    def _timed(self, name: str, func: Callable[[], bool]) -> Callable[[], bool]:
+        """Envuelve una tarea para registrar su tiempo en self.timings."""
+        def run() -> bool:
+            start = time.monotonic()
+            try:
+                return func()
+            finally:
+                self.timings[name] = {"start": start, "seconds": time.monotonic() - start}
+        return run
+        
+    def _log_timings(self, status: Dict[str, str], start: float) -> None:
+        """
+        Muestra el desglose de tiempos de las tareas de configuración.
+        
+        Args:
+            status: Estado final de cada tarea
+            start: Instante (time.monotonic) en que empezó la configuración
+        """
+        total = time.monotonic() - start
+        logger.info("Tiempos de la configuración:")
+        logger.info(f"  {'Tarea':<18} {'Estado':<8} {'Inicio (s)':>10} {'Duración (s)':>13}")
+        for name, _, _ in self._setup_tasks():
+            timing = self.timings.get(name)
+            if timing is None:
+                logger.info(f"  {name:<18} {status.get(name, STATUS_SKIPPED):<8} {'-':>10} {'-':>13}")
+            else:
+                logger.info(f"  {name:<18} {status.get(name, STATUS_SKIPPED):<8} "
+                            f"{timing['start'] - start:>10.1f} {timing['seconds']:>13.1f}")
+        busy = sum(timing["seconds"] for timing in self.timings.values())
+        logger.info(f"  Total: {total:.1f}s (suma de las tareas: {busy:.1f}s)")
+        
+    def _load_state(self) -> Optional[SetupState]:
+        """
+        Carga el estado aplicado del directorio de trabajo.
+        
+        Con --force se parte de un estado vacío (conservando el nombre de la red
+        creada, para poder sustituirla), de modo que se vuelve a aplicar todo.
+        
+        Returns:
+            Estado aplicado, o None si el directorio de trabajo existe pero no lo creó
+            este script (no tiene archivo de estado) y no se indicó --force
+        """
+        workspace_dir = str(Path(self.config.get('workspace_dir', '.')))
+        state = SetupState.load(workspace_dir)
+        if self.force:
+            fresh = SetupState(workspace_dir)
+            if state.network:
+                fresh.network = {"name": state.network.get("name")}
+            return fresh
+        if os.path.exists(workspace_dir) and not state.exists():
+            logger.error(f"El directorio de trabajo {workspace_dir} ya existe y no tiene estado de "
+                         f"configuración ({STATE_FILE}). Use --force para recrearlo.")
+            return None
+        return state
+        
+    def plan(self) -> Dict[str, Any]:
+        """
+        Calcula los cambios pendientes respecto al estado aplicado, sin aplicarlos.
+        
+        Returns:
+            Diccionario con si la red cambió y, para cada sección, los elementos que se
+            aplicarían y los que se eliminarían
+        """
+        state = self._load_state()
+        if state is None:
+            state = SetupState(str(Path(self.config.get('workspace_dir', '.'))))
+        changes: Dict[str, Any] = {"network": state.network_changed(self.config.get('network', {}))}
+        for section in ITEM_SECTIONS:
+            pending, removed = state.delta(section, self.config.get(section, []) or [])
+            changes[section] = {"apply": [item['name'] for item in pending], "remove": removed}
+        return changes
+        
     def setup(self) -> bool:
         """
         Configura el entorno completo de simulación.
         
+        Las tareas independientes se ejecutan en paralelo; si una tarea falla, se
+        omiten las que dependen de ella, pero el resto del grafo continúa. Si el
+        entorno ya se configuró, solo se aplican los cambios de la configuración y
+        se corrige la deriva detectada (redes, máquinas, repositorios, imágenes o
+        escenarios que han desaparecido).
+        
         Returns:
             True si la configuración fue exitosa, False en caso contrario
         """
         logger.info("Iniciando configuración del entorno de simulación...")
         
-        # Verificar si el entorno ya existe
-        workspace_dir = Path(self.config.get('workspace_dir', '.'))
-        if workspace_dir.exists() and not self.force:
-            logger.error(f"El directorio de trabajo {workspace_dir} ya existe. Use --force para recrearlo.")
+        # Cargar el estado aplicado para configurar solo la diferencia
+        self.state = self._load_state()
+        if self.state is None:
             return False
             
         # Crear directorio de trabajo
+        workspace_dir = Path(self.config.get('workspace_dir', '.'))
         os.makedirs(workspace_dir, exist_ok=True)
         
-        # Ejecutar pasos de configuración
-        steps = [
-            self.check_prerequisites,
-            self.setup_network,
-            self.setup_virtual_machines,
-            self.install_tools,
-            self.configure_scenarios
-        ]
+        # Ejecutar las tareas de configuración según sus dependencias
+        tasks = self._setup_tasks()
+        scheduler = DagScheduler(max_workers=self.max_parallel or len(tasks))
+        for name, func, depends_on in tasks:
+            scheduler.add_node(name, self._timed(name, func), depends_on=depends_on, stop_on_failure=True)
+            
+        start = time.monotonic()
+        self.timings = {}
+        status = scheduler.run()
+        self._log_timings(status, start)
         
-        for step in steps:
-            if not step():
-                logger.error("Configuración fallida")
-                return False
-                
+        failed = [name for name, _, _ in tasks if status.get(name) != STATUS_SUCCESS]
+        if failed:
+            logger.error(f"Configuración fallida (tareas no completadas: {', '.join(failed)})")
+            return False
+            
         logger.info("Entorno de simulación configurado correctamente")
         return True
         
+def positive_int(value: str) -> int:
+    """
+    Tipo de argparse para opciones que deben ser un número entero positivo.
+
+    Raises:
+        argparse.ArgumentTypeError: Si el valor no es un entero mayor que cero
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"se espera un número entero positivo: {value}")
+    return number
+
+
 def main():
     """Función principal."""
     parser = argparse.ArgumentParser(description='Configurar entorno de simulación de ciberataques')
     parser.add_argument('--config', required=True, help='Archivo YAML con la configuración del entorno')
     parser.add_argument('--verbose', action='store_true', help='Mostrar información detallada durante la ejecución')
     parser.add_argument('--dry-run', action='store_true', help='Mostrar acciones sin ejecutarlas')
-    parser.add_argument('--force', action='store_true', help='Forzar la recreación del entorno si ya existe')
+    parser.add_argument('--force', action='store_true',
+                        help='Ignorar el estado guardado y volver a aplicar toda la configuración')
+    parser.add_argument('--vm-parallel', type=positive_int,
+                        help='Número máximo de máquinas virtuales que arrancan a la vez')
+    parser.add_argument('--cache-dir', help='Directorio de la caché de artefactos')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Instalar las herramientas sin la caché de artefactos')
+    parser.add_argument('--plan', action='store_true',
+                        help='Mostrar los cambios pendientes respecto al estado aplicado sin aplicarlos')
+    parser.add_argument('--max-parallel', type=positive_int,
+                        help='Número máximo de tareas de configuración simultáneas (1 = en secuencia)')
     
     args = parser.parse_args()
     
@@ -447,9 +1076,22 @@ def main():
         config_file=args.config,
         verbose=args.verbose,
         dry_run=args.dry_run,
-        force=args.force
+        force=args.force,
+        max_parallel=args.max_parallel,
+        vm_parallel=args.vm_parallel,
+        cache_dir=args.cache_dir,
+        use_cache=not args.no_cache
     )
     
+    if args.plan:
+        changes = setup.plan()
+        logger.info(f"Red: {'se volverá a crear' if changes['network'] else 'sin cambios'}")
+        for section in ITEM_SECTIONS:
+            apply, remove = changes[section]["apply"], changes[section]["remove"]
+            logger.info(f"{section}: aplicar [{', '.join(apply)}], eliminar [{', '.join(remove)}]")
+        pending = changes['network'] or any(changes[s]["apply"] or changes[s]["remove"] for s in ITEM_SECTIONS)
+        sys.exit(1 if pending else 0)
+        
     success = setup.setup()
     sys.exit(0 if success else 1)
     
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""
+Estado aplicado de un entorno de simulación para la configuración incremental.
+
+El archivo `.setup_state.json` del directorio de trabajo registra qué partes de la
+configuración se han aplicado con éxito y la huella (hash) de la definición con la
+que se aplicaron: la red como una sola unidad y las máquinas virtuales, las
+herramientas y los escenarios elemento a elemento, por su nombre. Al volver a
+ejecutar la configuración solo se aplica la diferencia: los elementos nuevos, los
+que han cambiado y los que se han eliminado de la configuración.
+"""
+
+import datetime
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from checkpoint import fingerprint
+
+logger = logging.getLogger('setup_environment.state')
+
+STATE_FILE = ".setup_state.json"
+STATE_VERSION = 1
+
+# Secciones de la configuración que se aplican elemento a elemento
+ITEM_SECTIONS = ("virtual_machines", "tools", "scenarios")
+
+
+class SetupState:
+    """Estado aplicado de un entorno, persistido en el directorio de trabajo."""
+
+    def __init__(self, workspace_dir: str):
+        """
+        Inicializa el estado.
+
+        Args:
+            workspace_dir: Directorio de trabajo del entorno
+        """
+        self.path = os.path.join(workspace_dir, STATE_FILE)
+        self.network: Optional[Dict[str, str]] = None
+        self.items: Dict[str, Dict[str, str]] = {section: {} for section in ITEM_SECTIONS}
+        self.updated = ""
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, workspace_dir: str) -> "SetupState":
+        """
+        Carga el estado de un directorio de trabajo.
+
+        Args:
+            workspace_dir: Directorio de trabajo del entorno
+
+        Returns:
+            Estado guardado (vacío si no hay archivo o su versión es otra)
+        """
+        state = cls(workspace_dir)
+        try:
+            with open(state.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return state
+        if not isinstance(data, dict) or data.get("version") != STATE_VERSION:
+            logger.warning(f"Estado de la configuración no válido o de otra versión: {state.path}; se ignora")
+            return state
+
+        state.network = data.get("network")
+        state.updated = data.get("updated", "")
+        for section in ITEM_SECTIONS:
+            state.items[section] = dict(data.get(section) or {})
+        return state
+
+    def exists(self) -> bool:
+        """Comprueba si el directorio de trabajo tiene un archivo de estado."""
+        return os.path.exists(self.path)
+
+    def delta(self, section: str, definitions: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Calcula la diferencia entre los elementos configurados y los aplicados.
+
+        Args:
+            section: Sección de la configuración (virtual_machines, tools o scenarios)
+            definitions: Elementos de la sección en la configuración actual
+
+        Returns:
+            Tupla con (elementos nuevos o modificados, nombres de los elementos
+            aplicados que ya no están en la configuración)
+        """
+        applied = self.items[section]
+        pending = [item for item in definitions
+                   if item.get('name') and applied.get(item['name']) != fingerprint(item)]
+        names = {item.get('name') for item in definitions}
+        removed = [name for name in applied if name not in names]
+        return pending, removed
+
+    def network_changed(self, network: Dict[str, Any]) -> bool:
+        """Comprueba si la configuración de la red ha cambiado desde que se aplicó."""
+        return (self.network or {}).get("hash") != fingerprint(network)
+
+    def record_network(self, network: Dict[str, Any], name: str) -> None:
+        """
+        Registra la configuración de red aplicada.
+
+        Args:
+            network: Sección de red de la configuración
+            name: Nombre de la red creada, para poder eliminarla si la configuración cambia
+        """
+        with self._lock:
+            self.network = {"hash": fingerprint(network), "name": name}
+
+    def record(self, section: str, applied: List[Dict[str, Any]] = (), removed: List[str] = ()) -> None:
+        """
+        Registra los elementos aplicados y eliminados de una sección.
+
+        Args:
+            section: Sección de la configuración
+            applied: Elementos aplicados con éxito
+            removed: Nombres de los elementos eliminados
+        """
+        with self._lock:
+            for item in applied:
+                self.items[section][item['name']] = fingerprint(item)
+            for name in removed:
+                self.items[section].pop(name, None)
+
+    def save(self) -> None:
+        """Guarda el estado de forma atómica."""
+        with self._lock:
+            self.updated = datetime.datetime.now().isoformat()
+            data = {"version": STATE_VERSION, "updated": self.updated, "network": self.network}
+            data.update(self.items)
+            tmp_path = f"{self.path}.tmp.{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
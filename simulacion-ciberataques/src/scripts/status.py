@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+
+"""
+Estado en vivo de las ejecuciones y métricas para paneles de seguimiento.
+
+Con `--status-addr`, el ejecutor publica su estado mientras se ejecutan los
+escenarios en un servidor HTTP local, que escucha en un puerto TCP o en un socket
+Unix:
+
+    --status-addr 127.0.0.1:9464        Puerto TCP (0 elige un puerto libre)
+    --status-addr unix:/tmp/simcib.sock Socket Unix
+
+Rutas disponibles:
+
+    /status    JSON con cada ejecución en curso o finalizada: pasos y técnicas en
+               ejecución, nodos listos a la espera de un trabajador, técnicas
+               completadas, fallidas y omitidas, y comandos en curso por objetivo
+    /metrics   Las mismas cifras y los tiempos del ejecutor en el formato de texto
+               de Prometheus, para que los paneles las consulten periódicamente
+
+El estado se actualiza en el propio proceso del ejecutor; en un lote o en modo
+matriz, todas las ejecuciones comparten el mismo servidor y se identifican por su
+directorio de resultados.
+"""
+
+import datetime
+import json
+import logging
+import os
+import socketserver
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('run_scenario.status')
+
+# Límites superiores de los intervalos del histograma de duración de técnicas (segundos)
+DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+UNIX_PREFIX = "unix:"
+
+
+class RunStatus:
+    """Estado compartido de las ejecuciones de un proceso, seguro entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs: Dict[str, Dict[str, Any]] = {}
+        self._running: Dict[str, Dict[Tuple[int, int], Dict[str, Any]]] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._commands: Dict[str, Dict[str, float]] = {}
+        self._buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self._duration_sum = 0.0
+        self._duration_count = 0
+
+    def start_run(self, run_id: str, scenario: str, techniques: int) -> None:
+        """
+        Registra el inicio de una ejecución.
+
+        Args:
+            run_id: Identificador de la ejecución (su directorio de resultados)
+            scenario: Nombre del escenario
+            techniques: Número total de técnicas del escenario
+        """
+        with self._lock:
+            self._runs[run_id] = {
+                "scenario": scenario,
+                "status": "running",
+                "start_time": datetime.datetime.now().isoformat(),
+                "end_time": "",
+                "techniques": techniques,
+                "completed": 0,
+                "failed": 0,
+                "skipped": 0,
+                "ready_nodes": 0,
+                "running_nodes": 0,
+                "timing": {},
+                "_start": time.monotonic()
+            }
+            self._running[run_id] = {}
+
+    def finish_run(self, run_id: str, status: str, timing: Optional[Dict[str, float]] = None) -> None:
+        """
+        Registra el fin de una ejecución; las técnicas no ejecutadas se cuentan como omitidas.
+
+        Args:
+            run_id: Identificador de la ejecución
+            status: Estado final de la ejecución
+            timing: Tiempos de la ejecución (real, de ejecución de técnicas y de esperas)
+        """
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                return
+            run["status"] = status
+            run["end_time"] = datetime.datetime.now().isoformat()
+            run["_end"] = time.monotonic()
+            run["timing"] = dict(timing or {})
+            run["skipped"] = max(0, run["techniques"] - run["completed"] - run["failed"])
+            run["ready_nodes"] = run["running_nodes"] = 0
+            self._running[run_id].clear()
+
+    def set_queue(self, run_id: str, ready: int, running: int) -> None:
+        """Actualiza el número de nodos del grafo listos y en ejecución."""
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None:
+                run["ready_nodes"] = ready
+                run["running_nodes"] = running
+
+    def technique_started(self, run_id: str, step_index: int, technique_index: int, step_name: str,
+                          technique: Dict[str, Any], target: Optional[str]) -> None:
+        """Registra el inicio de una técnica."""
+        with self._lock:
+            if run_id in self._running:
+                self._running[run_id][(step_index, technique_index)] = {
+                    "step_index": step_index,
+                    "step": step_name,
+                    "technique_index": technique_index,
+                    "id": technique.get("id", "unknown"),
+                    "name": technique.get("name", "Unknown Technique"),
+                    "target": target,
+                    "_start": time.monotonic()
+                }
+
+    def technique_finished(self, run_id: str, step_index: int, technique_index: int, success: bool,
+                           seconds: Optional[float] = None) -> None:
+        """
+        Registra el fin de una técnica.
+
+        Args:
+            seconds: Duración de la técnica, o None si no se ejecutó (por ejemplo, al
+                reanudar una ejecución), en cuyo caso no se incluye en el histograma
+        """
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                return
+            self._running[run_id].pop((step_index, technique_index), None)
+            run["completed" if success else "failed"] += 1
+            if seconds is None:
+                return
+            index = next((i for i, bound in enumerate(DURATION_BUCKETS) if seconds <= bound), len(DURATION_BUCKETS))
+            self._buckets[index] += 1
+            self._duration_sum += seconds
+            self._duration_count += 1
+
+    def command_started(self, target: str) -> None:
+        """Registra el inicio de un comando sobre un objetivo."""
+        with self._lock:
+            self._in_flight[target] = self._in_flight.get(target, 0) + 1
+
+    def command_finished(self, target: str, seconds: float, returncode: int) -> None:
+        """Registra el fin de un comando sobre un objetivo."""
+        with self._lock:
+            self._in_flight[target] = max(0, self._in_flight.get(target, 0) - 1)
+            stats = self._commands.setdefault(target, {"total": 0, "failed": 0, "seconds": 0.0})
+            stats["total"] += 1
+            stats["seconds"] += seconds
+            if returncode != 0:
+                stats["failed"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Obtiene el estado actual de todas las ejecuciones.
+
+        Returns:
+            Diccionario con las ejecuciones, los comandos en curso por objetivo y los
+            totales de comandos por objetivo
+        """
+        now = time.monotonic()
+        with self._lock:
+            runs = {}
+            for run_id, run in self._runs.items():
+                entry = {key: value for key, value in run.items() if not key.startswith("_")}
+                entry["elapsed_seconds"] = round(run.get("_end", now) - run["_start"], 3)
+                running = sorted(self._running[run_id].values(), key=lambda t: (t["step_index"], t["technique_index"]))
+                entry["running"] = [
+                    dict({k: v for k, v in t.items() if not k.startswith("_")},
+                         seconds=round(now - t["_start"], 3))
+                    for t in running
+                ]
+                entry["current_steps"] = list(dict.fromkeys(t["step"] for t in running))
+                entry["pending"] = max(0, run["techniques"] - run["completed"] - run["failed"]
+                                       - run["skipped"] - len(running))
+                runs[run_id] = entry
+            return {
+                "time": datetime.datetime.now().isoformat(),
+                "runs": runs,
+                "in_flight": {target: count for target, count in self._in_flight.items() if count},
+                "commands": {target: dict(stats, seconds=round(stats["seconds"], 3))
+                             for target, stats in self._commands.items()}
+            }
+
+    def prometheus(self) -> str:
+        """
+        Genera las métricas en el formato de texto de Prometheus.
+
+        Returns:
+            Texto de exposición de las métricas
+        """
+        snapshot = self.snapshot()
+        with self._lock:
+            buckets = list(self._buckets)
+            duration_sum, duration_count = self._duration_sum, self._duration_count
+
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, description: str, samples: List[Tuple[Dict[str, Any], Any]]) -> None:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {value}")
+
+        runs = snapshot["runs"].items()
+        metric("simcib_runs_active", "gauge", "Ejecuciones en curso",
+               [({}, sum(1 for _, run in runs if run["status"] == "running"))])
+        metric("simcib_techniques_total", "gauge", "Técnicas del escenario",
+               [({"run": run_id, "scenario": run["scenario"]}, run["techniques"]) for run_id, run in runs])
+        metric("simcib_techniques_finished", "gauge", "Técnicas finalizadas por estado",
+               [({"run": run_id, "scenario": run["scenario"], "status": status}, run[status])
+                for run_id, run in runs for status in ("completed", "failed", "skipped")])
+        metric("simcib_techniques_running", "gauge", "Técnicas en ejecución",
+               [({"run": run_id, "scenario": run["scenario"]}, len(run["running"])) for run_id, run in runs])
+        metric("simcib_techniques_pending", "gauge", "Técnicas pendientes de ejecutar",
+               [({"run": run_id, "scenario": run["scenario"]}, run["pending"]) for run_id, run in runs])
+        metric("simcib_scheduler_ready_nodes", "gauge", "Nodos del grafo listos a la espera de un trabajador",
+               [({"run": run_id, "scenario": run["scenario"]}, run["ready_nodes"]) for run_id, run in runs])
+        metric("simcib_run_elapsed_seconds", "gauge", "Tiempo transcurrido de la ejecución",
+               [({"run": run_id, "scenario": run["scenario"]}, run["elapsed_seconds"]) for run_id, run in runs])
+        metric("simcib_run_phase_seconds", "gauge", "Tiempo de ejecución de técnicas y de esperas de una ejecución finalizada",
+               [({"run": run_id, "scenario": run["scenario"], "phase": phase.replace("_seconds", "")}, value)
+                for run_id, run in runs for phase, value in run["timing"].items() if phase != "wall_seconds"])
+        metric("simcib_commands_in_flight", "gauge", "Comandos en curso por objetivo",
+               [({"target": target}, count) for target, count in snapshot["in_flight"].items()])
+        metric("simcib_commands_total", "counter", "Comandos ejecutados por objetivo",
+               [({"target": target}, stats["total"]) for target, stats in snapshot["commands"].items()])
+        metric("simcib_commands_failed_total", "counter", "Comandos con código de salida distinto de cero por objetivo",
+               [({"target": target}, stats["failed"]) for target, stats in snapshot["commands"].items()])
+        metric("simcib_command_seconds_total", "counter", "Tiempo real acumulado de los comandos por objetivo",
+               [({"target": target}, stats["seconds"]) for target, stats in snapshot["commands"].items()])
+
+        cumulative = 0
+        samples = []
+        for bound, count in zip(list(DURATION_BUCKETS) + ["+Inf"], buckets):
+            cumulative += count
+            samples.append(({"le": bound}, cumulative))
+        lines.append("# HELP simcib_technique_duration_seconds Duración de las técnicas")
+        lines.append("# TYPE simcib_technique_duration_seconds histogram")
+        for labels, value in samples:
+            lines.append(f"simcib_technique_duration_seconds_bucket{_labels(labels)} {value}")
+        lines.append(f"simcib_technique_duration_seconds_sum {round(duration_sum, 6)}")
+        lines.append(f"simcib_technique_duration_seconds_count {duration_count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    """Formatea las etiquetas de una muestra, escapando sus valores."""
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Atiende las peticiones de estado y métricas."""
+
+    status: RunStatus
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path in ("", "/status"):
+            body = json.dumps(self.status.snapshot(), indent=2, ensure_ascii=False)
+            content_type = "application/json; charset=utf-8"
+        elif path == "/metrics":
+            body = self.status.prometheus()
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # En un socket Unix no hay dirección de cliente; las peticiones solo se registran en modo detallado
+        logger.debug(format % args)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Servidor HTTP sobre un socket Unix."""
+
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler espera una dirección de cliente con forma de tupla
+        return request, ("unix", 0)
+
+
+class StatusServer:
+    """Servidor HTTP local que publica el estado de las ejecuciones."""
+
+    def __init__(self, status: RunStatus, address: str):
+        """
+        Inicializa el servidor.
+
+        Args:
+            status: Estado de las ejecuciones que se publica
+            address: "host:puerto", ":puerto" o "unix:/ruta/al/socket"
+        """
+        self.status = status
+        self.address = address
+        self._server: Optional[socketserver.BaseServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._socket_path: Optional[str] = None
+
+    def start(self) -> str:
+        """
+        Empieza a atender peticiones en un hilo en segundo plano.
+
+        Returns:
+            Dirección en la que escucha el servidor
+
+        Raises:
+            ValueError: Si la dirección no es válida
+            OSError: Si no se puede abrir el puerto o el socket, o si la ruta del socket
+                ya existe y no es un socket
+        """
+        handler = type("StatusHandler", (_Handler,), {"status": self.status})
+        if self.address.startswith(UNIX_PREFIX):
+            path = self.address[len(UNIX_PREFIX):]
+            if not path:
+                raise ValueError("falta la ruta del socket Unix")
+            # Solo se reemplaza un socket anterior; cualquier otro archivo se conserva
+            if os.path.lexists(path):
+                if not stat.S_ISSOCK(os.lstat(path).st_mode):
+                    raise OSError(f"{path} ya existe y no es un socket Unix")
+                os.unlink(path)
+            self._server = _UnixHTTPServer(path, handler)
+            self._socket_path = path
+            bound = f"{UNIX_PREFIX}{path}"
+        else:
+            host, separator, port = self.address.rpartition(":")
+            if not separator or not port.isdigit():
+                raise ValueError(f"dirección no válida: {self.address} (se espera host:puerto o unix:/ruta)")
+            self._server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), handler)
+            self._server.daemon_threads = True
+            bound = "{}:{}".format(*self._server.server_address[:2])
+        self._thread = threading.Thread(target=self._server.serve_forever, name="status-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Estado de la ejecución disponible en {bound} (/status y /metrics)")
+        return bound
+
+    def close(self) -> None:
+        """Detiene el servidor y elimina el socket Unix."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        if self._socket_path and os.path.exists(self._socket_path):
+            os.unlink(self._socket_path)
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+
+"""
+Transportes para ejecutar los comandos de las técnicas en sus objetivos.
+
+Un objetivo del escenario puede declarar un campo `transport` que indica cómo se
+ejecutan los comandos de las técnicas dirigidas a él:
+
+    targets:
+      - type: "vm"
+        value: "victim-linux"
+        transport: "vagrant"          # o "ssh", "local", o un diccionario:
+      - type: "ip"
+        value: "192.168.56.20"
+        transport:
+          type: "ssh"
+          user: "vagrant"
+          port: 22
+          identity_file: "~/.ssh/id_ed25519"
+
+Los transportes SSH mantienen una conexión maestra persistente (ControlMaster de
+OpenSSH) que se abre la primera vez que se usa el objetivo y se reutiliza en todas
+las técnicas y pasos de la ejecución, de forma que cada comando no paga el coste
+de establecer una conexión nueva. El transporte `vagrant` obtiene la configuración
+SSH de la máquina con `vagrant ssh-config` una sola vez. El transporte `local`
+ejecuta los comandos en el propio equipo y sirve para probar escenarios sin
+objetivos reales. Los objetivos sin transporte ejecutan sus comandos localmente,
+como hasta ahora.
+"""
+
+import logging
+import os
+import shlex
+import shutil
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('run_scenario.transport')
+
+CommandRunner = Callable[..., Tuple[int, str, str]]
+
+TRANSPORT_TYPES = ("local", "ssh", "vagrant")
+
+# Segundos que la conexión maestra permanece abierta sin uso
+DEFAULT_CONTROL_PERSIST = 600
+
+
+class TransportError(RuntimeError):
+    """Error al establecer la conexión con un objetivo."""
+
+
+def validate_transport(spec: Any) -> Optional[str]:
+    """
+    Comprueba la definición del transporte de un objetivo.
+
+    Args:
+        spec: Valor del campo `transport` del objetivo
+
+    Returns:
+        Mensaje de error si la definición no es válida, None en caso contrario
+    """
+    if spec is None:
+        return None
+    if isinstance(spec, str):
+        kind = spec
+    elif isinstance(spec, dict):
+        kind = spec.get("type")
+    else:
+        return "debe ser un nombre de transporte o un diccionario con el campo 'type'"
+    if kind not in TRANSPORT_TYPES:
+        return f"transporte desconocido: {kind} (válidos: {', '.join(TRANSPORT_TYPES)})"
+    return None
+
+
+class Transport:
+    """Transporte base: ejecuta los comandos en el equipo local."""
+
+    name = "local"
+
+    def open(self) -> None:
+        """Establece la conexión con el objetivo, si es necesaria."""
+
+    def wrap(self, command: List[str]) -> List[str]:
+        """
+        Construye el comando local que ejecuta un comando en el objetivo.
+
+        Args:
+            command: Comando y argumentos a ejecutar en el objetivo
+
+        Returns:
+            Comando a ejecutar en el equipo local
+        """
+        return list(command)
+
+    def close(self) -> None:
+        """Cierra la conexión con el objetivo."""
+
+
+class LocalTransport(Transport):
+    """Ejecuta los comandos localmente; sustituye a un objetivo real en las pruebas."""
+
+
+class SSHTransport(Transport):
+    """Ejecuta los comandos por SSH sobre una conexión maestra persistente."""
+
+    name = "ssh"
+
+    def __init__(self, host: str, run_command: CommandRunner, control_dir: str,
+                 user: Optional[str] = None, port: Optional[int] = None,
+                 identity_file: Optional[str] = None, options: Optional[Dict[str, Any]] = None,
+                 control_persist: int = DEFAULT_CONTROL_PERSIST):
+        """
+        Inicializa el transporte.
+
+        Args:
+            host: Nombre o dirección del objetivo
+            run_command: Función para ejecutar los comandos de control de la conexión
+            control_dir: Directorio para los sockets de control de las conexiones maestras
+            user: Usuario remoto
+            port: Puerto SSH
+            identity_file: Clave privada
+            options: Opciones adicionales de ssh (-o clave=valor)
+            control_persist: Segundos que la conexión maestra permanece abierta sin uso
+        """
+        self.host = host
+        self.run_command = run_command
+        self.control_dir = control_dir
+        self.user = user
+        self.port = port
+        self.identity_file = identity_file
+        self.options = dict(options or {})
+        self.control_persist = control_persist
+        self.config_file: Optional[str] = None
+        self._opened = False
+        self._error: Optional[TransportError] = None
+        self._lock = threading.Lock()
+
+    def _base_command(self) -> List[str]:
+        """Argumentos de ssh comunes a la conexión maestra y a los comandos."""
+        command = ["ssh"]
+        if self.config_file:
+            command += ["-F", self.config_file]
+        command += [
+            "-o", "ControlMaster=auto",
+            "-o", f"ControlPath={os.path.join(self.control_dir, '%C')}",
+            "-o", f"ControlPersist={self.control_persist}",
+            "-o", "BatchMode=yes"
+        ]
+        for key, value in self.options.items():
+            command += ["-o", f"{key}={value}"]
+        if self.user:
+            command += ["-l", str(self.user)]
+        if self.port:
+            command += ["-p", str(self.port)]
+        if self.identity_file:
+            command += ["-i", os.path.expanduser(self.identity_file)]
+        return command
+
+    def _prepare(self) -> None:
+        """Prepara la configuración necesaria antes de abrir la conexión maestra."""
+
+    def open(self) -> None:
+        """
+        Abre la conexión maestra, una sola vez aunque varias técnicas la pidan a la vez.
+
+        Si la conexión falla, el error se conserva y las técnicas siguientes fallan sin
+        volver a intentarlo.
+
+        Raises:
+            TransportError: Si no se puede conectar con el objetivo
+        """
+        with self._lock:
+            if self._opened:
+                return
+            if self._error is not None:
+                raise self._error
+            try:
+                self._prepare()
+                logger.info(f"Abriendo conexión persistente con {self.host} ({self.name})")
+                returncode, _, stderr = self.run_command(self._base_command() + ["-N", "-f", self.host])
+                if returncode != 0:
+                    raise TransportError(f"No se pudo conectar con {self.host}: {stderr.strip()}")
+            except TransportError as e:
+                self._error = e
+                raise
+            self._opened = True
+
+    def wrap(self, command: List[str]) -> List[str]:
+        """Construye el comando ssh que ejecuta el comando en el objetivo por la conexión maestra."""
+        self.open()
+        return self._base_command() + [self.host, "--", " ".join(shlex.quote(part) for part in command)]
+
+    def close(self) -> None:
+        """Cierra la conexión maestra."""
+        with self._lock:
+            if not self._opened:
+                return
+            self._opened = False
+            returncode, _, stderr = self.run_command(self._base_command() + ["-O", "exit", self.host])
+            if returncode != 0:
+                logger.debug(f"No se pudo cerrar la conexión con {self.host}: {stderr.strip()}")
+
+
+class VagrantSSHTransport(SSHTransport):
+    """Ejecuta los comandos en una máquina Vagrant por SSH, sin pasar por `vagrant ssh`."""
+
+    name = "vagrant"
+
+    def __init__(self, machine: str, run_command: CommandRunner, control_dir: str,
+                 vagrant_dir: Optional[str] = None, **kwargs: Any):
+        """
+        Inicializa el transporte.
+
+        Args:
+            machine: Nombre de la máquina en el Vagrantfile
+            run_command: Función para ejecutar los comandos de control de la conexión
+            control_dir: Directorio para los sockets de control y la configuración SSH
+            vagrant_dir: Directorio del Vagrantfile (por defecto, el directorio actual)
+            **kwargs: Opciones adicionales de SSHTransport
+        """
+        super().__init__(machine, run_command, control_dir, **kwargs)
+        self.vagrant_dir = vagrant_dir
+
+    def _prepare(self) -> None:
+        """Obtiene la configuración SSH de la máquina con `vagrant ssh-config`."""
+        returncode, stdout, stderr = self.run_command(["vagrant", "ssh-config", self.host], cwd=self.vagrant_dir)
+        if returncode != 0:
+            raise TransportError(f"No se pudo obtener la configuración SSH de {self.host}: {stderr.strip()}")
+        self.config_file = os.path.join(self.control_dir, f"{self.host}.ssh_config")
+        with open(self.config_file, 'w') as f:
+            f.write(stdout)
+
+
+class TransportPool:
+    """Gestiona los transportes de los objetivos de un escenario y reutiliza sus conexiones."""
+
+    def __init__(self, targets: List[Dict[str, Any]], run_command: CommandRunner):
+        """
+        Inicializa el gestor de transportes.
+
+        Args:
+            targets: Objetivos del escenario
+            run_command: Función para ejecutar los comandos de control de las conexiones
+        """
+        self.run_command = run_command
+        self._specs: Dict[str, Dict[str, Any]] = {}
+        for target in targets:
+            spec = target.get("transport")
+            if spec is None:
+                continue
+            if isinstance(spec, str):
+                spec = {"type": spec}
+            # El objetivo se puede referenciar por su valor o por su nombre
+            spec = dict(spec, host=spec.get("host", target.get("value")))
+            for key in ("value", "name"):
+                if target.get(key):
+                    self._specs.setdefault(str(target[key]), spec)
+        self._transports: Dict[int, Transport] = {}
+        self._control_dir: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _build(self, spec: Dict[str, Any]) -> Transport:
+        """Crea el transporte indicado en la definición de un objetivo."""
+        kind = spec.get("type")
+        if kind == "local":
+            return LocalTransport()
+
+        if self._control_dir is None:
+            # Directorio corto: la ruta de los sockets de control tiene un límite de longitud
+            self._control_dir = tempfile.mkdtemp(prefix="simcib-ssh-")
+        options = {
+            "user": spec.get("user"),
+            "port": spec.get("port"),
+            "identity_file": spec.get("identity_file"),
+            "options": spec.get("options"),
+            "control_persist": spec.get("control_persist", DEFAULT_CONTROL_PERSIST)
+        }
+        if kind == "vagrant":
+            return VagrantSSHTransport(spec["host"], self.run_command, self._control_dir,
+                                       vagrant_dir=spec.get("vagrant_dir"), **options)
+        return SSHTransport(spec["host"], self.run_command, self._control_dir, **options)
+
+    def get(self, target: str) -> Optional[Transport]:
+        """
+        Obtiene el transporte de un objetivo, creándolo la primera vez.
+
+        Args:
+            target: Valor o nombre del objetivo
+
+        Returns:
+            Transporte del objetivo, o None si no declara ninguno
+        """
+        spec = self._specs.get(target)
+        if spec is None:
+            return None
+        with self._lock:
+            transport = self._transports.get(id(spec))
+            if transport is None:
+                transport = self._transports[id(spec)] = self._build(spec)
+            return transport
+
+    def close(self) -> None:
+        """Cierra todas las conexiones abiertas."""
+        with self._lock:
+            transports = list(self._transports.values())
+            self._transports.clear()
+            control_dir, self._control_dir = self._control_dir, None
+        for transport in transports:
+            transport.close()
+        if control_dir:
+            shutil.rmtree(control_dir, ignore_errors=True)
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+"""Configuración común de las pruebas: los módulos del ejecutor se importan desde src/scripts."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src", "scripts"))
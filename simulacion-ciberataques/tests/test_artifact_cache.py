@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas de la caché local de artefactos con un Docker simulado."""
+
+import os
+import subprocess
+import threading
+
+import pytest
+
+from artifact_cache import ArtifactCache
+
+DIGEST = "sha256:" + "ab" * 32
+IMAGE = f"kalilinux/kali-rolling@{DIGEST}"
+IMAGE_ID = "sha256:" + "cd" * 32
+
+
+class FakeDocker:
+    """Simula los comandos de Docker con el almacén clásico, que no conserva el digest al cargar."""
+
+    def __init__(self):
+        self.online = True
+        self.images = {}  # ID -> referencias
+        self.archives = {}  # archivo -> ID
+        self.commands = []
+
+    def fail(self, command):
+        raise subprocess.CalledProcessError(1, command)
+
+    def __call__(self, command, cwd=None, quiet=False):
+        self.commands.append(command)
+        action = command[1:3] if command[1] == 'image' else command[1:2]
+        if action == ['image', 'inspect']:
+            ref = command[-1]
+            for image_id, refs in self.images.items():
+                if ref == image_id or ref in refs:
+                    return subprocess.CompletedProcess(command, 0, stdout=image_id + "\n", stderr="")
+            self.fail(command)
+        if action == ['pull']:
+            if not self.online:
+                self.fail(command)
+            self.images[IMAGE_ID] = {command[2]}
+        elif action == ['save']:
+            path = command[3]
+            with open(path, 'w') as f:
+                f.write("imagen")
+            self.archives[os.path.basename(path).split('.tmp.')[0]] = IMAGE_ID
+        elif action == ['load']:
+            self.images[self.archives[os.path.basename(command[3])]] = set()
+        return subprocess.CompletedProcess(command, 0, stdout="", stderr="")
+
+    def ran(self, name):
+        return [c for c in self.commands if c[1] == name]
+
+
+@pytest.fixture
+def docker():
+    return FakeDocker()
+
+
+def test_pull_saves_archive_and_image_id(tmp_path, docker):
+    cache = ArtifactCache(str(tmp_path), docker)
+
+    cache.pull_image(IMAGE)
+
+    archive = tmp_path / "images" / f"{DIGEST.replace(':', '-')}.tar"
+    assert archive.exists()
+    assert (tmp_path / "images" / f"{DIGEST.replace(':', '-')}.id").read_text().strip() == IMAGE_ID
+    assert not [name for name in os.listdir(str(tmp_path / "images")) if ".tmp." in name]
+    (save,) = docker.ran('save')
+    assert save[3].endswith(f".{os.getpid()}.{threading.get_ident()}")
+
+
+def test_warm_cache_works_offline_without_digest(tmp_path, docker):
+    cache = ArtifactCache(str(tmp_path), docker)
+    cache.pull_image(IMAGE)
+    docker.images.clear()
+    docker.online = False
+
+    cache.pull_image(IMAGE)
+
+    assert len(docker.ran('load')) == 1
+    assert len(docker.ran('pull')) == 1
+    assert cache.image_present(IMAGE)
+
+
+def test_present_image_is_not_pulled_again(tmp_path, docker):
+    cache = ArtifactCache(str(tmp_path), docker)
+    cache.pull_image(IMAGE)
+
+    cache.pull_image(IMAGE)
+
+    assert len(docker.ran('pull')) == 1
+    assert len(docker.ran('save')) == 1
+
+
+def test_load_with_another_id_falls_back_to_pull(tmp_path, docker):
+    cache = ArtifactCache(str(tmp_path), docker)
+    cache.pull_image(IMAGE)
+    docker.images.clear()
+    docker.archives = {name: "sha256:" + "ee" * 32 for name in docker.archives}
+
+    cache.pull_image(IMAGE)
+
+    assert len(docker.ran('load')) == 1
+    assert len(docker.ran('pull')) == 2
+
+
+def test_tagged_image_uses_local_copy_offline(tmp_path, docker):
+    cache = ArtifactCache(str(tmp_path), docker)
+    cache.pull_image("nginx:latest")
+    docker.online = False
+
+    cache.pull_image("nginx:latest")
+    docker.images.clear()
+    with pytest.raises(subprocess.CalledProcessError):
+        cache.pull_image("nginx:latest")
+    assert not (tmp_path / "images").exists()
+
+
+def test_pip_install_builds_wheels_only_when_missing(tmp_path):
+    commands = []
+
+    def run_command(command, cwd=None, quiet=False):
+        commands.append(command)
+        if '--no-index' in command and len([c for c in commands if '--no-index' in c]) == 1:
+            raise subprocess.CalledProcessError(1, command)
+        return subprocess.CompletedProcess(command, 0, stdout="", stderr="")
+
+    ArtifactCache(str(tmp_path), run_command).pip_install(["impacket==0.11.0"])
+
+    assert [c[1] for c in commands] == ["install", "wheel", "install"]
+    assert (tmp_path / "wheels").is_dir()
+
+
+def test_dry_run_creates_nothing(tmp_path):
+    cache_dir = tmp_path / "cache"
+    run_command = lambda command, cwd=None, quiet=False: subprocess.CompletedProcess(command, 0, "", "")
+    cache = ArtifactCache(str(cache_dir), run_command, dry_run=True)
+
+    cache.pull_image(IMAGE)
+    cache.mirror("https://github.com/example/tool.git")
+    cache.pip_install(["requests"])
+
+    assert not cache_dir.exists()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas de la ejecución por lotes y del pool de objetivos compartido."""
+
+import threading
+import time
+
+from batch import TargetPool, resolve_scenarios
+
+
+def _hold_in_thread(pool, owner, targets, events):
+    """Ocupa objetivos desde otro hilo y registra cuándo lo consigue."""
+    acquired = threading.Event()
+    release = threading.Event()
+
+    def run():
+        with pool.hold(owner, targets):
+            events.append(owner)
+            acquired.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, acquired, release
+
+
+def test_target_is_held_by_one_scenario_at_a_time():
+    pool = TargetPool()
+    events = []
+    with pool.hold("a", ["10.0.0.1"]):
+        thread, acquired, release = _hold_in_thread(pool, "b", ["10.0.0.1"], events)
+        assert not acquired.wait(0.2)
+    assert acquired.wait(2)
+    release.set()
+    thread.join(2)
+    assert events == ["b"]
+
+
+def test_same_scenario_can_hold_a_target_several_times():
+    pool = TargetPool()
+    with pool.hold("a", ["10.0.0.1"]):
+        with pool.hold("a", ["10.0.0.1", "10.0.0.2"]):
+            pass
+        thread, acquired, release = _hold_in_thread(pool, "b", ["10.0.0.2"], [])
+        assert acquired.wait(2)
+        release.set()
+        thread.join(2)
+
+
+def test_targets_are_acquired_all_at_once():
+    pool = TargetPool()
+    events = []
+    with pool.hold("a", ["10.0.0.2"]):
+        thread, acquired, release = _hold_in_thread(pool, "b", ["10.0.0.1", "10.0.0.2"], events)
+        time.sleep(0.1)
+        # Mientras b espera por 10.0.0.2 no ocupa 10.0.0.1
+        with pool.hold("c", ["10.0.0.1"]):
+            assert not acquired.is_set()
+    assert acquired.wait(2)
+    release.set()
+    thread.join(2)
+
+
+def test_per_target_limits():
+    pool = TargetPool(default_limit=1, limits={"compartido": 2})
+    with pool.hold("a", ["compartido"]):
+        thread, acquired, release = _hold_in_thread(pool, "b", ["compartido"], [])
+        assert acquired.wait(2)
+        release.set()
+        thread.join(2)
+
+
+def test_resolve_scenarios_from_directory_and_glob(tmp_path):
+    for name in ("b.yaml", "a.yml", "notas.txt"):
+        (tmp_path / name).write_text("", encoding='utf-8')
+
+    assert resolve_scenarios(str(tmp_path)) == [str(tmp_path / "a.yml"), str(tmp_path / "b.yaml")]
+    assert resolve_scenarios(str(tmp_path / "*.txt")) == [str(tmp_path / "notas.txt")]
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas de la captura acotada de la salida de los comandos."""
+
+import gzip
+import hashlib
+
+from capture import OutputCapture
+
+
+def test_output_below_limit_is_kept_whole(tmp_path):
+    spill = tmp_path / "out.gz"
+    capture = OutputCapture(limit=100, spill_path=str(spill))
+    capture.write("línea 1\n")
+    capture.write("línea 2\n")
+    capture.close()
+
+    assert capture.text() == "línea 1\nlínea 2\n"
+    assert not capture.truncated
+    assert capture.spill_info() is None
+    assert not spill.exists()
+
+
+def test_output_above_limit_keeps_head_and_tail_and_spills(tmp_path):
+    spill = tmp_path / "outputs" / "out.gz"
+    capture = OutputCapture(limit=20, spill_path=str(spill), spill_name="outputs/out.gz")
+    data = [f"{i:04d}ñ\n" for i in range(100)]
+    for chunk in data:
+        capture.write(chunk)
+    capture.close()
+    full = "".join(data)
+
+    text = capture.text()
+    assert capture.truncated
+    assert text.startswith(full[:10])
+    assert text.endswith(full[-10:])
+    assert "caracteres omitidos; salida completa en outputs/out.gz" in text
+    with gzip.open(str(spill), 'rt', encoding='utf-8') as f:
+        assert f.read() == full
+    assert capture.spill_info() == {
+        "path": "outputs/out.gz",
+        "sha256": hashlib.sha256(full.encode('utf-8')).hexdigest(),
+        "chars": len(full)
+    }
+
+
+def test_truncation_without_spill_path_discards_the_middle():
+    capture = OutputCapture(limit=10)
+    capture.write("a" * 50 + "b" * 50)
+    capture.close()
+
+    assert capture.truncated
+    assert capture.text().startswith("aaaaa")
+    assert capture.text().endswith("bbbbb")
+    assert "salida completa" not in capture.text()
+    assert capture.spill_info() is None
+
+
+def test_zero_limit_keeps_everything():
+    capture = OutputCapture(limit=0)
+    capture.write("x" * 100000)
+
+    assert capture.text() == "x" * 100000
+    assert not capture.truncated
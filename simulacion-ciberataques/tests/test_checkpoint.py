@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas de los puntos de control para reanudar ejecuciones."""
+
+from checkpoint import RunCheckpoint, fingerprint
+
+TECHNIQUE = {"id": "T1046", "name": "Escaneo", "commands": [["nmap", "10.0.0.1"]]}
+
+
+def test_fingerprint_ignores_key_order():
+    reordered = {"commands": [["nmap", "10.0.0.1"]], "name": "Escaneo", "id": "T1046"}
+
+    assert fingerprint(TECHNIQUE) == fingerprint(reordered)
+    assert fingerprint(TECHNIQUE) != fingerprint(dict(TECHNIQUE, commands=[["nmap", "10.0.0.2"]]))
+
+
+def test_resume_reuses_unchanged_successful_work(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path))
+    checkpoint.start("escenario.yaml", "2024-01-01T00:00:00", resume=False)
+    checkpoint.record_prerequisites(fingerprint([]))
+    checkpoint.record_technique(0, 0, fingerprint(TECHNIQUE), {"status": "success", "output": []})
+    checkpoint.record_technique(0, 1, fingerprint(TECHNIQUE), {"status": "failed", "output": []})
+    checkpoint.record_step(0, "paso", {"status": "success"})
+    checkpoint.close()
+
+    resumed = RunCheckpoint.load(str(tmp_path))
+
+    assert resumed.start_time == "2024-01-01T00:00:00"
+    assert resumed.prerequisites == fingerprint([])
+    assert resumed.completed_technique(0, 0, fingerprint(TECHNIQUE)) == {"status": "success", "output": []}
+    assert resumed.completed_step(0, "paso") == {"status": "success"}
+    # Las técnicas fallidas se repiten
+    assert resumed.completed_technique(0, 1, fingerprint(TECHNIQUE)) is None
+
+
+def test_resume_reruns_changed_definitions(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path))
+    checkpoint.start("escenario.yaml", "2024-01-01T00:00:00", resume=False)
+    checkpoint.record_technique(0, 0, fingerprint(TECHNIQUE), {"status": "success"})
+    checkpoint.record_step(0, "paso", {"status": "success"})
+    checkpoint.close()
+
+    resumed = RunCheckpoint.load(str(tmp_path))
+    changed = dict(TECHNIQUE, timeout=30)
+
+    assert resumed.completed_technique(0, 0, fingerprint(changed)) is None
+    assert resumed.completed_step(0, "paso modificado") is None
+
+
+def test_start_without_resume_discards_previous_records(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path))
+    checkpoint.start("escenario.yaml", "2024-01-01T00:00:00", resume=False)
+    checkpoint.record_technique(0, 0, fingerprint(TECHNIQUE), {"status": "success"})
+    checkpoint.close()
+
+    restarted = RunCheckpoint.load(str(tmp_path))
+    restarted.start("escenario.yaml", "2024-01-02T00:00:00", resume=False)
+    restarted.close()
+
+    assert restarted.completed_technique(0, 0, fingerprint(TECHNIQUE)) is None
+    assert RunCheckpoint.load(str(tmp_path)).techniques == {}
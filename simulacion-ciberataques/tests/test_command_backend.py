@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas del backend asíncrono de ejecución de comandos."""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from command_backend import READ_CHUNK_SIZE, AsyncCommandBackend
+
+
+@pytest.fixture
+def backend():
+    backend = AsyncCommandBackend()
+    yield backend
+    backend.close()
+
+
+def test_captures_output_and_exit_code(backend):
+    result = backend.run([sys.executable, "-c",
+                          "import sys; print('hola'); print('error', file=sys.stderr); sys.exit(3)"])
+
+    assert result.returncode == 3
+    assert result.stdout == "hola\n"
+    assert result.stderr == "error\n"
+    assert not result.timed_out
+
+
+def test_timeout_kills_the_process(backend):
+    start = time.monotonic()
+    result = backend.run([sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.5)
+
+    assert result.timed_out
+    assert result.returncode != 0
+    assert "[TIMEOUT]" in result.stderr
+    assert time.monotonic() - start < 10
+
+
+def test_multibyte_character_split_across_reads(backend):
+    # El carácter de dos bytes queda partido entre la primera y la segunda lectura
+    script = ("import sys; sys.stdout.buffer.write(b'a' * ({size} - 1) + 'ñ'.encode('utf-8') + b'\\n')"
+              .format(size=READ_CHUNK_SIZE))
+    lines = []
+
+    result = backend.run([sys.executable, "-c", script], on_line=lambda stream, line: lines.append(line))
+
+    assert result.stdout == "a" * (READ_CHUNK_SIZE - 1) + "ñ\n"
+    assert "�" not in "".join(lines)
+
+
+def test_lines_are_streamed_in_order(backend):
+    lines = []
+
+    backend.run([sys.executable, "-c", "for i in range(3): print(i)"],
+                on_line=lambda stream, line: lines.append((stream, line)))
+
+    assert lines == [("stdout", "0\n"), ("stdout", "1\n"), ("stdout", "2\n")]
+
+
+def test_concurrent_commands(backend):
+    command = [sys.executable, "-c", "import time; time.sleep(0.3); print('ok')"]
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: backend.run(command), range(8)))
+
+    assert [r.stdout for r in results] == ["ok\n"] * 8
+    assert time.monotonic() - start < 0.3 * 8
+
+
+def test_missing_command_raises(backend):
+    with pytest.raises(OSError):
+        backend.run(["/nonexistent/command"])
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas de la compactación del diario de eventos."""
+
+import json
+import os
+
+from journal import JOURNAL_FILE, STATUS_INTERRUPTED, ResultsJournal, compact_journal, load_results, write_results
+
+
+def _emit_technique(journal, step_index, technique_index, status=None):
+    """Añade al diario una técnica con un comando y, si se indica, su finalización."""
+    journal.emit("technique_started", step_index=step_index, technique_index=technique_index,
+                 id=f"T{step_index}{technique_index}", name="Técnica", target="10.0.0.1")
+    journal.emit("command_output_chunk", step_index=step_index, technique_index=technique_index,
+                 command_index=0, stream="stdout", data="línea 1\n")
+    journal.emit("command_output_chunk", step_index=step_index, technique_index=technique_index,
+                 command_index=0, stream="stdout", data="línea 2\n")
+    if status:
+        journal.emit("command_finished", step_index=step_index, technique_index=technique_index,
+                     command_index=0, command="echo", returncode=0)
+        journal.emit("technique_finished", step_index=step_index, technique_index=technique_index,
+                     status=status, end_time="2024-01-01T00:00:02")
+
+
+def test_compacted_journal_matches_results_shape(tmp_path):
+    journal = ResultsJournal(str(tmp_path))
+    journal.emit("run_started", scenario="Prueba", start_time="2024-01-01T00:00:00")
+    journal.emit("step_started", step_index=0, name="Paso 1", start_time="2024-01-01T00:00:01")
+    _emit_technique(journal, 0, 0, "success")
+    journal.emit("step_finished", step_index=0, name="Paso 1", status="success", end_time="2024-01-01T00:00:03")
+    journal.emit("step_skipped", step_index=1, name="Paso 2")
+    journal.emit("run_finished", status="completed", end_time="2024-01-01T00:00:04")
+    journal.close()
+
+    results = load_results(str(tmp_path))
+
+    assert results["scenario"] == "Prueba"
+    assert results["status"] == "completed"
+    assert results["skipped_steps"] == ["Paso 2"]
+    assert results["techniques"] == [{"id": "T00", "name": "Técnica", "status": "success"}]
+    (step,) = results["steps"]
+    assert step["status"] == "success"
+    (command,) = step["techniques"][0]["output"]
+    assert command["stdout"] == "línea 1\nlínea 2\n"
+    assert command["returncode"] == 0
+
+
+def test_interrupted_journal_marks_unfinished_work(tmp_path):
+    journal = ResultsJournal(str(tmp_path))
+    journal.emit("run_started", scenario="Prueba", start_time="2024-01-01T00:00:00")
+    journal.emit("step_started", step_index=0, name="Paso 1")
+    _emit_technique(journal, 0, 0, "success")
+    _emit_technique(journal, 0, 1)
+    journal.close()
+    # Una interrupción puede dejar una última línea incompleta
+    with open(os.path.join(str(tmp_path), JOURNAL_FILE), 'a', encoding='utf-8') as f:
+        f.write('{"event": "command_fini')
+
+    results = compact_journal(os.path.join(str(tmp_path), JOURNAL_FILE))
+
+    assert results["status"] == STATUS_INTERRUPTED
+    assert results["steps"][0]["status"] == STATUS_INTERRUPTED
+    assert [t["status"] for t in results["steps"][0]["techniques"]] == ["success", STATUS_INTERRUPTED]
+    assert results["steps"][0]["techniques"][1]["output"][0]["stdout"] == "línea 1\nlínea 2\n"
+
+
+def test_resumed_technique_replaces_previous_attempt(tmp_path):
+    journal = ResultsJournal(str(tmp_path))
+    journal.emit("run_started", scenario="Prueba")
+    journal.emit("step_started", step_index=0, name="Paso 1")
+    _emit_technique(journal, 0, 0)
+    _emit_technique(journal, 0, 0, "success")
+    journal.close()
+
+    results = compact_journal(os.path.join(str(tmp_path), JOURNAL_FILE))
+
+    (technique,) = results["steps"][0]["techniques"]
+    assert technique["status"] == "success"
+    assert technique["output"][0]["stdout"] == "línea 1\nlínea 2\n"
+
+
+def test_results_file_takes_precedence_over_journal(tmp_path):
+    journal = ResultsJournal(str(tmp_path))
+    journal.emit("run_started", scenario="Del diario")
+    journal.close()
+    write_results(os.path.join(str(tmp_path), "results.json"), {"scenario": "Final", "steps": []})
+
+    assert load_results(str(tmp_path))["scenario"] == "Final"
+    with open(os.path.join(str(tmp_path), "results.json"), 'r', encoding='utf-8') as f:
+        assert json.load(f)["scenario"] == "Final"
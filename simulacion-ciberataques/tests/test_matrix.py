@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas de la expansión de escenarios en modo matriz."""
+
+import pytest
+
+from matrix import MATRIX_TARGET_KEY, expand_for_target, target_variables
+from metrics import technique_statuses
+
+PLAN = {
+    "name": "Matriz",
+    "targets": [{"type": "ip", "value": "10.0.0.1", "name": "web", "user": "admin"},
+                {"type": "ip", "value": "10.0.0.2"}],
+    "steps": [{
+        "name": "Acceso",
+        "target": "${target}",
+        "techniques": [{
+            "id": "T1110",
+            "commands": [["hydra", "-l", "${target_user}", "ssh://${target}"], ["echo", "$HOME ${target_index}"]]
+        }]
+    }]
+}
+
+
+def test_target_variables():
+    assert target_variables(PLAN["targets"][0], 0) == {
+        "target": "10.0.0.1", "target_type": "ip", "target_name": "web", "target_index": "0",
+        "target_value": "10.0.0.1", "target_user": "admin"
+    }
+    assert target_variables(PLAN["targets"][1], 1)["target_name"] == "10.0.0.2"
+
+
+def test_expand_for_target_substitutes_only_target_variables():
+    expanded = expand_for_target(PLAN, PLAN["targets"][0], 0)
+
+    assert expanded["targets"] == [PLAN["targets"][0]]
+    assert expanded[MATRIX_TARGET_KEY] == "10.0.0.1"
+    assert expanded["steps"][0]["target"] == "10.0.0.1"
+    assert expanded["steps"][0]["techniques"][0]["commands"] == [
+        ["hydra", "-l", "admin", "ssh://10.0.0.1"], ["echo", "$HOME 0"]
+    ]
+    # El plan original no se modifica
+    assert PLAN["steps"][0]["target"] == "${target}"
+
+
+def test_unknown_target_variable_is_an_error():
+    with pytest.raises(ValueError, match="target_user"):
+        expand_for_target(PLAN, PLAN["targets"][1], 1)
+
+
+def test_technique_statuses_keep_repeated_and_missing_ids_apart():
+    results = {"steps": [
+        {"name": "Reconocimiento", "techniques": [{"id": "T1046", "status": "success"},
+                                                  {"id": "T1046", "status": "failed"},
+                                                  {"status": "success"}]},
+        {"name": "Acceso", "techniques": [{"id": "T1046", "status": "skipped"}]}
+    ]}
+
+    assert technique_statuses(results) == {
+        "Reconocimiento / T1046": "success",
+        "Reconocimiento / T1046 (2)": "failed",
+        "Reconocimiento / unknown": "success",
+        "Acceso / T1046": "skipped"
+    }
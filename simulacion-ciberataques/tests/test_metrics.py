@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas de las métricas de rendimiento de las ejecuciones."""
+
+import pytest
+
+from metrics import latency_summary, merge_latencies, percentile, resource_totals, technique_latencies
+
+
+def _results(*durations):
+    """Resultados con una técnica T1 por duración y un comando con recursos."""
+    return {"steps": [{"techniques": [
+        {"id": "T1", "wall_seconds": d,
+         "output": [{"resources": {"wall_seconds": d, "cpu_user_seconds": 0.1, "cpu_sys_seconds": 0.05,
+                                   "max_rss_kb": 1000 * (i + 1), "signal": 9 if i == 0 else None}}]}
+        for i, d in enumerate(durations)
+    ] + [{"id": "T2"}]}]}
+
+
+def test_percentile_interpolates():
+    assert percentile([5.0], 99) == 5.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == pytest.approx(2.5)
+    assert percentile([0.0, 10.0], 90) == pytest.approx(9.0)
+
+
+def test_latency_summary_of_one_run():
+    assert technique_latencies(_results(1.0, 3.0)) == {"T1": [1.0, 3.0]}
+
+    summary = latency_summary([_results(1.0, 3.0)])
+
+    assert summary == {"T1": {"count": 2, "min": 1.0, "mean": 2.0, "p50": 2.0, "p90": 2.8,
+                              "p95": 2.9, "p99": 2.98, "max": 3.0}}
+
+
+def test_merged_latencies_match_summary_of_full_results():
+    runs = [_results(1.0), _results(2.0, 4.0)]
+
+    assert merge_latencies(technique_latencies(r) for r in runs) == latency_summary(runs)
+    assert merge_latencies([]) == {}
+
+
+def test_resource_totals():
+    totals = resource_totals(_results(1.0, 2.0))
+
+    assert totals == {"commands": 2, "wall_seconds": 3.0, "cpu_user_seconds": 0.2,
+                      "cpu_sys_seconds": 0.1, "max_rss_kb": 2000, "signaled": 1}
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas de las políticas de espaciado."""
+
+import time
+
+import pytest
+
+from pacing import (CompositePolicy, FixedDelay, JitteredDelay, Pacer, PacingPolicy, TokenBucket, WaitUntil,
+                    build_policy)
+
+
+def _never_run(command):
+    raise AssertionError(f"no se esperaba ejecutar {command}")
+
+
+def test_build_policy_from_each_kind_of_spec():
+    assert type(build_policy(None, _never_run)) is PacingPolicy
+    assert type(build_policy({"policy": "none"}, _never_run)) is PacingPolicy
+    assert build_policy(2, _never_run).delay == 2.0
+    assert isinstance(build_policy({"policy": "fixed", "delay": 1}, _never_run), FixedDelay)
+    assert isinstance(build_policy({"policy": "jitter", "delay": 1, "jitter": 0.5}, _never_run), JitteredDelay)
+    assert isinstance(build_policy({"policy": "rate_limit", "rate": 5}, _never_run), TokenBucket)
+    composite = build_policy([1, {"policy": "until", "command": "true"}], _never_run)
+    assert isinstance(composite, CompositePolicy)
+    assert [type(p) for p in composite.policies] == [FixedDelay, WaitUntil]
+
+
+@pytest.mark.parametrize("spec", [
+    {"policy": "desconocida"},
+    {"policy": "rate_limit", "rate": 0},
+    {"policy": "until"},
+    {"policy": "until", "command": "sh -c 'sin cerrar"},
+    "texto",
+])
+def test_invalid_specs_are_rejected(spec):
+    with pytest.raises(ValueError):
+        build_policy(spec, _never_run)
+
+
+def test_until_splits_quoted_commands_and_substitutes_target():
+    calls = []
+
+    def run_command(command):
+        calls.append(command)
+        return (0 if len(calls) == 2 else 1), "", ""
+
+    policy = build_policy({"policy": "until", "command": "sh -c 'nc -z {target} 22'", "interval": 0}, run_command)
+    policy.before("10.0.0.5")
+
+    assert calls == [["sh", "-c", "nc -z 10.0.0.5 22"]] * 2
+
+
+def test_token_bucket_limits_rate_per_target():
+    bucket = TokenBucket(rate=20, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.before("a")
+    bucket.before("b")
+
+    # Dos ejecuciones en ráfaga y dos más a 20 por segundo; el otro objetivo no espera
+    assert 0.08 <= time.monotonic() - start < 1
+
+
+def test_pacer_keeps_default_spacing_for_kinds_not_configured():
+    pacer = Pacer({"techniques": {"policy": "none"}}, _never_run)
+
+    assert type(pacer._technique_policy) is PacingPolicy
+    assert pacer._step_policy.delay == 2.0
+    assert Pacer(None, _never_run)._technique_policy.delay == 1.0
+    assert type(Pacer({"steps": 0}, _never_run)._step_policy) is FixedDelay
+
+
+def test_step_overrides_and_disabled_pacer():
+    pacer = Pacer({"techniques": 0, "steps": 0}, _never_run)
+    pacer.configure_step(1, {"techniques": {"policy": "fixed", "delay": 0.05}})
+    pacer.after_technique(0, "a")
+    pacer.after_technique(1, "a")
+
+    assert 0.05 <= pacer.pacing_seconds < 1
+    assert type(Pacer(None, _never_run, enabled=False)._step_policy) is PacingPolicy
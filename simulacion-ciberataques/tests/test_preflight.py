@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas de las verificaciones previas y de su caché."""
+
+import sys
+
+from preflight import Preflight, ProbeCache, check_prerequisite
+
+
+class FakeCommands:
+    """Simula los comandos de sondeo y registra los ejecutados."""
+
+    def __init__(self):
+        self.commands = []
+
+    def __call__(self, command):
+        self.commands.append(command)
+        if command[0] == "ping":
+            return (0 if command[-1] == "10.0.0.1" else 1), "", ""
+        if command[:2] == ["docker", "ps"]:
+            return 0, "web-1\ndb\n", ""
+        return 0, "", ""
+
+
+def test_check_prerequisite_without_processes(tmp_path, monkeypatch):
+    monkeypatch.setenv("SIMCIB_PRUEBA", "1")
+
+    assert check_prerequisite("command", "definitely-not-a-command") is not None
+    assert check_prerequisite("file", str(tmp_path / "falta.txt")) is not None
+    assert check_prerequisite("directory", str(tmp_path)) is None
+    assert check_prerequisite("environment", "SIMCIB_PRUEBA") is None
+    assert check_prerequisite("python_module", "json") is None
+    assert check_prerequisite("python_module", "modulo_inexistente") is not None
+    assert check_prerequisite("command", sys.executable) is None
+
+
+def test_probe_targets_queries_docker_once():
+    commands = FakeCommands()
+    preflight = Preflight(commands, max_workers=4)
+
+    status = preflight.probe_targets([
+        {"type": "ip", "value": "10.0.0.1"},
+        {"type": "ip", "value": "10.0.0.2"},
+        {"type": "docker", "value": "web"},
+        {"type": "docker", "value": "cache"},
+        {"type": "ip", "value": "10.0.0.1"},
+        {"type": "ip"}
+    ])
+
+    assert status == {
+        ("ip", "10.0.0.1"): True,
+        ("ip", "10.0.0.2"): False,
+        ("docker", "web"): True,
+        ("docker", "cache"): False
+    }
+    assert sum(1 for c in commands.commands if c[0] == "docker") == 1
+    assert sum(1 for c in commands.commands if c[0] == "ping") == 2
+
+
+def test_probe_cache_is_shared_between_runs(tmp_path):
+    path = str(tmp_path / "probes.json")
+    first = FakeCommands()
+    cache = ProbeCache(path, ttl=60)
+    Preflight(first, cache=cache).probe_targets([{"type": "ip", "value": "10.0.0.1"}])
+    cache.save()
+
+    second = FakeCommands()
+    status = Preflight(second, cache=ProbeCache(path, ttl=60)).probe_targets([{"type": "ip", "value": "10.0.0.1"}])
+
+    assert status == {("ip", "10.0.0.1"): True}
+    assert second.commands == []
+
+
+def test_expired_and_disabled_cache_entries_are_ignored(tmp_path):
+    cache = ProbeCache(str(tmp_path / "probes.json"), ttl=60)
+    cache.put("ip:10.0.0.1", True)
+    cache._entries["ip:10.0.0.1"]["ts"] -= 120
+
+    assert cache.get("ip:10.0.0.1") is None
+    disabled = ProbeCache(str(tmp_path / "otra.json"), ttl=0)
+    disabled.put("ip:10.0.0.1", True)
+    disabled.save()
+    assert disabled.get("ip:10.0.0.1") is None
+    assert not (tmp_path / "otra.json").exists()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas de la grabación y reproducción de comandos."""
+
+import sys
+
+import pytest
+
+from capture import OutputCapture
+from command_backend import AsyncCommandBackend
+from replay import MISSING_RETURNCODE, Fixture, FixtureWriter, RecordingBackend, ReplayBackend
+
+
+@pytest.fixture
+def fixture_path(tmp_path):
+    return str(tmp_path / "grabacion.jsonl")
+
+
+def _record(fixture_path, commands, captures=None):
+    """Ejecuta y graba una lista de comandos, devolviendo sus resultados."""
+    writer = FixtureWriter(fixture_path)
+    backend = RecordingBackend(AsyncCommandBackend(), writer)
+    try:
+        return [backend.run(command, captures=captures() if captures else None) for command in commands]
+    finally:
+        backend.close()
+        writer.close()
+
+
+def test_replay_returns_recorded_results(fixture_path):
+    command = [sys.executable, "-c", "import sys; print('salida'); print('aviso', file=sys.stderr); sys.exit(2)"]
+    (recorded,) = _record(fixture_path, [command])
+
+    replayed = ReplayBackend(Fixture(fixture_path), time_scale=0).run(command)
+
+    assert (replayed.returncode, replayed.stdout, replayed.stderr) == (2, "salida\n", "aviso\n")
+    assert replayed.returncode == recorded.returncode
+    assert replayed.user_seconds == recorded.resources()["cpu_user_seconds"]
+
+
+def test_repeated_commands_replay_in_order_then_repeat_last(fixture_path):
+    first = [sys.executable, "-c", "print(1)"]
+    _record(fixture_path, [first])
+    with open(fixture_path, 'r', encoding='utf-8') as f:
+        line = f.read()
+    with open(fixture_path, 'w', encoding='utf-8') as f:
+        f.write(line + line.replace('"1\\n"', '"2\\n"'))
+    replay = ReplayBackend(Fixture(fixture_path), time_scale=0)
+
+    assert [replay.run(first).stdout for _ in range(3)] == ["1\n", "2\n", "2\n"]
+
+
+def test_missing_command_fails_like_command_not_found(fixture_path):
+    _record(fixture_path, [[sys.executable, "-c", "print(1)"]])
+
+    result = ReplayBackend(Fixture(fixture_path), time_scale=0).run(["otro", "comando"])
+
+    assert result.returncode == MISSING_RETURNCODE
+    assert "no grabado" in result.stderr
+
+
+def test_truncated_output_is_recorded_whole(fixture_path):
+    command = [sys.executable, "-c", "print('x' * 5000)"]
+    (recorded,) = _record(fixture_path, [command],
+                          captures=lambda: {name: OutputCapture(limit=100) for name in ("stdout", "stderr")})
+
+    replayed = ReplayBackend(Fixture(fixture_path), time_scale=0).run(command)
+
+    assert "omitidos" in recorded.stdout
+    assert replayed.stdout == "x" * 5000 + "\n"
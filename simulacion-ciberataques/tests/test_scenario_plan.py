@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas de la compilación y la caché de escenarios."""
+
+import os
+
+import pytest
+
+from scenario_plan import PlanCache, ScenarioValidationError, compile_scenario, load_plan
+
+SCENARIO = """
+name: Reconocimiento
+targets:
+  - {type: ip, value: 10.0.0.5}
+steps:
+  - name: Escaneo
+    techniques:
+      - id: T1046
+        commands:
+          - nmap -sV "10.0.0.5"
+          - [echo, 42]
+  - name: Informe
+    depends_on: [Escaneo]
+    techniques:
+      - {}
+"""
+
+
+def test_compile_splits_commands_and_resolves_defaults():
+    plan = compile_scenario({
+        "steps": [{"techniques": [{"commands": ["sh -c 'echo \"a b\"'", ["echo", 1]]}]}]
+    })
+
+    (step,) = plan["steps"]
+    (technique,) = step["techniques"]
+    assert plan["name"] == "Unknown"
+    assert plan["targets"] == [] and plan["prerequisites"] == []
+    assert step["name"] == "Step 1"
+    assert (technique["id"], technique["name"]) == ("unknown", "Unknown Technique")
+    assert technique["commands"] == [["sh", "-c", 'echo "a b"'], ["echo", "1"]]
+
+
+def test_all_errors_are_reported_together():
+    with pytest.raises(ScenarioValidationError) as excinfo:
+        compile_scenario({
+            "command_timeout": "mucho",
+            "steps": [
+                {"name": "A", "stop_on_failure": "sí", "techniques": [{"commands": ["echo 'sin cerrar"]}]},
+                {"name": "B", "depends_on": ["C"]},
+                "no es un paso"
+            ],
+            "pacing": {"steps": {"policy": "desconocida"}}
+        }, "escenario.yaml")
+
+    errors = excinfo.value.errors
+    assert excinfo.value.scenario_file == "escenario.yaml"
+    assert any(e.startswith("command_timeout") for e in errors)
+    assert any(e.startswith("steps[0].stop_on_failure") for e in errors)
+    assert any(e.startswith("steps[0].techniques[0].commands[0]") for e in errors)
+    assert any("'C'" in e for e in errors)
+    assert any(e.startswith("steps[2]") for e in errors)
+    assert any(e.startswith("pacing.steps") for e in errors)
+
+
+def test_cyclic_dependencies_are_rejected():
+    with pytest.raises(ScenarioValidationError, match="cíclicas"):
+        compile_scenario({"steps": [
+            {"name": "A", "depends_on": ["B"]},
+            {"name": "B", "depends_on": ["A"]}
+        ]})
+
+
+def test_incomplete_targets_and_prerequisites_are_skipped():
+    plan = compile_scenario({
+        "targets": [{"type": "ip"}, {"type": "ip", "value": "10.0.0.5"}],
+        "prerequisites": [{"value": "nmap"}]
+    })
+
+    assert plan["targets"] == [{"type": "ip", "value": "10.0.0.5"}]
+    assert plan["prerequisites"] == []
+    with pytest.raises(ScenarioValidationError):
+        compile_scenario({"targets": ["10.0.0.5"]})
+
+
+def test_load_plan_uses_json_cache(tmp_path):
+    scenario_file = tmp_path / "escenario.yaml"
+    scenario_file.write_text(SCENARIO, encoding='utf-8')
+    cache = PlanCache(str(tmp_path / "cache"))
+
+    plan = load_plan(str(scenario_file), cache)
+    (cached,) = os.listdir(cache.cache_dir)
+
+    assert cached.endswith(".json")
+    assert load_plan(str(scenario_file), cache) == plan
+    assert plan["steps"][0]["techniques"][0]["commands"][0] == ["nmap", "-sV", "10.0.0.5"]
+
+
+def test_cache_ignores_files_writable_by_others(tmp_path):
+    cache = PlanCache(str(tmp_path))
+    cache.put("digest", {"name": "plan"})
+    path = tmp_path / "digest.json"
+    assert cache.get("digest") == {"name": "plan"}
+
+    os.chmod(str(path), 0o666)
+
+    assert cache.get("digest") is None
+
+
+def test_plans_not_representable_in_json_are_not_cached(tmp_path):
+    cache = PlanCache(str(tmp_path))
+    cache.put("digest", {"name": "plan", "vars": {1: "clave numérica"}})
+
+    assert cache.get("digest") is None
+    assert not os.listdir(str(tmp_path))
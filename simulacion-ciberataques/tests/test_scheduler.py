@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas del planificador de grafos de dependencias."""
+
+import threading
+
+import pytest
+
+from scheduler import STATUS_FAILED, STATUS_SKIPPED, STATUS_SUCCESS, DagScheduler, DependencyError
+
+
+def _recorder(order, key, result=True):
+    """Función de nodo que registra su ejecución y devuelve el resultado indicado."""
+    lock = threading.Lock()
+
+    def run():
+        with lock:
+            order.append(key)
+        return result
+    return run
+
+
+def test_dependencies_run_before_dependents():
+    order = []
+    scheduler = DagScheduler(max_workers=4)
+    scheduler.add_node("c", _recorder(order, "c"), depends_on=["a", "b"])
+    scheduler.add_node("a", _recorder(order, "a"))
+    scheduler.add_node("b", _recorder(order, "b"), depends_on=["a"])
+    scheduler.add_node("d", _recorder(order, "d"), depends_on=["c"])
+
+    status = scheduler.run()
+
+    assert status == {key: STATUS_SUCCESS for key in "abcd"}
+    assert order.index("a") < order.index("b") < order.index("c") < order.index("d")
+
+
+def test_ready_nodes_start_in_declaration_order():
+    order = []
+    scheduler = DagScheduler(max_workers=1)
+    for key in ("z", "y", "x"):
+        scheduler.add_node(key, _recorder(order, key))
+
+    scheduler.run()
+
+    assert order == ["z", "y", "x"]
+
+
+def test_stop_on_failure_skips_only_descendants():
+    order = []
+    scheduler = DagScheduler(max_workers=2)
+    scheduler.add_node("root", _recorder(order, "root", False), stop_on_failure=True)
+    scheduler.add_node("child", _recorder(order, "child"), depends_on=["root"])
+    scheduler.add_node("grandchild", _recorder(order, "grandchild"), depends_on=["child"])
+    scheduler.add_node("sibling", _recorder(order, "sibling"))
+    scheduler.add_node("after_sibling", _recorder(order, "after_sibling"), depends_on=["sibling"])
+
+    status = scheduler.run()
+
+    assert status == {
+        "root": STATUS_FAILED,
+        "child": STATUS_SKIPPED,
+        "grandchild": STATUS_SKIPPED,
+        "sibling": STATUS_SUCCESS,
+        "after_sibling": STATUS_SUCCESS
+    }
+    assert "child" not in order and "grandchild" not in order
+
+
+def test_failure_without_stop_on_failure_runs_dependents():
+    order = []
+    scheduler = DagScheduler()
+    scheduler.add_node("first", _recorder(order, "first", False))
+    scheduler.add_node("second", _recorder(order, "second"), depends_on=["first"])
+
+    assert scheduler.run() == {"first": STATUS_FAILED, "second": STATUS_SUCCESS}
+
+
+def test_exception_counts_as_failure():
+    def explode():
+        raise RuntimeError("fallo")
+
+    scheduler = DagScheduler()
+    scheduler.add_node("node", explode, stop_on_failure=True)
+    scheduler.add_node("dependent", lambda: True, depends_on=["node"])
+
+    assert scheduler.run() == {"node": STATUS_FAILED, "dependent": STATUS_SKIPPED}
+
+
+def test_cycle_is_rejected():
+    scheduler = DagScheduler()
+    scheduler.add_node("a", lambda: True, depends_on=["c"])
+    scheduler.add_node("b", lambda: True, depends_on=["a"])
+    scheduler.add_node("c", lambda: True, depends_on=["b"])
+    scheduler.add_node("free", lambda: True)
+
+    with pytest.raises(DependencyError, match="a, b, c"):
+        scheduler.run()
+
+
+def test_unknown_dependency_is_rejected():
+    scheduler = DagScheduler()
+    scheduler.add_node("a", lambda: True, depends_on=["missing"])
+
+    with pytest.raises(DependencyError, match="missing"):
+        scheduler.validate()
+
+
+def test_duplicate_node_is_rejected():
+    scheduler = DagScheduler()
+    scheduler.add_node("a", lambda: True)
+
+    with pytest.raises(DependencyError):
+        scheduler.add_node("a", lambda: True)
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas de las utilidades de configuración del entorno."""
+
+import argparse
+
+import pytest
+
+from setup_environment import positive_int, vm_resources
+
+
+def test_vm_resources_defaults_and_strings():
+    assert vm_resources({}) == (1024, 1)
+    assert vm_resources({"memory": "2048", "cpus": 2}) == (2048, 2)
+
+
+@pytest.mark.parametrize("vm", [{"memory": "2G"}, {"memory": 0}, {"cpus": -1}, {"cpus": True}])
+def test_vm_resources_rejects_invalid_values(vm):
+    with pytest.raises(ValueError, match="número entero positivo"):
+        vm_resources(vm)
+
+
+def test_positive_int():
+    assert positive_int("3") == 3
+    for value in ("0", "-1", "dos"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            positive_int(value)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas del estado aplicado de la configuración incremental."""
+
+from setup_state import STATE_FILE, SetupState
+
+VMS = [
+    {"name": "kali", "memory": 2048, "cpus": 2},
+    {"name": "victima", "memory": 1024, "cpus": 1}
+]
+
+
+def test_empty_state_applies_everything(tmp_path):
+    state = SetupState.load(str(tmp_path))
+
+    assert not state.exists()
+    assert state.delta("virtual_machines", VMS) == (VMS, [])
+    assert state.network_changed({"subnet": "192.168.56.0/24"})
+
+
+def test_delta_after_save_reports_only_changes(tmp_path):
+    state = SetupState(str(tmp_path))
+    state.record("virtual_machines", applied=VMS)
+    state.record_network({"subnet": "192.168.56.0/24"}, "simcib-net")
+    state.save()
+
+    loaded = SetupState.load(str(tmp_path))
+    changed = dict(VMS[1], memory=2048)
+    added = {"name": "servidor", "memory": 512, "cpus": 1}
+
+    assert loaded.delta("virtual_machines", VMS) == ([], [])
+    assert loaded.delta("virtual_machines", [VMS[0], changed, added]) == ([changed, added], [])
+    assert loaded.delta("virtual_machines", [VMS[0]]) == ([], ["victima"])
+    assert not loaded.network_changed({"subnet": "192.168.56.0/24"})
+    assert loaded.network["name"] == "simcib-net"
+
+
+def test_record_removed_forgets_items(tmp_path):
+    state = SetupState(str(tmp_path))
+    state.record("tools", applied=[{"name": "nmap"}, {"name": "hydra"}])
+    state.record("tools", removed=["hydra"])
+
+    assert state.delta("tools", [{"name": "nmap"}]) == ([], [])
+
+
+def test_items_without_name_are_ignored(tmp_path):
+    state = SetupState(str(tmp_path))
+
+    assert state.delta("scenarios", [{"description": "sin nombre"}]) == ([], [])
+
+
+def test_state_of_other_version_is_ignored(tmp_path):
+    (tmp_path / STATE_FILE).write_text('{"version": 0, "virtual_machines": {"kali": "x"}}', encoding='utf-8')
+
+    state = SetupState.load(str(tmp_path))
+
+    assert state.delta("virtual_machines", VMS[:1]) == (VMS[:1], [])
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+"""Pruebas del endpoint de estado de la ejecución."""
+
+import json
+import socket
+import urllib.request
+
+import pytest
+
+from status import RunStatus, StatusServer
+
+
+def test_http_status_and_metrics():
+    status = RunStatus()
+    status.start_run("run", "Escenario", 2)
+    server = StatusServer(status, "127.0.0.1:0")
+    address = server.start()
+    try:
+        with urllib.request.urlopen(f"http://{address}/status", timeout=5) as response:
+            snapshot = json.loads(response.read().decode("utf-8"))
+        with urllib.request.urlopen(f"http://{address}/metrics", timeout=5) as response:
+            metrics = response.read().decode("utf-8")
+    finally:
+        server.close()
+
+    assert snapshot["runs"]["run"]["scenario"] == "Escenario"
+    assert snapshot["runs"]["run"]["status"] == "running"
+    assert "# TYPE" in metrics
+
+
+def test_stale_unix_socket_is_replaced(tmp_path):
+    path = str(tmp_path / "status.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+
+    server = StatusServer(RunStatus(), f"unix:{path}")
+    try:
+        assert server.start() == f"unix:{path}"
+    finally:
+        server.close()
+
+
+def test_existing_file_at_socket_path_is_kept(tmp_path):
+    path = tmp_path / "status.sock"
+    path.write_text("datos", encoding="utf-8")
+
+    with pytest.raises(OSError, match="no es un socket"):
+        StatusServer(RunStatus(), f"unix:{path}").start()
+    assert path.read_text(encoding="utf-8") == "datos"
+
+
+def test_invalid_address():
+    with pytest.raises(ValueError):
+        StatusServer(RunStatus(), "sin-puerto").start()